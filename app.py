@@ -1,47 +1,132 @@
-import pandas as pd
-from flask import Flask, render_template, jsonify
-from datetime import datetime
+import os
+from datetime import date
+from flask import Flask, Response, render_template, jsonify, request
+from response_cache import JSONResponseCache
+from supplier_store import DEFAULT_PER_PAGE, DEFAULT_THRESHOLD, RAG_STATUSES, SUMMARY_GROUPS, SupplierSnapshot, SupplierStore, read_suppliers
 
 app = Flask(__name__)
 
-def load_suppliers_data():
-    df = pd.read_csv('suppliers.csv')
-    if 'color' in df.columns:
-        df = df.drop(columns=['color'])
-    suppliers_data = {}
-    for framework, group in df.groupby('framework'):
-        suppliers_list = group.to_dict('records')
-        for supplier in suppliers_list:
-            contract_start_date = datetime.strptime(supplier['contract_start'], '%Y-%m-%d')
-            contract_end_date = datetime.strptime(supplier['contract_end'], '%Y-%m-%d')
-            today = datetime.now()
-            if contract_end_date < today:
-                months_ran = (contract_end_date.year - contract_start_date.year) * 12 + (contract_end_date.month - contract_start_date.month)
-            else:
-                months_ran = (today.year - contract_start_date.year) * 12 + (today.month - contract_start_date.month)
-            supplier['details'] = {
-                'Buyer name': supplier.pop('buyer_name'),
-                'Contract value': supplier.pop('contract_value'),
-                'Contract start': supplier.pop('contract_start'),
-                'Contract end': supplier.pop('contract_end'),
-                'Reported spend': supplier.pop('reported_spend'),
-                'Months Run So Far': months_ran,
-            }
-        suppliers_data[framework] = suppliers_list
-    return suppliers_data
+def load_suppliers_data(path='suppliers.csv'):
+    """Reads suppliers.csv (or line_level.csv) into {framework: [supplier, ...]}, with months run to today"""
+    snapshot = SupplierSnapshot(read_suppliers(path), version=(0.0, 0))
+    return {framework: snapshot.suppliers(framework) for framework in snapshot.frameworks}
+
+# the dashboard's data, reloaded when the file changes. Point SUPPLIERS_DATA_PATH at the
+# pipeline's line_level.csv to serve its output, with the summary_stats.csv beside it.
+suppliers_path = os.getenv('SUPPLIERS_DATA_PATH', 'suppliers.csv')
+store = SupplierStore(
+    suppliers_path,
+    check_interval=float(os.getenv('SUPPLIERS_RELOAD_INTERVAL', '2')),
+    summary_path=os.getenv(
+        'SUMMARY_STATS_PATH', os.path.join(os.path.dirname(suppliers_path), 'summary_stats.csv')
+    ),
+)
+# serialised and compressed API responses, keyed by data version, date and query
+responses = JSONResponseCache(max_entries=int(os.getenv('RESPONSE_CACHE_ENTRIES', '256')))
+
+def cached_json(key, build):
+    """Serves build()'s payload, serialised and compressed once per key, with an ETag and 304s for unchanged data"""
+    cached = responses.get(key, build)
+    status, body, headers = cached.respond(
+        request.headers.get('Accept-Encoding'), request.headers.get('If-None-Match')
+    )
+    return Response(body, status=status, headers=headers)
 
-suppliers_data = load_suppliers_data()
+def _int_arg(args, name, default):
+    value = args.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a whole number") from None
+
+def supplier_filters(args):
+    """Reads the page, per_page, threshold, status (comma-separated), buyer and customer_group query parameters"""
+    status = args.get('status')
+    return {
+        'page': _int_arg(args, 'page', 1),
+        'per_page': _int_arg(args, 'per_page', DEFAULT_PER_PAGE),
+        'threshold': _int_arg(args, 'threshold', DEFAULT_THRESHOLD),
+        'statuses': [s.strip() for s in status.split(',') if s.strip()] if status else None,
+        'buyer': args.get('buyer') or None,
+        'customer_group': args.get('customer_group') or None,
+    }
 
 @app.route('/')
 def index():
-    frameworks = list(suppliers_data.keys())
-    initial_suppliers = suppliers_data[frameworks[0]]
-    return render_template('index.html', frameworks=frameworks, suppliers=initial_suppliers)
+    frameworks = store.frameworks
+    page = store.query(frameworks[0]) if frameworks else None
+    customer_groups = store.customer_groups(frameworks[0]) if frameworks else []
+    return render_template(
+        'index.html',
+        frameworks=frameworks,
+        page=page,
+        customer_groups=customer_groups,
+        statuses=RAG_STATUSES,
+        threshold=DEFAULT_THRESHOLD,
+    )
 
 @app.route('/suppliers/<framework>')
 def get_suppliers(framework):
-    suppliers = suppliers_data.get(framework, [])
-    return jsonify(suppliers)
+    """One page of the framework's suppliers, with their RAG status; see supplier_filters for the query parameters"""
+    snapshot = store.snapshot()
+    today = date.today()
+    try:
+        filters = supplier_filters(request.args)
+        key = ('suppliers', snapshot.version, today, framework, repr(sorted(filters.items())))
+
+        def build():
+            page = snapshot.query(framework, today=today, **filters)
+            page['customer_groups'] = snapshot.customer_groups(framework)
+            return page
+
+        return cached_json(key, build)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/summary')
+def summary():
+    snapshot = store.snapshot()
+    return render_template(
+        'summary.html',
+        frameworks=snapshot.frameworks,
+        summary_stats=snapshot.summary_stats,
+        groups=SUMMARY_GROUPS,
+        threshold=DEFAULT_THRESHOLD,
+    )
+
+@app.route('/summary/<group_by>')
+def get_summary(group_by):
+    """
+    Contract, RAG status, award value and spend totals per framework, customer_group, supplier or status,
+    with the pipeline's summary statistics. Query parameters: framework, threshold, and limit (the largest groups only)
+    """
+    snapshot = store.snapshot()
+    today = date.today()
+    try:
+        framework = request.args.get('framework') or None
+        threshold = _int_arg(request.args, 'threshold', DEFAULT_THRESHOLD)
+        limit = _int_arg(request.args, 'limit', None)
+        if limit is not None and limit < 1:
+            raise ValueError('limit must be at least 1')
+        key = ('summary', snapshot.version, today, group_by, framework, threshold, limit)
+
+        def build():
+            rollup = snapshot.rollup(group_by, framework=framework, threshold=threshold, today=today)
+            return {
+                'group_by': group_by,
+                'framework': framework,
+                'threshold': threshold,
+                'group_count': len(rollup['groups']),
+                'totals': rollup['totals'],
+                'groups': rollup['groups'][:limit],
+                'summary_stats': snapshot.summary_stats,
+            }
+
+        return cached_json(key, build)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=8080)
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_io import write_table
+from scripts.summarise_data import (
+    COMBINED_COLUMNS,
+    LINE_LEVEL_COLUMNS,
+    read_summary_inputs,
+    summarise,
+)
+
+"""
+Times summarise() against the previous two-groupby implementation on a synthetic
+combined table, and checks both give the same line-level data. Run from the
+repository root:
+
+    python -m benchmarks.bench_summarise --rows 1000000
+"""
+
+
+def two_pass_summarise(combined: pd.DataFrame, now: pd.Timestamp) -> pd.DataFrame:
+    """The line-level data as summarise_data.py computed it before summarise()."""
+    matched = combined[list(COMBINED_COLUMNS)].rename(columns=COMBINED_COLUMNS)
+    keys = ["Contracting Authority", "Supplier"]
+    matched["MostRecentStartDate"] = matched.groupby(keys)[
+        "Contract Start Date"
+    ].transform("max")
+    recent = matched[matched["Contract Start Date"] == matched["MostRecentStartDate"]]
+    aggregations = {c: "first" for c in LINE_LEVEL_COLUMNS if c not in keys}
+    aggregations["EvidencedSpend"] = "sum"
+    line_level = recent.groupby(keys).agg(aggregations).reset_index()
+    line_level["Total Months Run So Far"] = (
+        now.year - line_level["Contract Start Date"].dt.year
+    ) * 12 + (now.month - line_level["Contract Start Date"].dt.month)
+    line_level["Expired"] = line_level["Contract End Date"] < now
+    expired = line_level[line_level["Expired"]]
+    # the summary statistics, filtered one at a time
+    len(line_level[line_level["EvidencedSpend"] > 0.0])
+    len(expired[expired["EvidencedSpend"] == 0.0])
+    len(
+        line_level[
+            (~line_level["Expired"])
+            & (line_level["Total Months Run So Far"] > 3)
+            & (line_level["EvidencedSpend"] == 0.0)
+        ]
+    )
+    return line_level
+
+
+def synthetic_combined(rows: int, pairs: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Combined rows for `pairs` buyer-supplier pairs with up to three contracts each,
+    one row per MI entry. Some pairs have several contracts starting on the same
+    date, and customer groups and spend are sometimes missing.
+    """
+    rng = np.random.default_rng(seed)
+    pair = rng.integers(0, pairs, rows)
+    contract = rng.integers(0, 3, rows)
+    start = pd.Timestamp("2020-01-01") + pd.to_timedelta(
+        (pair * 7 + np.minimum(contract, 1) * 365) % 2000, unit="D"
+    )
+    return pd.DataFrame(
+        {
+            "buyer": pd.Series(pair % (pairs // 4 + 1)).map("Buyer {}".format),
+            "suppliers": pd.Series(pair % 997).map("Supplier {}".format),
+            "award_value": (pair * 3 + contract) % 100_000 * 10.0,
+            "contract_start": start,
+            "contract_end": start + pd.to_timedelta(730, unit="D"),
+            "contract_months": pd.array(np.full(rows, 24), dtype="Int64"),
+            "CustomerGroup": np.where(
+                rng.random(rows) < 0.3, None, pd.Series(pair % 7).map("Group {}".format)
+            ),
+            "awarded": start - pd.to_timedelta(30, unit="D"),
+            "EvidencedSpend": np.where(
+                rng.random(rows) < 0.2, np.nan, rng.integers(0, 5, rows) * 250.0
+            ),
+            "contract_title": pd.Series(contract).map("Contract {}".format),
+            "contract_description": "description",
+            "framework_title": "RM1557.13",
+            "source": "synthetic",
+            "latest_employees": pd.array(pair % 500, dtype="Int64"),
+        }
+    )
+
+
+def best_time(function, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--pairs", type=int, default=50_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    args = parser.parse_args()
+
+    now = pd.Timestamp.now().normalize()
+    with tempfile.TemporaryDirectory() as directory:
+        combined = synthetic_combined(args.rows, args.pairs)
+        write_table(combined, os.path.join(directory, f"combined.{args.format}"))
+        write_table(
+            combined[["buyer"]].drop_duplicates(),
+            os.path.join(directory, f"contracts.{args.format}"),
+        )
+        write_table(
+            pd.DataFrame({"SupplierName": ["S"], "CustomerName": ["C"]}),
+            os.path.join(directory, f"unmatched.{args.format}"),
+        )
+        start = time.perf_counter()
+        contracts, combined, unmatched = read_summary_inputs(directory, args.format)
+        read_time = time.perf_counter() - start
+
+    _, line_level = summarise(contracts, combined, unmatched, now=now)
+    pd.testing.assert_frame_equal(line_level, two_pass_summarise(combined, now))
+
+    before = best_time(lambda: two_pass_summarise(combined, now), args.repeats)
+    after = best_time(
+        lambda: summarise(contracts, combined, unmatched, now=now), args.repeats
+    )
+    print(
+        f"{len(combined)} combined rows, {len(line_level)} buyer-supplier pairs "
+        f"(reading combined.{args.format}: {read_time:.2f}s)"
+    )
+    print(f"two-pass groupby: {before:.3f}s")
+    print(f"summarise():      {after:.3f}s ({before / after:.1f}x faster)")
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, ContextManager, Dict, List, Optional
+
+"""
+A small asv-style benchmark harness: benchmarks are registered with @benchmark,
+timed at each of their sizes, saved as JSON and compared against a baseline.
+"""
+
+# a benchmark case: given a size, sets up its data and yields the function to time
+Case = Callable[[int], ContextManager[Callable[[], object]]]
+
+
+@dataclass
+class Benchmark:
+    name: str
+    sizes: List[int]
+    case: Case
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, sizes: List[int]) -> Callable[[Case], Case]:
+    """Register a benchmark case to be timed at each of `sizes`."""
+
+    def register(case: Case) -> Case:
+        BENCHMARKS[name] = Benchmark(name, list(sizes), case)
+        return case
+
+    return register
+
+
+def result_key(name: str, size: int) -> str:
+    return f"{name}[{size}]"
+
+
+def time_case(case: Case, size: int, repeats: int = 5) -> Dict[str, float]:
+    """
+    Time a benchmark case at one size, after one untimed warm-up call.
+    Returns:
+        {"size", "repeats", "min_s", "median_s"}
+    """
+    with case(size) as function:
+        function()
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+    return {
+        "size": size,
+        "repeats": repeats,
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+    }
+
+
+def run_benchmarks(
+    names: Optional[List[str]] = None, quick: bool = False, repeats: int = 5
+) -> Dict[str, Dict[str, float]]:
+    """
+    Time the registered benchmarks (all of them by default) at each of their sizes,
+    or only the smallest if `quick`. Prints each result as it is measured.
+    """
+    results = {}
+    for name in names or list(BENCHMARKS):
+        bench = BENCHMARKS[name]
+        for size in bench.sizes[:1] if quick else bench.sizes:
+            result = {"benchmark": name, **time_case(bench.case, size, repeats)}
+            results[result_key(name, size)] = result
+            print(
+                f"{result_key(name, size)}: {result['min_s']:.4f}s "
+                f"(median {result['median_s']:.4f}s)"
+            )
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def machine_metadata() -> Dict[str, object]:
+    """The interpreter and hardware that timings are measured on."""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.machine(),
+        "cpu_model": _cpu_model(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def save_results(results: Dict[str, Dict[str, float]], path: str) -> None:
+    """Write results as JSON, with the machine and commit they were measured on."""
+    document = {
+        "metadata": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            **machine_metadata(),
+        },
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_results(path: str) -> Dict[str, Dict[str, float]]:
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def load_metadata(path: str) -> Dict[str, object]:
+    with open(path) as f:
+        return json.load(f)["metadata"]
+
+
+def machine_differences(metadata: Dict[str, object]) -> List[str]:
+    """
+    How the machine results were measured on differs from this one: the Python
+    major.minor version, CPU model and CPU count. Empty if they match.
+    """
+    current = machine_metadata()
+    differences = []
+    recorded_python = str(metadata.get("python", "")).split(".")[:2]
+    if recorded_python != str(current["python"]).split(".")[:2]:
+        differences.append(f"Python {metadata.get('python')}, not {current['python']}")
+    for key, label in [("cpu_model", "CPU"), ("cpu_count", "CPU count")]:
+        if metadata.get(key) != current[key]:
+            differences.append(f"{label} {metadata.get(key)}, not {current[key]}")
+    return differences
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float = 0.25,
+    min_seconds: float = 0.02,
+) -> List[Dict[str, object]]:
+    """
+    Compare each result's best time with the baseline's.
+    A result is a regression if it is more than `threshold` (as a fraction) slower,
+    and an improvement if more than `threshold` faster. Differences of less than
+    `min_seconds` are ignored, as timer noise.
+    Returns:
+        one {"key", "baseline_s", "current_s", "ratio", "status"} per result also in
+        the baseline, where status is "regression", "improvement" or "ok"
+    """
+    comparisons = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        before, after = baseline[key]["min_s"], result["min_s"]
+        ratio = after / before if before > 0 else float("inf")
+        status = "ok"
+        if abs(after - before) >= min_seconds:
+            if ratio > 1 + threshold:
+                status = "regression"
+            elif ratio < 1 / (1 + threshold):
+                status = "improvement"
+        comparisons.append(
+            {
+                "key": key,
+                "baseline_s": before,
+                "current_s": after,
+                "ratio": ratio,
+                "status": status,
+            }
+        )
+    return comparisons
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from typing import Dict, List
+
+import numpy as np
+import requests
+
+from supplier_store import read_suppliers
+
+"""
+Load tests the dashboard: keeps `--concurrency` clients requesting the API for
+`--duration` seconds and reports requests/sec and latency percentiles. Without
+--url it first starts the production server (gunicorn.conf.py) on a free local
+port. Run from the repository root:
+
+    python -m benchmarks.load_test --duration 10 --concurrency 16
+    python -m benchmarks.load_test --url http://127.0.0.1:8080 --path "/suppliers/RM1557.13?per_page=500"
+"""
+
+
+def default_paths(data_path: str) -> List[str]:
+    """The first page of every framework in the supplier data."""
+    frameworks = read_suppliers(data_path)["framework"].unique()
+    return [f"/suppliers/{urllib.parse.quote(f)}" for f in frameworks]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, threads: int, timeout_s: float = 30.0):
+    """Starts gunicorn with gunicorn.conf.py on a free port; returns (process, base URL)."""
+    port = _free_port()
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), EXAMINE_THREADS=str(threads))
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "-c",
+            "gunicorn.conf.py",
+            "--bind",
+            f"127.0.0.1:{port}",
+            "wsgi:application",
+        ],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {process.returncode}")
+        try:
+            requests.get(url + "/", timeout=1)
+            return process, url
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"gunicorn didn't start within {timeout_s}s")
+
+
+def run_load(
+    url: str,
+    paths: List[str],
+    concurrency: int,
+    duration_s: float,
+    warmup_s: float = 1.0,
+    revalidate: bool = False,
+) -> Dict[str, object]:
+    """
+    Requests `paths` in turn from `concurrency` threads, each with its own
+    keep-alive session, and times the requests made after the warm-up.
+    Args:
+        revalidate: send each path's last ETag in If-None-Match, like a browser
+            reloading the page
+    Returns:
+        {"requests", "errors", "requests_per_s", "p50_ms", "p90_ms", "p99_ms",
+         "max_ms", "statuses"}
+    """
+    latencies: List[List[float]] = [[] for _ in range(concurrency)]
+    statuses: List[Counter] = [Counter() for _ in range(concurrency)]
+    start = time.perf_counter()
+    measure_from = start + warmup_s
+    stop_at = measure_from + duration_s
+
+    def client(n: int):
+        session = requests.Session()
+        etags: Dict[str, str] = {}
+        i = n
+        while True:
+            path = paths[i % len(paths)]
+            i += 1
+            headers = {"If-None-Match": etags[path]} if path in etags else {}
+            sent = time.perf_counter()
+            if sent >= stop_at:
+                return
+            try:
+                response = session.get(url + path, headers=headers, timeout=30)
+                status: object = response.status_code
+                if revalidate and "ETag" in response.headers:
+                    etags[path] = response.headers["ETag"]
+            except requests.RequestException as e:
+                status = type(e).__name__
+            if sent >= measure_from:
+                latencies[n].append(time.perf_counter() - sent)
+                statuses[n][status] += 1
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    times = np.concatenate([np.array(t) for t in latencies]) * 1000
+    counts = sum(statuses, Counter())
+    ok = sum(v for k, v in counts.items() if k in (200, 304))
+    return {
+        "requests": int(len(times)),
+        "errors": int(len(times) - ok),
+        "requests_per_s": len(times) / duration_s,
+        "p50_ms": float(np.percentile(times, 50)) if len(times) else None,
+        "p90_ms": float(np.percentile(times, 90)) if len(times) else None,
+        "p99_ms": float(np.percentile(times, 99)) if len(times) else None,
+        "max_ms": float(times.max()) if len(times) else None,
+        "statuses": {str(k): v for k, v in sorted(counts.items(), key=str)},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    # server to test; by default gunicorn is started locally
+    parser.add_argument("--url")
+    # paths to request, by default the first page of every framework
+    parser.add_argument("--path", action="append")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--revalidate", action="store_true")
+    # gunicorn workers and threads per worker, when started locally
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    paths = args.path or default_paths(
+        os.getenv("SUPPLIERS_DATA_PATH", "suppliers.csv")
+    )
+    process, url = None, args.url
+    if url is None:
+        process, url = start_server(args.workers, args.threads)
+    try:
+        results = run_load(
+            url, paths, args.concurrency, args.duration, args.warmup, args.revalidate
+        )
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print(
+        f"{results['requests']} requests in {args.duration:.0f}s from {args.concurrency} "
+        f"clients: {results['requests_per_s']:.1f} requests/s, {results['errors']} errors"
+    )
+    if results["requests"]:
+        print(
+            f"latency p50 {results['p50_ms']:.1f} ms, p90 {results['p90_ms']:.1f} ms, "
+            f"p99 {results['p99_ms']:.1f} ms, max {results['max_ms']:.1f} ms"
+        )
+    print(f"statuses: {results['statuses']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {**vars(args), "url": url, "paths": paths, **results}, f, indent=2
+            )
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+from benchmarks import suite  # noqa: F401  (registers the benchmarks)
+from benchmarks.harness import (
+    BENCHMARKS,
+    compare,
+    load_metadata,
+    load_results,
+    machine_differences,
+    run_benchmarks,
+    save_results,
+)
+
+"""
+Runs the benchmark suite, saves the timings as JSON and flags regressions against
+the stored baseline. Run from the repository root:
+
+    python -m benchmarks.run                     # every benchmark at every size
+    python -m benchmarks.run --quick             # smallest size only
+    python -m benchmarks.run --only summarise --only combine_data
+    python -m benchmarks.run --save-baseline     # make these timings the baseline
+"""
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--only", action="append", choices=list(BENCHMARKS))
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    # a benchmark is flagged if its best time is this fraction slower than the baseline's
+    parser.add_argument("--threshold", type=float, default=0.25)
+    # differences smaller than this many seconds are ignored as noise
+    parser.add_argument("--min-seconds", type=float, default=0.02)
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.only, quick=args.quick, repeats=args.repeats)
+    save_results(results, args.output)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        baseline = load_results(args.baseline) if os.path.exists(args.baseline) else {}
+        baseline.update(results)
+        save_results(baseline, args.baseline)
+        print(f"Baseline updated: {args.baseline}")
+        sys.exit(0)
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        sys.exit(0)
+
+    differences = machine_differences(load_metadata(args.baseline))
+    if differences:
+        # absolute timings only compare on the same interpreter and hardware
+        print(
+            "Warning: the baseline was measured on a different machine ("
+            + "; ".join(differences)
+            + "), so timing differences may be the machine's. Re-record it here with "
+            "--save-baseline before relying on --threshold."
+        )
+    comparisons = compare(
+        results,
+        load_results(args.baseline),
+        threshold=args.threshold,
+        min_seconds=args.min_seconds,
+    )
+    for c in comparisons:
+        print(
+            f"{c['status'].upper():12} {c['key']:32} {c['baseline_s']:.4f}s -> "
+            f"{c['current_s']:.4f}s ({c['ratio']:.2f}x)"
+        )
+    regressions = [c for c in comparisons if c["status"] == "regression"]
+    if regressions:
+        print(
+            f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}"
+        )
+        sys.exit(1)
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+import app
+import utils
+from benchmarks.bench_summarise import synthetic_combined
+from benchmarks.harness import benchmark
+from data_io import table_path, write_table
+from evaluation.mock_langchain_model import MockChatModelWithCandidates
+from scripts.combine_data import combine_data
+from scripts.summarise_data import summarise
+from synthetic_data import generate_synthetic_data
+
+"""
+The benchmarks run by `python -m benchmarks.run`, each at several data sizes.
+Calls to the matching API go to a local mock server, so timings include real
+HTTP round trips but no model.
+"""
+
+
+class _MockMatchHandler(BaseHTTPRequestHandler):
+    """Answers every /match request with no match, and accepts candidate sets."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+    # headers and body are written separately; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply({"match": None})
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path.endswith("/candidate_sets"):
+            self._reply({"candidate_set_id": payload["candidate_set_id"]})
+        else:
+            self._reply({"match": None})
+
+    def log_message(self, *args):
+        pass
+
+
+@contextlib.contextmanager
+def mock_match_api():
+    """Serve the mock matching API on a free local port, yielding its /match URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MockMatchHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/match"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@contextlib.contextmanager
+def _environ(**values):
+    previous = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _quietly(function):
+    """function, with its progress prints discarded."""
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return function()
+
+    return run
+
+
+@benchmark("combine_data", sizes=[10_000, 100_000])
+@contextlib.contextmanager
+def combine_data_case(rows):
+    """combine_data on `rows` synthetic MI rows, matching names against the mock API."""
+    with tempfile.TemporaryDirectory() as directory, mock_match_api() as url:
+        contracts, mi, reg = generate_synthetic_data(rows)
+        paths = [
+            table_path(directory, "contracts", "csv"),
+            table_path(directory, "mi", "csv"),
+            table_path(directory, "reg_number_supplier_key", "csv"),
+        ]
+        for table, path in zip([contracts, mi, reg], paths):
+            write_table(table, path)
+        with _environ(NAME_MATCH_API_ENDPOINT=url, MATCH_STRING_API_TRANSPORT="get"):
+            utils.configure_http_session(retries=0)
+            try:
+                yield _quietly(lambda: combine_data(*paths, candidate_top_k=50))
+            finally:
+                utils.configure_http_session()
+
+
+@benchmark("summarise", sizes=[100_000, 1_000_000])
+@contextlib.contextmanager
+def summarise_case(rows):
+    """summarise() on `rows` combined rows, about 20 per buyer-supplier pair."""
+    combined = synthetic_combined(rows, pairs=max(rows // 20, 10))
+    contracts = combined[["buyer"]].drop_duplicates()
+    unmatched = pd.DataFrame({"SupplierName": ["S"], "CustomerName": ["C"]})
+    now = pd.Timestamp("2026-01-01")
+    yield lambda: summarise(contracts, combined, unmatched, now=now)
+
+
+@benchmark("load_suppliers_data", sizes=[1_000, 10_000])
+@contextlib.contextmanager
+def load_suppliers_data_case(rows):
+    """app.load_suppliers_data() reading a suppliers.csv of `rows` rows."""
+    rng = np.random.default_rng(0)
+    start = pd.Timestamp("2020-01-01") + pd.to_timedelta(
+        rng.integers(0, 2000, rows), unit="D"
+    )
+    suppliers = pd.DataFrame(
+        {
+            "framework": rng.choice(["RM1557.12", "RM1557.13", "RM1557.14"], rows),
+            "name": [f"Supplier {i}" for i in range(rows)],
+            "buyer_name": [f"Buyer {i % 500}" for i in range(rows)],
+            "contract_value": rng.integers(1, 1000, rows) * 1000,
+            "contract_start": start.strftime("%Y-%m-%d"),
+            "contract_end": (start + pd.to_timedelta(730, unit="D")).strftime(
+                "%Y-%m-%d"
+            ),
+            "reported_spend": rng.integers(0, 500, rows) * 100,
+        }
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "suppliers.csv")
+        suppliers.to_csv(path, index=False)
+        yield lambda: app.load_suppliers_data(path)
+
+
+@benchmark("match_string_via_api", sizes=[10, 100, 1_000])
+@contextlib.contextmanager
+def match_string_via_api_case(candidates):
+    """20 GET requests to the mock API, each sending `candidates` candidate names."""
+    names = [f"Buyer Organisation {i}" for i in range(candidates)]
+    with mock_match_api() as url:
+        utils.configure_http_session(retries=0)
+
+        def match():
+            for i in range(20):
+                utils.match_string_via_api(
+                    f"Customer {i}", names, api_url=url, transport="get"
+                )
+
+        try:
+            yield match
+        finally:
+            utils.configure_http_session()
+
+
+@benchmark("mock_chat_model", sizes=[1_000, 10_000])
+@contextlib.contextmanager
+def mock_chat_model_case(candidates):
+    """MockChatModelWithCandidates answering 50 queries against `candidates` names."""
+    names = [f"Buyer Organisation {i}" for i in range(candidates)]
+    model = MockChatModelWithCandidates(names)
+    queries = [
+        [SimpleNamespace(content=f"buyer organisaton {i * 37 % candidates}")]
+        for i in range(50)
+    ]
+
+    def answer():
+        for messages in queries:
+            model.invoke(messages)
+
+    yield answer
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+"""Local candidate retrieval (blocking) ahead of the matching API."""
+
+ACRONYM_STOPWORDS = {"of", "for", "and", "the", "&", "in", "on", "to"}
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def _normalise(name: str) -> str:
+    return _NON_ALNUM.sub(" ", str(name).lower()).strip()
+
+
+def char_ngrams(name: str, n: int = 3) -> Counter:
+    """Character n-grams of the normalised name, padded so word edges count."""
+    padded = f" {_normalise(name)} "
+    if len(padded) < n:
+        return Counter([padded])
+    return Counter(padded[i : i + n] for i in range(len(padded) - n + 1))
+
+
+def acronym(name: str, keep_stopwords: bool = False) -> str:
+    """
+    First letters of the significant words, e.g.
+    "Department for Work and Pensions" -> "DWP". With keep_stopwords,
+    "Ministry of Defence" -> "MOD" rather than "MD".
+    """
+    words = [
+        w
+        for w in _normalise(name).split()
+        if keep_stopwords or w not in ACRONYM_STOPWORDS
+    ]
+    return "".join(w[0] for w in words).upper()
+
+
+def _compact(name: str) -> str:
+    return _normalise(name).replace(" ", "").upper()
+
+
+class CandidateIndex:
+    """
+    Character n-gram TF-IDF index over a candidate list, built once and queried
+    for the top-K most similar candidates per input.
+
+    Candidates whose acronym equals the input (or which are themselves the input's
+    acronym) are always ranked first, since n-grams can't see that relationship.
+    """
+
+    def __init__(self, candidates: List[str], ngram_size: int = 3):
+        self.candidates = list(dict.fromkeys(candidates))
+        self.ngram_size = ngram_size
+
+        grams_per_candidate = [char_ngrams(c, ngram_size) for c in self.candidates]
+        doc_freq: Counter = Counter()
+        for grams in grams_per_candidate:
+            doc_freq.update(grams.keys())
+        n_docs = len(self.candidates)
+        self._idf: Dict[str, float] = {
+            g: math.log((1 + n_docs) / (1 + df)) + 1.0 for g, df in doc_freq.items()
+        }
+
+        postings: Dict[str, Tuple[List[int], List[float]]] = defaultdict(
+            lambda: ([], [])
+        )
+        for idx, grams in enumerate(grams_per_candidate):
+            weights = {g: tf * self._idf[g] for g, tf in grams.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for g, w in weights.items():
+                ids, vals = postings[g]
+                ids.append(idx)
+                vals.append(w / norm)
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {
+            g: (np.asarray(ids, dtype=np.int64), np.asarray(vals, dtype=np.float64))
+            for g, (ids, vals) in postings.items()
+        }
+
+        self._by_acronym: Dict[str, List[int]] = defaultdict(list)
+        self._by_compact: Dict[str, List[int]] = defaultdict(list)
+        for idx, c in enumerate(self.candidates):
+            for a in {acronym(c), acronym(c, keep_stopwords=True)}:
+                if len(a) > 1:
+                    self._by_acronym[a].append(idx)
+            self._by_compact[_compact(c)].append(idx)
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def scores(self, query: str) -> np.ndarray:
+        """Cosine similarity between the query and every candidate."""
+        scores = np.zeros(len(self.candidates), dtype=np.float64)
+        grams = char_ngrams(query, self.ngram_size)
+        weights = {g: tf * self._idf[g] for g, tf in grams.items() if g in self._idf}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        if not norm:
+            return scores
+        for g, w in weights.items():
+            ids, vals = self._postings[g]
+            scores[ids] += vals * (w / norm)
+        return scores
+
+    def top_k(self, query: str, k: int) -> List[str]:
+        """The k most plausible candidates for `query`, best first."""
+        if k <= 0 or not self.candidates:
+            return []
+        scores = self.scores(query)
+        acronym_hits = self._by_acronym.get(_compact(query), []) + self._by_compact.get(
+            _compact(query), []
+        )
+        for query_acronym in {acronym(query), acronym(query, keep_stopwords=True)}:
+            if len(query_acronym) > 1:
+                acronym_hits.extend(self._by_compact.get(query_acronym, []))
+        # acronym (and exact) hits outrank any n-gram score (cosine is at most 1)
+        scores[np.unique(np.asarray(acronym_hits, dtype=np.int64))] += 2.0
+
+        k = min(k, len(self.candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        # stable ordering: score descending, then original candidate order
+        top = top[np.lexsort((top, -scores[top]))]
+        return [self.candidates[i] for i in top]
+
+
+def shortlist_candidates(
+    inputs: List[str], candidates: List[str], k: int, ngram_size: int = 3
+) -> List[List[str]]:
+    """Build one index over `candidates` and return the top-k shortlist per input."""
+    index = CandidateIndex(candidates, ngram_size=ngram_size)
+    return [index.top_k(i, k) for i in inputs]
+
+
+def recall_at_k(
+    index: CandidateIndex, inputs: List[str], ground_truths: List[str], k: int
+) -> float:
+    """Share of inputs whose ground truth survives blocking at top-k."""
+    if not inputs:
+        return float("nan")
+    hits = sum(gt in index.top_k(i, k) for i, gt in zip(inputs, ground_truths))
+    return hits / len(inputs)
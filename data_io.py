@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import os
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+"""Reading and writing the pipeline's intermediate tables as CSV or Parquet."""
+
+FORMATS = ("csv", "parquet")
+
+# Explicit column types for the pipeline tables. Columns not listed keep the type
+# stored in the file (Parquet) or inferred by pandas (CSV).
+SCHEMAS: Dict[str, Dict[str, str]] = {
+    "contracts": {
+        "buyer": "str",
+        "suppliers": "str",
+        "SupplierCompanyRegistrationNumber": "str",
+        "contract_start": "datetime",
+        "contract_end": "datetime",
+        "awarded": "datetime",
+        "contract_months": "Int64",
+        "award_value": "float",
+        "contract_title": "str",
+        "contract_description": "str",
+        "framework_title": "str",
+        "source": "str",
+        "latest_employees": "Int64",
+    },
+    "mi": {
+        "SupplierName": "str",
+        "SupplierKey": "Int64",
+        "CustomerName": "str",
+        "CustomerGroup": "str",
+        "FinancialYear": "Int64",
+        "FinancialMonth": "Int64",
+        "EvidencedSpend": "float",
+    },
+    "reg_number_supplier_key": {
+        "SupplierCompanyRegistrationNumber": "str",
+        "SupplierKey": "Int64",
+    },
+}
+SCHEMAS["combined"] = {
+    **SCHEMAS["contracts"],
+    **{k: v for k, v in SCHEMAS["mi"].items() if k != "SupplierKey"},
+    "SupplierKey_x": "Int64",
+    "SupplierKey_y": "Int64",
+    "PairID": "str",
+    "AIMatchedName": "str",
+    # only present when MI is aggregated per supplier-buyer pair before the join
+    "MIEntries": "Int64",
+    "MonthlySpend": "str",
+}
+SCHEMAS["unmatched"] = {**SCHEMAS["mi"], "PairID": "str"}
+
+
+def table_path(directory: str, name: str, data_format: str = "csv") -> str:
+    """Path of a pipeline table, e.g. table_path("data/dummy", "mi", "parquet")."""
+    if data_format not in FORMATS:
+        raise ValueError(
+            f"Unknown data format '{data_format}'. Expected one of {FORMATS}."
+        )
+    return os.path.join(directory, f"{name}.{data_format}")
+
+
+def _format_of(path: str) -> str:
+    ext = os.path.splitext(path)[1].lstrip(".").lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Unknown data format for {path}. Expected one of {FORMATS}.")
+    return ext
+
+
+def _to_str(col: pd.Series) -> pd.Series:
+    if pd.api.types.is_float_dtype(col):
+        # e.g. registration numbers stored as floats because of missing values
+        whole = col.dropna()
+        if (whole == whole.round()).all():
+            col = col.astype("Int64")
+    return col.astype(str).astype(object).where(col.notna(), None)
+
+
+def apply_schema(df: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
+    """Coerce the columns of `df` that appear in `schema` to their declared type."""
+    for col, kind in schema.items():
+        if col not in df.columns:
+            continue
+        if kind == "str":
+            df[col] = _to_str(df[col])
+        elif kind == "Int64":
+            df[col] = pd.to_numeric(df[col]).astype("Int64")
+        elif kind == "float":
+            df[col] = pd.to_numeric(df[col]).astype("float64")
+        elif kind == "datetime":
+            df[col] = pd.to_datetime(df[col])
+        else:
+            raise ValueError(f"Unknown column type '{kind}' for {col}")
+    return df
+
+
+def read_table(
+    path: str, table: Optional[str] = None, columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Read a pipeline table, picking CSV or Parquet from the file extension.
+    Args:
+        path: path of the .csv or .parquet file
+        table: name of the schema in SCHEMAS to apply, if any
+        columns: only load these columns
+    """
+    schema = SCHEMAS.get(table, {}) if table else {}
+    if _format_of(path) == "parquet":
+        df = pd.read_parquet(path, columns=columns)
+    else:
+        str_cols = {c: str for c, kind in schema.items() if kind == "str"}
+        df = pd.read_csv(path, usecols=columns, dtype=str_cols, low_memory=False)
+    return apply_schema(df, schema)
+
+
+def iter_table(
+    path: str,
+    table: Optional[str] = None,
+    chunksize: int = 100_000,
+    columns: Optional[List[str]] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Read a pipeline table in chunks of up to `chunksize` rows, so tables larger than
+    memory can be processed one chunk at a time. Arguments are as for read_table.
+    At least one chunk is always yielded, empty if the table has no rows.
+    """
+    schema = SCHEMAS.get(table, {}) if table else {}
+    if _format_of(path) == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        chunks = (
+            batch.to_pandas()
+            for batch in parquet_file.iter_batches(
+                batch_size=chunksize, columns=columns
+            )
+        )
+        empty = parquet_file.schema_arrow.empty_table().to_pandas()
+        if columns is not None:
+            empty = empty[columns]
+    else:
+        str_cols = {c: str for c, kind in schema.items() if kind == "str"}
+        chunks = pd.read_csv(path, usecols=columns, dtype=str_cols, chunksize=chunksize)
+        empty = None
+    yielded = False
+    for chunk in chunks:
+        yielded = True
+        yield apply_schema(chunk, schema)
+    if not yielded:
+        if empty is None:
+            empty = pd.read_csv(path, usecols=columns, dtype=str_cols, nrows=0)
+        yield apply_schema(empty, schema)
+
+
+def write_table(df: pd.DataFrame, path: str) -> None:
+    """Write a pipeline table, picking CSV or Parquet from the file extension."""
+    if _format_of(path) == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+class TableWriter:
+    """
+    Append DataFrame chunks to a CSV or Parquet file. Chunks go to a ".part" file
+    that only replaces `path` on close(), so a failed write never leaves a
+    truncated table behind.
+    """
+
+    def __init__(self, path: str, table: Optional[str] = None):
+        self.path = path
+        self.part_path = path + ".part"
+        self.format = _format_of(path)
+        self.schema = SCHEMAS.get(table, {}) if table else {}
+        self.rows = 0
+        self._writer = None
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        chunk = apply_schema(chunk, self.schema)
+        if self.format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._writer is None:
+                arrow_schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                # an all-null first chunk would otherwise fix a column to the null type
+                arrow_schema = pa.schema(
+                    [
+                        f.with_type(pa.string()) if pa.types.is_null(f.type) else f
+                        for f in arrow_schema
+                    ],
+                    # keep the pandas metadata so nullable dtypes round-trip
+                    metadata=arrow_schema.metadata,
+                )
+                self._writer = pq.ParquetWriter(self.part_path, arrow_schema)
+            self._writer.write_table(
+                pa.Table.from_pandas(
+                    chunk, schema=self._writer.schema, preserve_index=False
+                )
+            )
+        else:
+            chunk.to_csv(
+                self.part_path,
+                mode="w" if self.rows == 0 else "a",
+                header=self.rows == 0,
+                index=False,
+            )
+        self.rows += len(chunk)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        os.replace(self.part_path, self.path)
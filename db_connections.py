@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+"""Shared, pooled database engines for the data extraction scripts."""
+
+_engines: Dict[str, Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def database_url(database: Optional[str]) -> str:
+    """
+    SQLAlchemy URL for `database` on the server configured by the DB_* environment
+    variables, e.g. database_url(os.getenv("DB_NAME_MI")).
+    """
+    return "{}://{}:{}@{}:{}/{}?driver={}".format(
+        os.getenv("DB_TYPE"),
+        os.getenv("DB_USER"),
+        os.getenv("DB_PWD"),
+        os.getenv("DB_SERVER"),
+        os.getenv("DB_PORT"),
+        database,
+        os.getenv("DB_DRIVER"),
+    )
+
+
+def get_engine(url: str) -> Engine:
+    """
+    Pooled engine for `url`, created on first use and shared afterwards, so every
+    extract against the same database reuses the same connections.
+    Connections are checked before use, since extracts can sit idle for a while.
+    """
+    with _engines_lock:
+        engine = _engines.get(url)
+        if engine is None:
+            engine = create_engine(url, pool_pre_ping=True)
+            _engines[url] = engine
+        return engine
+
+
+def dispose_engines() -> None:
+    """Close every pooled connection."""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+
+def run_concurrently(
+    jobs: Dict[str, Callable[[], object]], max_workers: Optional[int] = None
+) -> Dict[str, object]:
+    """
+    Run independent jobs (e.g. one extract per database) in threads, so the total
+    time is that of the slowest job rather than the sum. Prints each job's time.
+    The first job to fail re-raises its exception once the others have finished.
+    Returns:
+        {job name: return value}
+    """
+    timings: Dict[str, float] = {}
+
+    def timed(name: str, job: Callable[[], object]) -> object:
+        start = time.perf_counter()
+        try:
+            return job()
+        finally:
+            timings[name] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers or max(len(jobs), 1)) as executor:
+        futures = {
+            name: executor.submit(timed, name, job) for name, job in jobs.items()
+        }
+    wall_clock = time.perf_counter() - start
+
+    for name in jobs:
+        status = "failed" if futures[name].exception() else "done"
+        print(f"  {name}: {timings[name]:.1f}s ({status})")
+    print(
+        f"{len(jobs)} jobs took {wall_clock:.1f}s "
+        f"(sum of job times {sum(timings.values()):.1f}s)"
+    )
+    return {name: future.result() for name, future in futures.items()}
@@ -1,15 +1,20 @@
 from __future__ import annotations
 
 import json
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Dict, Any, List
 import random
+import numpy as np
 import pandas as pd
 import hashlib
 import yaml
 import mlflow
 
-from utils import match_string_via_api
+from candidate_index import CandidateIndex, recall_at_k
+from match_cache import MatchCache, cached_match_string_via_api
 from evaluation.mock_langchain_model import MockChatModelWithCandidates  # noqa: F401
 
 mlflow.set_tracking_uri("file:./mlruns")
@@ -80,7 +85,9 @@ def build_candidate_list(
     - Positive rows: ground truth + N distractors
     - Negative rows: only distractors (no forced ground truth)
     """
-    rng = random.Random(seed + hash(input_name) % 1_000_000)
+    # sha256 rather than hash(): str hashes are salted per process, which would give
+    # different candidate lists (and so match cache misses) on every run
+    rng = random.Random(seed + int(sha256_text(input_name)[:8], 16) % 1_000_000)
 
     pool = [c for c in all_candidates if c.strip()]
     pool_no_gt = [c for c in pool if c != ground_truth]
@@ -145,6 +152,7 @@ def should_rerun_prompt(
     num_distractors: int,
     seed: int,
     similarity_threshold: float,
+    candidate_top_k: int | None = None,
     ) -> bool:
     """
     Returns True if we should rerun, False if an identical run already exists.
@@ -159,7 +167,8 @@ def should_rerun_prompt(
         f"params.dataset_sha = '{dataset_sha}' AND "
         f"params.num_distractors = '{num_distractors}' AND "
         f"params.seed = '{seed}' AND "
-        f"params.similarity_threshold = '{similarity_threshold}'"
+        f"params.similarity_threshold = '{similarity_threshold}' AND "
+        f"params.candidate_top_k = '{candidate_top_k}'"
     )
     runs = mlflow.search_runs(
         experiment_ids=[exp.experiment_id],
@@ -168,6 +177,166 @@ def should_rerun_prompt(
     )
     return runs.empty  # rerun only if no matching run found
 
+def build_candidate_pool(df: pd.DataFrame) -> List[str]:
+    """
+    Build candidate pool from all non-negative match options in the dataset.
+    """
+    gt_col = _find_col(df, "Match Option")
+    return sorted({
+        str(x).strip()
+        for x in df[gt_col].astype(str).tolist()
+        if str(x).strip().lower() not in {"n/a", "na", "none", ""}
+    })
+
+def _predict_row(
+    spec: Dict[str, Any],
+    prompt_path: str,
+    cache: MatchCache | None,
+    ) -> Dict[str, Any]:
+    """
+    Call the matching API for one benchmark row and score the prediction.
+    """
+    start = time.perf_counter()
+    pred_raw = cached_match_string_via_api(
+        input_string=spec["input_name"],
+        list_of_strings=spec["candidates"],
+        cache=cache,
+        prompt_path=prompt_path,
+    )
+    end = time.perf_counter()
+
+    pred = normalise_prediction(pred_raw)
+
+    if spec["is_negative_control"]:
+        correct = (pred == "None")
+    else:
+        # must match exactly the ground truth string
+        correct = (pred == spec["ground_truth"])
+
+    return {
+        "row": {
+            "input_name": spec["input_name"],
+            "ground_truth": spec["ground_truth"],
+            "prediction": pred,
+            "correct": int(correct),
+            "error_type": spec["error_type"],
+            "entity_type": spec["entity_type"],
+            "is_negative_control": int(spec["is_negative_control"]),
+        },
+        "started": start,
+        "finished": end,
+    }
+
+def submit_benchmark_rows(
+    df: pd.DataFrame,
+    prompt_path: str,
+    executor: Executor,
+    num_distractors: int = 20,
+    seed: int = 42,
+    cache: MatchCache | None = None,
+    candidate_top_k: int | None = None,
+    ) -> Dict[str, Any]:
+    """
+    Build every row's candidate list (in the calling thread, so seeding is unchanged)
+    and submit the API calls to `executor`. Pass the result to collect_benchmark_rows().
+    Sharing one executor across prompts fans prompts out under a single concurrency cap.
+    """
+    input_col = _find_col(df, "Input Name")
+    gt_col = _find_col(df, "Match Option")
+    err_col = _find_col(df, "Error Type")
+    ent_col = _find_col(df, "Entity Type")
+    all_candidates = build_candidate_pool(df)
+
+    futures: List[Future] = []
+    for _, r in df.iterrows():
+        input_name = str(r[input_col]).strip()
+        ground_truth = str(r[gt_col]).strip()
+        error_type = str(r[err_col]).strip()
+        neg = is_negative_control(error_type, ground_truth)
+
+        # Candidate list strategy:
+        # Use the full pool for all rows (simulates real retrieval)
+        candidates = build_candidate_list(
+                        input_name=input_name,
+                        ground_truth=ground_truth,
+                        all_candidates=all_candidates,
+                        num_distractors=num_distractors,
+                        seed=seed,
+                        is_negative=neg,
+                    )
+        if candidate_top_k:
+            candidates = CandidateIndex(candidates).top_k(input_name, candidate_top_k)
+
+        spec = {
+            "input_name": input_name,
+            "ground_truth": ground_truth,
+            "error_type": error_type,
+            "entity_type": str(r[ent_col]).strip(),
+            "is_negative_control": neg,
+            "candidates": candidates,
+        }
+        futures.append(executor.submit(_predict_row, spec, prompt_path, cache))
+
+    return {"futures": futures}
+
+def collect_benchmark_rows(submitted: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Wait for submitted rows and return them in dataset order, with per-row latencies
+    and the wall-clock time from the first row's API call starting to the last one's
+    finishing. Time spent queued behind other prompts' rows in a shared pool isn't
+    counted.
+    """
+    results = [f.result() for f in submitted["futures"]]
+    first_started = min((r["started"] for r in results), default=0.0)
+    last_finished = max((r["finished"] for r in results), default=0.0)
+    return {
+        "rows": [r["row"] for r in results],
+        "latencies_s": [r["finished"] - r["started"] for r in results],
+        "first_started": first_started,
+        "last_finished": last_finished,
+        "wall_clock_s": last_finished - first_started,
+    }
+
+def pool_timing(collected: List[Dict[str, Any]]) -> Dict[str, float]:
+    """
+    Wall-clock time and throughput of several prompts' rows run in one shared pool,
+    from collect_benchmark_rows() results.
+    """
+    rows = sum(len(c["rows"]) for c in collected)
+    wall_clock_s = max(c["last_finished"] for c in collected) - min(
+        c["first_started"] for c in collected
+    )
+    return {
+        "pool_rows": rows,
+        "pool_wall_clock_s": wall_clock_s,
+        "pool_throughput_rows_per_s": rows / wall_clock_s if wall_clock_s > 0 else 0.0,
+    }
+
+def predict_benchmark_rows(
+    df: pd.DataFrame,
+    prompt_path: str,
+    num_distractors: int = 20,
+    seed: int = 42,
+    cache: MatchCache | None = None,
+    candidate_top_k: int | None = None,
+    max_workers: int = 1,
+    ) -> Dict[str, Any]:
+    """
+    Predict every benchmark row for one prompt, with at most `max_workers` API calls
+    in flight. Rows come back in dataset order whatever the concurrency.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        submitted = submit_benchmark_rows(
+            df=df,
+            prompt_path=prompt_path,
+            executor=executor,
+            num_distractors=num_distractors,
+            seed=seed,
+            cache=cache,
+            candidate_top_k=candidate_top_k,
+        )
+        return collect_benchmark_rows(submitted)
+
 def evaluate_prompt_on_benchmark(
     df: pd.DataFrame,
     prompt_path: str,
@@ -178,28 +347,35 @@ def evaluate_prompt_on_benchmark(
     run_name: str | None = None,
     prompt_sha: str = "",
     dataset_sha: str = "",
+    cache: MatchCache | None = None,
+    candidate_top_k: int | None = None,
+    blocking_ks: List[int] | None = None,
+    max_workers: int = 1,
+    predictions: Dict[str, Any] | None = None,
     ) -> Dict[str, Any]:
 
     """
     Evaluate one prompt file on the benchmark dataset and log to MLflow as one run.
+
+    candidate_top_k: if set, each row's candidate list is cut down to its top K by
+    local blocking (candidate_index.CandidateIndex) before calling the API.
+    blocking_ks: K values at which to log blocking recall over the full candidate pool.
+    max_workers: maximum concurrent API calls when predicting rows.
+    predictions: rows already predicted via submit/collect_benchmark_rows(), e.g. by a
+    pool shared across prompts; predicted here when omitted.
     """
     input_col = _find_col(df, "Input Name")
     gt_col = _find_col(df, "Match Option")
     err_col = _find_col(df, "Error Type")
-    ent_col = _find_col(df, "Entity Type")
 
-    # Build candidate pool from all non-negative match options in the dataset
-    all_candidates = sorted({
-        str(x).strip()
-        for x in df[gt_col].astype(str).tolist()
-        if str(x).strip().lower() not in {"n/a", "na", "none", ""}
-    })
+    all_candidates = build_candidate_pool(df)
 
     final_run_name = run_name or Path(prompt_path).stem
 
     mlflow.set_experiment(experiment_name)
 
-    with mlflow.start_run(run_name=final_run_name):
+    # nested under the pool's run when prompts are evaluated together (see main)
+    with mlflow.start_run(run_name=final_run_name, nested=mlflow.active_run() is not None):
         # Params (include hashes so skip logic works)
         mlflow.log_param("run_description", final_run_name)
         mlflow.log_param("prompt_file", Path(prompt_path).name)
@@ -212,52 +388,38 @@ def evaluate_prompt_on_benchmark(
         mlflow.log_param("similarity_threshold", similarity_threshold)
         mlflow.log_param("num_distractors", num_distractors)
         mlflow.log_param("seed", seed)
-
-
-        rows = []
-        for _, r in df.iterrows():
-            input_name = str(r[input_col]).strip()
-            ground_truth = str(r[gt_col]).strip()
-            error_type = str(r[err_col]).strip()
-            entity_type = str(r[ent_col]).strip()
-
-            neg = is_negative_control(error_type, ground_truth)
-
-            # Candidate list strategy:
-            # Use the full pool for all rows (simulates real retrieval)
-            candidates = build_candidate_list(
-                            input_name=input_name,
-                            ground_truth=ground_truth,
-                            all_candidates=all_candidates,
-                            num_distractors=num_distractors,
-                            seed=seed,
-                            is_negative=neg,
-                        )
-
-
-            pred_raw = match_string_via_api(
-                input_string=input_name,
-                list_of_strings=candidates,
+        mlflow.log_param("candidate_top_k", candidate_top_k)
+        mlflow.log_param("max_workers", max_workers)
+
+        # Blocking recall: how often the ground truth survives top-K retrieval
+        # from the full candidate pool (positive rows only)
+        positive_mask = [
+            not is_negative_control(str(e).strip(), str(g).strip())
+            for e, g in zip(df[err_col], df[gt_col])
+        ]
+        positive_inputs = df.loc[positive_mask, input_col].astype(str).str.strip().tolist()
+        positive_truths = df.loc[positive_mask, gt_col].astype(str).str.strip().tolist()
+        pool_index = CandidateIndex(all_candidates)
+        ks = set(blocking_ks or [1, 5, 10, 20, 50])
+        if candidate_top_k:
+            ks.add(candidate_top_k)
+        blocking_recall = {}
+        for k in sorted(ks):
+            blocking_recall[k] = recall_at_k(pool_index, positive_inputs, positive_truths, k)
+            mlflow.log_metric(f"blocking_recall_at_{k}", blocking_recall[k])
+
+
+        if predictions is None:
+            predictions = predict_benchmark_rows(
+                df=df,
                 prompt_path=prompt_path,
+                num_distractors=num_distractors,
+                seed=seed,
+                cache=cache,
+                candidate_top_k=candidate_top_k,
+                max_workers=max_workers,
             )
-
-            pred = normalise_prediction(pred_raw)
-
-            if neg:
-                correct = (pred == "None")
-            else:
-                # must match exactly the ground truth string
-                correct = (pred == ground_truth)
-
-            rows.append({
-                "input_name": input_name,
-                "ground_truth": ground_truth,
-                "prediction": pred,
-                "correct": int(correct),
-                "error_type": error_type,
-                "entity_type": entity_type,
-                "is_negative_control": int(neg),
-            })
+        rows = predictions["rows"]
 
         out = pd.DataFrame(rows)
 
@@ -265,6 +427,20 @@ def evaluate_prompt_on_benchmark(
         acc_overall = float(out["correct"].mean())
         mlflow.log_metric("accuracy_overall", acc_overall)
 
+        # Throughput and latency of the API calls
+        latencies = np.asarray(predictions["latencies_s"], dtype=float)
+        wall_clock_s = float(predictions["wall_clock_s"])
+        timing = {
+            "wall_clock_s": wall_clock_s,
+            "throughput_rows_per_s": len(rows) / wall_clock_s if wall_clock_s > 0 else 0.0,
+        }
+        if len(latencies):
+            for q in (50, 95, 99):
+                timing[f"row_latency_p{q}_s"] = float(np.percentile(latencies, q))
+            timing["row_latency_mean_s"] = float(latencies.mean())
+        for k, v in timing.items():
+            mlflow.log_metric(k, v)
+
         # By error type
         by_err = out.groupby("error_type")["correct"].mean().to_dict()
         for k, v in by_err.items():
@@ -295,6 +471,9 @@ def evaluate_prompt_on_benchmark(
             "similarity_threshold": similarity_threshold,
             "num_distractors": num_distractors,
             "seed": seed,
+            "candidate_top_k": candidate_top_k,
+            "blocking_recall": blocking_recall,
+            "timing": timing,
             "prompt_sha": prompt_sha,
             "dataset_sha": dataset_sha,
         }
@@ -341,7 +520,19 @@ def main():
     similarity_threshold = 0.85
     num_distractors = 20
     seed = 42
+    # None sends every candidate; set an int to shortlist locally before the API call
+    candidate_top_k = None
 
+    cache = MatchCache(
+        ".match_cache/evaluation_matches.sqlite",
+        max_entries=cfg.get("match_cache", {}).get("max_entries"),
+        max_age_days=cfg.get("match_cache", {}).get("max_age_days"),
+    )
+
+    # API calls across all prompts share one pool, capped at max_workers
+    max_workers = int(cfg.get("evaluation", {}).get("max_workers", 1))
+
+    to_run = []
     for p in prompt_files:
         prompt_file = p.name
         prompt_sha = sha256_file(str(p))
@@ -359,21 +550,58 @@ def main():
             num_distractors=num_distractors,
             seed=seed,
             similarity_threshold=similarity_threshold,
+            candidate_top_k=candidate_top_k,
         ):
             print(f"SKIP: {prompt_file} (no changes detected)")
             continue
+        to_run.append((p, prompt_sha, run_name))
 
-        evaluate_prompt_on_benchmark(
-            df=df,
-            prompt_path=str(p),
-            experiment_name=experiment_name,
-            similarity_threshold=similarity_threshold,
-            num_distractors=num_distractors,
-            seed=seed,
-            run_name=run_name,
-            prompt_sha=prompt_sha,
-            dataset_sha=dataset_sha,
-        )
+    # the prompts' runs are nested under one run for the shared pool
+    mlflow.set_experiment(experiment_name)
+    pool_run = mlflow.start_run(run_name="prompt_pool") if to_run else nullcontext()
+    with pool_run, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # submit every prompt up front so they run concurrently...
+        submitted = [
+            submit_benchmark_rows(
+                df=df,
+                prompt_path=str(p),
+                executor=executor,
+                num_distractors=num_distractors,
+                seed=seed,
+                cache=cache,
+                candidate_top_k=candidate_top_k,
+            )
+            for p, _, _ in to_run
+        ]
+        # ...then log each run, in prompt order, as soon as its rows are done
+        collected = []
+        for (p, prompt_sha, run_name), sub in zip(to_run, submitted):
+            collected.append(collect_benchmark_rows(sub))
+            evaluate_prompt_on_benchmark(
+                df=df,
+                prompt_path=str(p),
+                experiment_name=experiment_name,
+                similarity_threshold=similarity_threshold,
+                num_distractors=num_distractors,
+                seed=seed,
+                run_name=run_name,
+                prompt_sha=prompt_sha,
+                dataset_sha=dataset_sha,
+                cache=cache,
+                candidate_top_k=candidate_top_k,
+                max_workers=max_workers,
+                predictions=collected[-1],
+            )
+        if collected:
+            # the pool as a whole, on the parent run; per-prompt timings are on each prompt's run
+            pool = pool_timing(collected)
+            mlflow.log_param("max_workers", max_workers)
+            mlflow.log_param("prompts", len(collected))
+            for k, v in pool.items():
+                mlflow.log_metric(k, v)
+
+    print(f"Match cache: {cache.hits} hits, {cache.misses} sent to the API")
+    cache.close()
 
 
 if __name__ == "__main__":
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from difflib import SequenceMatcher
+from dataclasses import dataclass, field
 from typing import List
 
+from evaluation.similarity import SimilarityEngine
+
 @dataclass
 class MockResponse:
     content: str
@@ -12,20 +13,21 @@ class MockResponse:
 class MockChatModelWithCandidates:
     candidates: List[str]
     similarity_threshold: float = 0.85
+    # candidate character counts, precomputed once rather than per query
+    _engine: SimilarityEngine = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._engine = SimilarityEngine(self.candidates)
 
     def invoke(self, messages):
         input_name = (messages[-1].content or "").strip()
         if not self.candidates:
             return MockResponse("None")
 
-        best = None
-        best_score = 0.0
-        for c in self.candidates:
-            score = SequenceMatcher(None, input_name.lower(), str(c).lower()).ratio()
-            if score > best_score:
-                best_score = score
-                best = c
+        # same result as taking the first candidate with the highest
+        # SequenceMatcher(None, input.lower(), candidate.lower()).ratio()
+        best, best_score = self._engine.best_match(input_name, self.similarity_threshold)
 
         if best is None or best_score < self.similarity_threshold:
             return MockResponse("None")
-        return MockResponse(str(best))
+        return MockResponse(str(self.candidates[best]))
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+"""
+Batched SequenceMatcher scoring for the mock matching model.
+
+SequenceMatcher.ratio() is 2*M/T, where M (matched characters) can never exceed
+the multiset character overlap of the two strings. That overlap - quick_ratio() -
+is computed for every candidate at once with NumPy, and the exact ratio is only
+computed for the few candidates whose bound can still win, so results are
+identical to scoring every candidate with SequenceMatcher.
+"""
+
+
+class SimilarityEngine:
+    """Precomputed character counts over a fixed candidate list."""
+
+    def __init__(self, candidates: List[str]):
+        self.candidates = list(candidates)
+        self._lowered = [str(c).lower() for c in self.candidates]
+
+        vocab = sorted({ch for c in self._lowered for ch in c})
+        self._columns = {ch: i for i, ch in enumerate(vocab)}
+        self._counts = np.zeros((len(self._lowered), len(vocab)), dtype=np.int32)
+        for row, c in enumerate(self._lowered):
+            for ch, n in Counter(c).items():
+                self._counts[row, self._columns[ch]] = n
+        self._lengths = np.fromiter(
+            (len(c) for c in self._lowered), dtype=np.int64, count=len(self._lowered)
+        )
+        self._order = np.arange(len(self._lowered))
+
+    def upper_bounds(self, query: str) -> np.ndarray:
+        """SequenceMatcher(None, query, c).quick_ratio() for every candidate."""
+        q = query.lower()
+        query_counts = Counter(q)
+        cols = [self._columns[ch] for ch in query_counts if ch in self._columns]
+        if cols:
+            q_vals = np.array(
+                [query_counts[ch] for ch in query_counts if ch in self._columns],
+                dtype=np.int32,
+            )
+            overlap = np.minimum(self._counts[:, cols], q_vals).sum(axis=1)
+        else:
+            overlap = np.zeros(len(self._lowered), dtype=np.int64)
+        total = self._lengths + len(q)
+        # SequenceMatcher scores two empty strings as 1.0
+        return np.where(total > 0, 2.0 * overlap / np.maximum(total, 1), 1.0)
+
+    def best_match(
+        self, query: str, threshold: float = 0.0
+    ) -> Tuple[Optional[int], float]:
+        """
+        Index and ratio of the first candidate with the highest
+        SequenceMatcher(None, query.lower(), candidate.lower()).ratio().
+
+        Candidates that can't reach `threshold` are skipped, so when no candidate
+        reaches it the returned score is a lower bound and the index may be None.
+        """
+        if not self.candidates:
+            return None, 0.0
+        q = query.lower()
+        bounds = self.upper_bounds(query)
+        # best bound first; ties in original candidate order
+        order = np.lexsort((self._order, -bounds))
+
+        best_idx: Optional[int] = None
+        best_score = 0.0
+        for idx in order:
+            bound = bounds[idx]
+            if bound < best_score or bound < threshold or bound == 0.0:
+                break
+            score = SequenceMatcher(None, q, self._lowered[idx]).ratio()
+            # strict > keeps the earliest candidate on ties, as a linear scan would
+            if score > best_score or (
+                score == best_score and best_idx is not None and idx < best_idx
+            ):
+                best_idx, best_score = int(idx), score
+        return best_idx, best_score
+
+    def best_matches(
+        self, queries: List[str], threshold: float = 0.0
+    ) -> List[Tuple[Optional[int], float]]:
+        return [self.best_match(q, threshold) for q in queries]
@@ -0,0 +1,23 @@
+import gc
+import multiprocessing
+import os
+
+"""gunicorn settings for serving the dashboard: gunicorn -c gunicorn.conf.py wsgi:application"""
+
+bind = os.getenv("EXAMINE_BIND", "0.0.0.0:8080")
+# load the app, and its supplier data, once in the master before forking workers
+preload_app = True
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() + 1))
+# requests are short and mostly served from memory, so each worker also runs threads
+worker_class = "gthread"
+threads = int(os.getenv("EXAMINE_THREADS", "4"))
+timeout = 30
+keepalive = 5
+accesslog = os.getenv("EXAMINE_ACCESS_LOG") or None
+
+
+def when_ready(server):
+    # The preloaded data lives for the life of the process; move it out of the garbage
+    # collector's generations so collections in the workers don't write to, and so
+    # copy, the pages they share with the master.
+    gc.freeze()
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+from typing import Dict, List, Optional
+
+from utils import match_string_via_api, match_strings_via_api, sha256_candidates
+
+"""Persistent on-disk cache of matching API results."""
+
+
+def sha256_prompt(prompt_path: Optional[str]) -> str:
+    """
+    Hash the prompt file contents. Falls back to hashing the path itself when the
+    prompt only exists on the API server.
+    """
+    if not prompt_path:
+        return ""
+    if os.path.isfile(prompt_path):
+        h = hashlib.sha256()
+        with open(prompt_path, "rb") as f:
+            for chunk in iter(lambda: f.read(8192), b""):
+                h.update(chunk)
+        return h.hexdigest()
+    return hashlib.sha256(prompt_path.encode("utf-8")).hexdigest()
+
+
+def sha256_endpoint(
+    api_url: Optional[str] = None,
+    extra_query_params: Optional[Dict[str, str]] = None,
+) -> str:
+    """
+    Hash the matching endpoint a call goes to: `api_url` or MATCH_STRING_API_URL,
+    plus any extra query parameters (e.g. a model name), which can change the answer.
+    """
+    endpoint = api_url or os.getenv("MATCH_STRING_API_URL") or ""
+    params = urllib.parse.urlencode(sorted((extra_query_params or {}).items()))
+    return hashlib.sha256(f"{endpoint} {params}".encode("utf-8")).hexdigest()
+
+
+class MatchCache:
+    """
+    SQLite-backed store of match results keyed by
+    (input string, candidate list hash, prompt hash, endpoint hash), so pointing the
+    client at a different or upgraded matcher doesn't reuse another one's answers.
+
+    Eviction:
+      - entries older than `max_age_days` are dropped
+      - when more than `max_entries` remain, the least recently used are dropped
+    Eviction runs when the cache is opened and closed, not on every write, so the
+    file may hold more than `max_entries` while it is open.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: Optional[int] = None,
+        max_age_days: Optional[float] = None,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS matches (
+                input_string TEXT NOT NULL,
+                candidates_sha TEXT NOT NULL,
+                prompt_sha TEXT NOT NULL,
+                endpoint_sha TEXT NOT NULL,
+                match TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL,
+                PRIMARY KEY (input_string, candidates_sha, prompt_sha, endpoint_sha)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS matches_last_used ON matches (last_used_at)"
+        )
+        self._conn.commit()
+        self.evict()
+
+    def __enter__(self) -> "MatchCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.evict()
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+
+    def get_many(
+        self,
+        inputs: List[str],
+        candidates_sha: str,
+        prompt_sha: str,
+        endpoint_sha: str = "",
+    ) -> Dict[str, str]:
+        """Return {input_string: match} for the inputs that are cached."""
+        found: Dict[str, str] = {}
+        now = time.time()
+        with self._lock:
+            for input_string in dict.fromkeys(inputs):
+                row = self._conn.execute(
+                    "SELECT match FROM matches WHERE input_string = ? AND candidates_sha = ? AND prompt_sha = ? AND endpoint_sha = ?",
+                    (input_string, candidates_sha, prompt_sha, endpoint_sha),
+                ).fetchone()
+                if row is not None:
+                    found[input_string] = row[0]
+            if found:
+                self._conn.executemany(
+                    "UPDATE matches SET last_used_at = ? WHERE input_string = ? AND candidates_sha = ? AND prompt_sha = ? AND endpoint_sha = ?",
+                    [(now, i, candidates_sha, prompt_sha, endpoint_sha) for i in found],
+                )
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(dict.fromkeys(inputs)) - len(found)
+        return found
+
+    def set_many(
+        self,
+        matches: Dict[str, str],
+        candidates_sha: str,
+        prompt_sha: str,
+        endpoint_sha: str = "",
+    ) -> None:
+        """Store {input_string: match} results."""
+        if not matches:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO matches VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        input_string,
+                        candidates_sha,
+                        prompt_sha,
+                        endpoint_sha,
+                        match,
+                        now,
+                        now,
+                    )
+                    for input_string, match in matches.items()
+                ],
+            )
+            self._conn.commit()
+
+    def evict(self) -> None:
+        with self._lock:
+            if self.max_age_days is not None:
+                cutoff = time.time() - self.max_age_days * 86400
+                self._conn.execute(
+                    "DELETE FROM matches WHERE created_at < ?", (cutoff,)
+                )
+            if self.max_entries is not None:
+                self._conn.execute(
+                    """
+                    DELETE FROM matches WHERE rowid IN (
+                        SELECT rowid FROM matches ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (self.max_entries,),
+                )
+            self._conn.commit()
+
+
+def cached_match_strings_via_api(
+    inputs: List[str],
+    list_of_strings: List[str],
+    cache: Optional[MatchCache],
+    prompt_path: Optional[str] = None,
+    candidate_lists: Optional[List[List[str]]] = None,
+    **kwargs,
+) -> List[str]:
+    """
+    match_strings_via_api() that only sends inputs missing from `cache`.
+    Results are returned in input order; extra kwargs are passed through.
+    With per-input `candidate_lists`, each input is keyed on its own list.
+    """
+    if cache is None:
+        return match_strings_via_api(
+            inputs=inputs,
+            list_of_strings=list_of_strings,
+            prompt_path=prompt_path,
+            candidate_lists=candidate_lists,
+            **kwargs,
+        )
+
+    prompt_sha = sha256_prompt(prompt_path)
+    endpoint_sha = sha256_endpoint(
+        kwargs.get("api_url"), kwargs.get("extra_query_params")
+    )
+    # (input, candidates) pairs are the unit of work; identical pairs are sent once
+    if candidate_lists is None:
+        shared_sha = sha256_candidates(list_of_strings)
+        keys = [(i, shared_sha) for i in inputs]
+    else:
+        keys = [(i, sha256_candidates(c)) for i, c in zip(inputs, candidate_lists)]
+        lists_by_key = dict(zip(keys, candidate_lists))
+
+    inputs_by_sha: Dict[str, List[str]] = {}
+    for input_string, candidates_sha in dict.fromkeys(keys):
+        inputs_by_sha.setdefault(candidates_sha, []).append(input_string)
+    results: Dict[tuple, str] = {}
+    for candidates_sha, group in inputs_by_sha.items():
+        found = cache.get_many(group, candidates_sha, prompt_sha, endpoint_sha)
+        results.update({(i, candidates_sha): m for i, m in found.items()})
+
+    missing = [k for k in dict.fromkeys(keys) if k not in results]
+    if missing:
+        matches = match_strings_via_api(
+            inputs=[i for i, _ in missing],
+            list_of_strings=list_of_strings,
+            prompt_path=prompt_path,
+            candidate_lists=(
+                None if candidate_lists is None else [lists_by_key[k] for k in missing]
+            ),
+            **kwargs,
+        )
+        fresh = dict(zip(missing, matches))
+        fresh_by_sha: Dict[str, Dict[str, str]] = {}
+        for (input_string, candidates_sha), match in fresh.items():
+            fresh_by_sha.setdefault(candidates_sha, {})[input_string] = match
+        for candidates_sha, group in fresh_by_sha.items():
+            cache.set_many(group, candidates_sha, prompt_sha, endpoint_sha)
+        results.update(fresh)
+
+    return [results[k] for k in keys]
+
+
+def cached_match_string_via_api(
+    input_string: str,
+    list_of_strings: List[str],
+    cache: Optional[MatchCache],
+    prompt_path: Optional[str] = None,
+    **kwargs,
+) -> str:
+    """match_string_via_api() backed by `cache`; extra kwargs are passed through."""
+    if cache is None:
+        return match_string_via_api(
+            input_string=input_string,
+            list_of_strings=list_of_strings,
+            prompt_path=prompt_path,
+            **kwargs,
+        )
+
+    candidates_sha = sha256_candidates(list_of_strings)
+    prompt_sha = sha256_prompt(prompt_path)
+    endpoint_sha = sha256_endpoint(
+        kwargs.get("api_url"), kwargs.get("extra_query_params")
+    )
+    found = cache.get_many([input_string], candidates_sha, prompt_sha, endpoint_sha)
+    if input_string in found:
+        return found[input_string]
+
+    result = match_string_via_api(
+        input_string=input_string,
+        list_of_strings=list_of_strings,
+        prompt_path=prompt_path,
+        **kwargs,
+    )
+    cache.set_many({input_string: result}, candidates_sha, prompt_sha, endpoint_sha)
+    return result
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+"""Deterministic buyer name canonicalisation, resolving trivial name variants locally."""
+
+# Tiers are tried in order; later tiers strip more of the name and so are less certain
+TIERS = ("canonical", "brackets", "legal_suffix")
+
+LEGAL_SUFFIXES = ("limited", "plc", "llp", "lp", "inc", "llc")
+
+_SUFFIX_REPLACEMENTS = [
+    (re.compile(r"\bltd\b"), "limited"),
+    (re.compile(r"\bpublic limited company\b"), "plc"),
+]
+_BRACKETED = re.compile(r"[\(\[\{][^\)\]\}]*[\)\]\}]")
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_TRAILING_SUFFIX = re.compile(r"(?:\s+(?:" + "|".join(LEGAL_SUFFIXES) + r"))+$")
+
+
+def canonical_name(name: str) -> str:
+    """
+    Case-, punctuation- and whitespace-insensitive form of a name, with "&" read as
+    "and", "Ltd" as "Limited" and bracketed text kept as plain words, e.g.
+    "Accenture (UK) Ltd." -> "accenture uk limited".
+    """
+    text = str(name).lower().replace("&", " and ")
+    text = _NON_ALNUM.sub(" ", text).strip()
+    text = re.sub(r"^the\s+", "", text)
+    for pattern, replacement in _SUFFIX_REPLACEMENTS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def name_keys(name: str) -> Dict[str, str]:
+    """
+    Lookup key for each tier:
+      - canonical: canonical_name()
+      - brackets: bracketed text removed first, e.g. "Transport for London (TfL)"
+        -> "transport for london"
+      - legal_suffix: additionally drop trailing legal suffixes such as Limited/PLC/LLP
+    """
+    canonical = canonical_name(name)
+    without_brackets = canonical_name(_BRACKETED.sub(" ", str(name)))
+    without_suffix = _TRAILING_SUFFIX.sub("", without_brackets).strip()
+    return {
+        "canonical": canonical,
+        "brackets": without_brackets,
+        "legal_suffix": without_suffix or without_brackets,
+    }
+
+
+class CanonicalNameIndex:
+    """
+    Precomputed tier key -> buyer name lookups over the contract buyer names.
+
+    A key resolves only when every buyer sharing it is the same canonical name
+    (spelling variants of one buyer resolve to the first one seen); keys shared by
+    genuinely different buyers are ambiguous and left for the matching API.
+    """
+
+    def __init__(self, buyers: List[str]):
+        self._index: Dict[str, Dict[str, Optional[str]]] = {t: {} for t in TIERS}
+        canonical_of: Dict[str, Dict[str, str]] = {t: {} for t in TIERS}
+        for buyer in dict.fromkeys(b for b in buyers if isinstance(b, str)):
+            keys = name_keys(buyer)
+            for tier in TIERS:
+                key = keys[tier]
+                if not key:
+                    continue
+                if key not in self._index[tier]:
+                    self._index[tier][key] = buyer
+                    canonical_of[tier][key] = keys["canonical"]
+                elif canonical_of[tier][key] != keys["canonical"]:
+                    self._index[tier][key] = None  # ambiguous
+
+    def resolve(self, name: str) -> Tuple[Optional[str], Optional[str]]:
+        """Return (buyer, tier) for the first tier that resolves `name`, else (None, None)."""
+        if not isinstance(name, str):
+            return None, None
+        keys = name_keys(name)
+        for tier in TIERS:
+            buyer = self._index[tier].get(keys[tier])
+            if buyer is not None:
+                return buyer, tier
+        return None, None
+
+    def resolve_many(
+        self, names: List[str]
+    ) -> Tuple[Dict[str, str], List[str], Counter]:
+        """
+        Split `names` into ({name: buyer} resolved locally, names left unresolved,
+        Counter of names resolved per tier).
+        """
+        resolved: Dict[str, str] = {}
+        unresolved: List[str] = []
+        per_tier: Counter = Counter()
+        for name in names:
+            buyer, tier = self.resolve(name)
+            if buyer is None:
+                unresolved.append(name)
+            else:
+                resolved[name] = buyer
+                per_tier[tier] += 1
+        return resolved, unresolved, per_tier
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+"""Integer keys for joining MI onto contracts by (SupplierKey, buyer name) pair."""
+
+# key of pairs that can't join onto any contract
+NO_MATCH = -1
+# key of pairs with a missing buyer name. Missing names never formed a PairID
+# string, so all such pairs compared equal whatever their SupplierKey.
+MISSING_NAME = -2
+
+
+def _supplier_values(supplier_keys: pd.Series) -> np.ndarray:
+    return (
+        pd.Series(supplier_keys)
+        .astype("Int64")
+        .to_numpy(dtype="float64", na_value=np.nan)
+    )
+
+
+def _lower(names: pd.Series) -> pd.Series:
+    return pd.Series(names, dtype=object).str.lower()
+
+
+def pair_ids(supplier_keys: pd.Series, names: pd.Series) -> pd.Series:
+    """Human-readable PairID strings, e.g. "1+buyer a", for the output tables."""
+    return pd.Series(supplier_keys).astype("Int64").astype(str) + "+" + _lower(names)
+
+
+class PairKeyEncoder:
+    """
+    Encodes (SupplierKey, lower-cased buyer name) pairs as int64 keys, so MI can be
+    joined onto contracts on one integer column rather than on PairID strings.
+
+    The vocabularies are the contract supplier keys and lower-cased buyer names,
+    factorised once: any pair outside them can't join onto a contract and gets the
+    key NO_MATCH. Two pairs get the same key exactly when their PairID strings
+    would be equal.
+    """
+
+    def __init__(self, supplier_keys: pd.Series, buyers: pd.Series):
+        self._suppliers = pd.Index(pd.unique(_supplier_values(supplier_keys)))
+        self._buyers = pd.Index(pd.unique(_lower(buyers).to_numpy()))
+
+    def encode(self, supplier_keys: pd.Series, names: pd.Series) -> np.ndarray:
+        # names repeat heavily, so only the distinct names are lower-cased and looked up
+        codes, uniques = pd.factorize(pd.Series(names, dtype=object))
+        unique_name_codes = self._buyers.get_indexer(_lower(uniques).to_numpy())
+        # missing names have code -1, which picks the trailing NO_MATCH
+        name_codes = np.append(unique_name_codes, NO_MATCH)[codes]
+        supplier_codes = self._suppliers.get_indexer(_supplier_values(supplier_keys))
+        keys = np.where(
+            (supplier_codes >= 0) & (name_codes >= 0),
+            supplier_codes.astype(np.int64) * len(self._buyers) + name_codes,
+            NO_MATCH,
+        )
+        keys[codes < 0] = MISSING_NAME
+        return keys
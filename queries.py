@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import bindparam, text
+from sqlalchemy.sql.elements import TextClause
+
+"""
+Parametrised SQL for the live extracts.
+
+Builders return (sql, params) so callers can wrap or extend a query before
+binding it with bind(). Queries are written for SQL Server ("mssql"); the few
+dialect-specific constructs also have a SQLite form, for the local stand-in
+built by scripts/get_data.py.
+"""
+
+DIALECTS = ("mssql", "sqlite")
+
+Query = Tuple[str, Dict[str, object]]
+
+# expands a contract's JSON array of supplier ids into one row per supplier (alias j)
+_JSON_ARRAY_ROWS = {
+    "mssql": "CROSS APPLY OPENJSON(t1.supplier_ids) AS j",
+    "sqlite": "JOIN json_each(t1.supplier_ids) AS j",
+}
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def bind(sql: str, params: Optional[Dict[str, object]] = None) -> TextClause:
+    """text(sql) with `params` bound; timestamps are bound as datetimes."""
+    return text(sql).bindparams(
+        *[
+            bindparam(k, v.to_pydatetime() if isinstance(v, pd.Timestamp) else v)
+            for k, v in (params or {}).items()
+        ]
+    )
+
+
+def _check_dialect(dialect: str) -> None:
+    if dialect not in DIALECTS:
+        raise ValueError(
+            f"Unsupported SQL dialect '{dialect}'. Expected one of {DIALECTS}."
+        )
+
+
+def _check_identifier(name: str) -> str:
+    # table names can't be bound parameters, so only plain identifiers are allowed
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid table name '{name}'")
+    return name
+
+
+def framework_filter(column: str, frameworks: List[str]) -> Query:
+    """
+    Condition matching rows whose `column` starts with any of `frameworks`, e.g.
+    framework_filter("t1.framework_title", ["RM1557.13"]) ->
+    ("(t1.framework_title LIKE :framework_0)", {"framework_0": "RM1557.13%"})
+    """
+    if not frameworks:
+        raise ValueError("At least one framework is required")
+    params = {f"framework_{i}": f"{f}%" for i, f in enumerate(frameworks)}
+    sql = " OR ".join(f"{column} LIKE :{name}" for name in params)
+    return f"({sql})", params
+
+
+def contracts_query(frameworks: List[str], dialect: str = "mssql") -> Query:
+    """
+    Contract details for the given frameworks from the Tussell data, one row per
+    contract and supplier. Only contracts whose supplier is found in the Tussell
+    supplier table are kept, since the supplier's Company Registration Number is
+    what links contracts to MI data.
+    """
+    _check_dialect(dialect)
+    condition, params = framework_filter("t1.framework_title", frameworks)
+    sql = f"""
+        SELECT
+            t1.awarded,
+            t1.buyer,
+            t1.suppliers,
+            t1.award_value,
+            t1.contract_start,
+            t1.contract_end,
+            t1.contract_months,
+            t1.contract_title,
+            t1.contract_description,
+            t1.framework_title,
+            t1.source,
+            t1.supplier_ids,
+            t2.id AS supplier_id,
+            t2.company_number,
+            t2.latest_employees
+        FROM dbo.Tussell_ContractAwards_API t1
+        {_JSON_ARRAY_ROWS[dialect]}
+        INNER JOIN dbo.Tussell_Suppliers_API t2
+            ON CAST(j.value AS INT) = t2.id
+        WHERE {condition}
+    """
+    return sql, params
+
+
+def mi_query(mi_framework: str = "G-Cloud 1") -> Query:
+    """G-Cloud MI spend entries."""
+    sql = """
+        SELECT SupplierName,SupplierKey,CustomerName,[Group],FinancialYear,FinancialMonth,EvidencedSpend
+        FROM dbo.AggregatedSpendReporting
+        WHERE FrameworkName LIKE :mi_framework
+    """
+    return sql, {"mi_framework": f"{mi_framework}%"}
+
+
+def reg_number_supplier_key_query() -> Query:
+    """Supplier Company Registration Numbers and CCS SupplierKeys, to join Tussell to MI data."""
+    return (
+        "SELECT SupplierKey,CompanyRegistrationNumber FROM sf.Attributes_sf_vw_Suppliers",
+        {},
+    )
+
+
+def customer_groups_from_mi_query(mi_tables: List[str]) -> Query:
+    """
+    Distinct (CustomerName, CustomerGroup) pairs across the per-framework MI tables,
+    combined and deduplicated on the server.
+    """
+    if not mi_tables:
+        raise ValueError("At least one MI table is required")
+    union = "\n            UNION ALL\n            ".join(
+        f"SELECT CustomerName, CustomerGroup FROM mi.{_check_identifier(t)}"
+        for t in mi_tables
+    )
+    sql = f"""
+        SELECT DISTINCT CustomerName, CustomerGroup FROM (
+            {union}
+        ) AS customer_groups
+    """
+    return sql, {}
+
+
+def customer_groups_from_sf_query() -> Query:
+    """Distinct (CustomerName, CustomerGroup) pairs from Salesforce."""
+    return (
+        "SELECT DISTINCT CustomerName, [Group] AS CustomerGroup FROM sf.Attributes_sf_vw_Customers",
+        {},
+    )
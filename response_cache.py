@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional: without it responses are gzip-compressed
+    brotli = None
+
+"""
+JSON API responses serialised once, compressed once per encoding, and served
+with strong ETags so unchanged data can be revalidated with a 304.
+"""
+
+# bodies smaller than this aren't worth compressing
+MIN_COMPRESS_BYTES = 1024
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> List[str]:
+    """
+    The content codings a client accepts, from its Accept-Encoding header, in
+    the order the server prefers them: br, gzip, then identity.
+    """
+    qualities: Dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        qualities[name] = q
+    wildcard = qualities.get("*", 0.0)
+    available = ["br", "gzip"] if brotli is not None else ["gzip"]
+    encodings = [e for e in available if qualities.get(e, wildcard) > 0]
+    return encodings + ["identity"]
+
+
+def _etag_values(if_none_match: Optional[str]) -> List[str]:
+    tags = []
+    for tag in (if_none_match or "").split(","):
+        tag = tag.strip()
+        # If-None-Match uses the weak comparison, so W/ is ignored
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag:
+            tags.append(tag)
+    return tags
+
+
+class CachedJSON:
+    """
+    One serialised JSON body and its compressed encodings, each built on first
+    use. Every encoding has its own strong ETag, derived from the body's hash.
+    """
+
+    def __init__(self, payload: Any):
+        self.body = json.dumps(
+            payload, separators=(",", ":"), ensure_ascii=False
+        ).encode("utf-8")
+        self.digest = hashlib.blake2b(self.body, digest_size=16).hexdigest()
+        self._encoded: Dict[str, bytes] = {"identity": self.body}
+
+    def etag(self, encoding: str = "identity") -> str:
+        if encoding == "identity":
+            return f'"{self.digest}"'
+        return f'"{self.digest}-{encoding}"'
+
+    def encoded(self, encoding: str) -> bytes:
+        if encoding not in self._encoded:
+            if encoding == "gzip":
+                data = gzip.compress(self.body, compresslevel=6, mtime=0)
+            elif encoding == "br":
+                data = brotli.compress(self.body, quality=5)
+            else:
+                raise ValueError(f"Unsupported encoding {encoding}")
+            self._encoded[encoding] = data
+        return self._encoded[encoding]
+
+    def respond(
+        self, accept_encoding: Optional[str] = None, if_none_match: Optional[str] = None
+    ) -> Tuple[int, bytes, Dict[str, str]]:
+        """
+        The response to a request with these headers.
+        Returns:
+            (status, body, headers): 304 with no body if the client's If-None-Match
+            has the ETag of any encoding of this body, otherwise 200 with the body in
+            the best encoding the client accepts
+        """
+        encoding = "identity"
+        if len(self.body) >= MIN_COMPRESS_BYTES:
+            encoding = accepted_encodings(accept_encoding)[0]
+        headers = {
+            "ETag": self.etag(encoding),
+            "Vary": "Accept-Encoding",
+            # clients may keep the body but must revalidate it, since the data can reload
+            "Cache-Control": "no-cache",
+        }
+        tags = _etag_values(if_none_match)
+        variants = {self.etag(e) for e in ("identity", "gzip", "br")}
+        if "*" in tags or variants.intersection(tags):
+            return 304, b"", headers
+        body = self.encoded(encoding)
+        headers["Content-Type"] = "application/json"
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return 200, body, headers
+
+
+class JSONResponseCache:
+    """
+    A bounded, least-recently-used cache of CachedJSON bodies. Keys should include
+    the data version, so a reload of the data is never served a stale body.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, CachedJSON]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, build: Callable[[], Any]) -> CachedJSON:
+        """The cached body for `key`, serialising build()'s payload if there isn't one."""
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+        # build outside the lock; a concurrent build of the same key just does the work twice
+        cached = CachedJSON(build())
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = cached
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return cached
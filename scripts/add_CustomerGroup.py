@@ -1,55 +1,48 @@
 import os
 import pandas as pd
-from sqlalchemy import create_engine
+import yaml
 from dotenv import load_dotenv
+from db_connections import database_url, dispose_engines, get_engine, run_concurrently
+from queries import bind, customer_groups_from_mi_query, customer_groups_from_sf_query
 
 # Load credentials from .env file
 load_dotenv()
 
-# first take CustomerGroup from MI data, as this deals with name mismatches
-# note: this only brings in CustomerGroup for customers that a supplier has reported MI for
-conn_string = '{}://{}:{}@{}:{}/{}?driver={}'.format(
-    os.getenv("DB_TYPE"),
-    os.getenv("DB_USER"),
-    os.getenv("DB_PWD"),
-    os.getenv("DB_SERVER"),
-    os.getenv("DB_PORT"),
-    os.getenv("DB_NAME_MI"),
-    os.getenv("DB_DRIVER")
-)
-engine = create_engine(conn_string)
-conn = engine.connect()
-customer_name_group_from_mi = pd.DataFrame(columns = ['CustomerName', 'CustomerGroup'])
-for i in ['MI_RM155710', 'MI_RM155711', 'MI_RM155712', 'MI_RM155713', 'MI_RM155713L4', 'MI_RM155714', 'MI_RM155714L4']:
-    # find MI data for GCloud iteration
-    MI_query = f"""
-        SELECT CustomerName,CustomerGroup FROM mi.{i}
-    """
-    MI_entries = pd.read_sql(MI_query, conn)
-    # add it to the aggregated df
-    customer_name_group_from_mi = pd.concat([customer_name_group_from_mi, MI_entries], axis=0)
-print(f"{len(customer_name_group_from_mi)} entries from MI parsed")
-print(customer_name_group_from_mi.head())
+# MI tables for each GCloud iteration, configured alongside the contract framework filter
+with open("params.yaml") as f:
+    MI_TABLES = yaml.safe_load(f)["extract_filters"]["mi_tables"]
 
-# then take CustomerGroup from Salesforce data, as this will give matches even if no MI has been reported
-# note: this doesn't deal with name mismatches
-conn_string = '{}://{}:{}@{}:{}/{}?driver={}'.format(
-    os.getenv("DB_TYPE"),
-    os.getenv("DB_USER"),
-    os.getenv("DB_PWD"),
-    os.getenv("DB_SERVER"),
-    os.getenv("DB_PORT"),
-    os.getenv("DB_NAME_REG"),
-    os.getenv("DB_DRIVER")
-)
-engine = create_engine(conn_string)
-conn = engine.connect()
-customer_name_group_from_sf_query = "SELECT CustomerName,[Group] FROM sf.Attributes_sf_vw_Customers"
-customer_name_group_from_sf = pd.read_sql(customer_name_group_from_sf_query, conn)
-# change to match with MI headers
-customer_name_group_from_sf = customer_name_group_from_sf.rename(columns={'Group': 'CustomerGroup'})
-print(f"{len(customer_name_group_from_sf)} entries from Salesforce parsed")
-print(customer_name_group_from_sf.head())
+
+def get_customer_groups_from_mi():
+    # first take CustomerGroup from MI data, as this deals with name mismatches
+    # note: this only brings in CustomerGroup for customers that a supplier has reported MI for
+    # the MI tables for each GCloud iteration are combined and deduplicated in one query on the server
+    with get_engine(database_url(os.getenv("DB_NAME_MI"))).connect() as conn:
+        customer_name_group_from_mi = pd.read_sql(bind(*customer_groups_from_mi_query(MI_TABLES)), conn)
+    print(f"{len(customer_name_group_from_mi)} entries from MI parsed")
+    print(customer_name_group_from_mi.head())
+    return customer_name_group_from_mi
+
+
+def get_customer_groups_from_sf():
+    # then take CustomerGroup from Salesforce data, as this will give matches even if no MI has been reported
+    # note: this doesn't deal with name mismatches
+    with get_engine(database_url(os.getenv("DB_NAME_REG"))).connect() as conn:
+        customer_name_group_from_sf = pd.read_sql(bind(*customer_groups_from_sf_query()), conn)
+    print(f"{len(customer_name_group_from_sf)} entries from Salesforce parsed")
+    print(customer_name_group_from_sf.head())
+    return customer_name_group_from_sf
+
+
+# the MI and Salesforce databases are independent, so query them concurrently
+try:
+    customer_groups = run_concurrently(
+        {"mi": get_customer_groups_from_mi, "salesforce": get_customer_groups_from_sf}
+    )
+finally:
+    dispose_engines()
+customer_name_group_from_mi = customer_groups["mi"]
+customer_name_group_from_sf = customer_groups["salesforce"]
 
 # combine MI and Salesforce name groups together, find uniques, and convert to dict
 customer_name_group_df = pd.concat([customer_name_group_from_mi, customer_name_group_from_sf], axis=0)
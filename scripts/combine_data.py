@@ -1,33 +1,76 @@
 import pandas as pd
+import numpy as np
 import os
+import json
 import argparse
+import multiprocessing
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from dotenv import load_dotenv
-from utils import match_string_via_api
+from candidate_index import shortlist_candidates
+from data_io import (
+    FORMATS,
+    TableWriter,
+    iter_table,
+    read_table,
+    table_path,
+    write_table,
+)
+from match_cache import MatchCache, cached_match_strings_via_api
+from name_normalisation import TIERS, CanonicalNameIndex
+from pair_keys import PairKeyEncoder, pair_ids
+from utils import configure_http_session, request_stats
 
 
-def combine_data(contracts_data, mi_data, regno_key_pairs):
-    """Combines contracts data with MI data
+# MI columns describing a supplier-buyer pair, kept when MI is aggregated per pair
+MI_PAIR_COLUMNS = ["SupplierName", "SupplierKey", "CustomerName", "CustomerGroup"]
+
+
+def aggregate_mi(mi, monthly_spend=False, extra_keys=()):
+    """Reduces MI to one row per supplier-buyer pair before it is joined onto contracts
     Args:
-        contracts_data: path to the contracts data CSV file
-        mi_data: path to the MI data CSV file
-        regno_key_pairs: path to the registration number - supplier key CSV file
+        mi: MI entries, one row per pair and financial month
+        monthly_spend: also add MonthlySpend, the pair's spend per "YYYY-MM" financial month as a JSON object
+        extra_keys: further columns that are constant within a pair (e.g. AIMatchedName) to keep
+    Returns:
+        one row per pair (in order of first appearance), with EvidencedSpend summed over all
+        financial months and MIEntries the number of MI rows aggregated
     """
-    if os.path.exists(contracts_data):
-        contracts = pd.read_csv(
-            contracts_data, dtype={"SupplierCompanyRegistrationNumber": str}
+    keys = [c for c in mi.columns if c in MI_PAIR_COLUMNS] + list(extra_keys)
+    grouped = mi.groupby(keys, dropna=False, sort=False)
+    aggregated = grouped.agg(
+        EvidencedSpend=("EvidencedSpend", "sum"),
+        MIEntries=("EvidencedSpend", "size"),
+    ).reset_index()
+    if monthly_spend:
+        period = (
+            mi["FinancialYear"].astype("Int64").astype(str)
+            + "-"
+            + mi["FinancialMonth"].astype("Int64").astype(str).str.zfill(2)
         )
+        spend = mi["EvidencedSpend"].groupby([grouped.ngroup(), period]).sum()
+        aggregated["MonthlySpend"] = [
+            json.dumps(months.droplevel(0).to_dict())
+            for _, months in spend.groupby(level=0, sort=True)
+        ]
+    return aggregated
+
+
+def load_contracts(contracts_data, regno_key_pairs):
+    """Reads the contracts and adds each contract's SupplierKey and supplier-buyer pair
+    Args:
+        contracts_data: path to the contracts data CSV or Parquet file
+        regno_key_pairs: path to the registration number - supplier key CSV or Parquet file
+    Returns:
+        (contracts with SupplierKey, PairID and the integer _pair_key, the PairKeyEncoder used for _pair_key)
+    """
+    # column types (e.g. string registration numbers, Int64 SupplierKey) come from data_io.SCHEMAS
+    if os.path.exists(contracts_data):
+        contracts = read_table(contracts_data, "contracts")
     else:
         raise Exception(f"Contracts data file {contracts_data} does not exist")
-    if os.path.exists(mi_data):
-        mi = pd.read_csv(mi_data)
-        mi["SupplierKey"] = mi["SupplierKey"].astype("Int64")
-    else:
-        raise Exception(f"MI data file {mi_data} does not exist")
     if os.path.exists(regno_key_pairs):
-        regno_keys = pd.read_csv(
-            regno_key_pairs, dtype={"SupplierCompanyRegistrationNumber": str}
-        )
-        regno_keys["SupplierKey"] = regno_keys["SupplierKey"].astype("Int64")
+        regno_keys = read_table(regno_key_pairs, "reg_number_supplier_key")
     else:
         raise Exception(
             f"Registration number - supplier key data file {regno_key_pairs} does not exist"
@@ -39,60 +82,407 @@ def combine_data(contracts_data, mi_data, regno_key_pairs):
     )
     # add a unique reference value called "PairID" to each row of contracts and MI by concatenating the names of the buyer and supplier
     # lowercase the buyer names to avoid case differences throwing off the join
-    contracts["PairID"] = (
-        contracts["SupplierKey"].astype(str) + "+" + contracts["buyer"].str.lower()
+    # the join itself is on an equivalent int64 key per (SupplierKey, buyer name) pair, factorised once, which is
+    # much faster and smaller than joining on the PairID strings; the strings are only built for the output rows
+    pair_keys = PairKeyEncoder(contracts["SupplierKey"], contracts["buyer"])
+    contracts["PairID"] = pair_ids(contracts["SupplierKey"], contracts["buyer"])
+    contracts["_pair_key"] = pair_keys.encode(
+        contracts["SupplierKey"], contracts["buyer"]
     )
-    mi["PairID"] = mi["SupplierKey"].astype(str) + "+" + mi["CustomerName"].str.lower()
-    # join MI onto contracts
-    contracts_with_mi = contracts.merge(mi, on="PairID", how="left")
-    matched_pair_ids = mi["PairID"].isin(contracts_with_mi["PairID"])
+    return contracts, pair_keys
+
+
+def split_unmatched_mi(mi, mi_pair_keys, contract_pair_keys, buyer_names):
+    """Finds the MI that didn't join onto a contract
+    Args:
+        mi: MI entries
+        mi_pair_keys: the MI entries' pair keys, from PairKeyEncoder.encode
+        contract_pair_keys: pair keys of the contracts MI is joined onto
+        buyer_names: every buyer name in the contracts data
+    Returns:
+        (all unmatched MI with its PairID, the unmatched MI that needs name matching)
+    """
+    matched_pair_ids = pd.Series(mi_pair_keys, index=mi.index).isin(contract_pair_keys)
     # find the unmatched MI, which may be because
     # Situation 1. the buyer name in the MI matches to one in the contract data, and there is simply no contract with a supplier
     # Situation 2. the buyer name in the MI doesn't match to one in the contract data, and we need an LLM to find a match
     # we can safely ignore Situation 1: if the name matches, we would already have caught it in the initial join, and all the LLM will return is its input
     unmatched_mi_all = mi[~matched_pair_ids]
+    unmatched_mi_all = unmatched_mi_all.assign(
+        PairID=pair_ids(
+            unmatched_mi_all["SupplierKey"], unmatched_mi_all["CustomerName"]
+        )
+    )
     # ignore Situation 1
-    buyer_names_from_contracts = contracts["buyer"].unique().tolist()
     mi_buyer_names_to_ignore = unmatched_mi_all[
-        unmatched_mi_all["CustomerName"].isin(buyer_names_from_contracts)
+        unmatched_mi_all["CustomerName"].isin(buyer_names)
     ]["CustomerName"]
     # focus on Situation 2
     unmatched_mi = unmatched_mi_all[
         ~unmatched_mi_all["CustomerName"].isin(mi_buyer_names_to_ignore)
     ].copy()
+    return unmatched_mi_all, unmatched_mi
+
 
+def match_buyer_names(
+    customers, buyer_names, match_workers=8, match_cache=None, candidate_top_k=None
+):
+    """Matches MI customer names to contract buyer names, locally where possible and otherwise with the API
+    Args:
+        customers: unique MI customer names to match
+        buyer_names: every buyer name in the contracts data
+        match_workers, match_cache, candidate_top_k: see combine_data
+    Returns:
+        {customer name: matched buyer name, or "None"}
+    """
+    # resolve names differing only by case, punctuation, "&", "Ltd" or brackets locally
+    name_map, api_customers, per_tier = CanonicalNameIndex(buyer_names).resolve_many(
+        customers
+    )
+    # shortlist plausible buyers locally, so each API call only carries K candidates
+    candidate_lists = None
+    if candidate_top_k:
+        candidate_lists = shortlist_candidates(
+            api_customers, buyer_names, k=candidate_top_k
+        )
     # Matching is handled by the external API.
     # Set MATCH_STRING_API_URL to your external `GET /match` endpoint.
-    if not unmatched_mi.empty:
-        unique_unmatched_customers = unmatched_mi["CustomerName"].unique().tolist()
-        name_map = {}
-        count = 0
-        for i in unique_unmatched_customers:
-            name_match = match_string_via_api(
-                input_string=i,
-                list_of_strings=buyer_names_from_contracts,
-                prompt_path="./prompts/buyer_match_v2.txt",
-                api_url=os.getenv("NAME_MATCH_API_ENDPOINT"),
-            )
-            name_map[i] = name_match
-            count += 1
-            if count % 50 == 0:
-                print(f"Matched {count} / {len(unique_unmatched_customers)}")
+    name_matches = cached_match_strings_via_api(
+        inputs=api_customers,
+        list_of_strings=buyer_names,
+        candidate_lists=candidate_lists,
+        cache=match_cache,
+        prompt_path="./prompts/buyer_match_v2.txt",
+        api_url=os.getenv("NAME_MATCH_API_ENDPOINT"),
+        max_workers=match_workers,
+    )
+    name_map.update(zip(api_customers, name_matches))
+    if match_cache is not None:
+        print(
+            f"Match cache: {match_cache.hits} hits, {match_cache.misses} sent to the API"
+        )
+    api_matched = sum(m != "None" for m in name_matches)
+    print(
+        "Unique unmatched MI names resolved by tier: "
+        + ", ".join(f"{tier}: {per_tier[tier]}" for tier in TIERS)
+        + f", api: {api_matched}, unresolved: {len(api_customers) - api_matched}"
+    )
+    return name_map
+
+
+def join_mi(
+    contracts,
+    mi,
+    pair_keys,
+    buyer_names,
+    name_map=None,
+    pre_aggregate=False,
+    monthly_spend=False,
+):
+    """Joins MI onto contracts, first on the MI's own names and then on their matched names
+    Args:
+        contracts: contracts from load_contracts
+        mi: MI entries
+        pair_keys: the PairKeyEncoder from load_contracts
+        buyer_names: every buyer name in the contracts data
+        name_map: {MI customer name: matched buyer name} from match_buyer_names, or None if no
+            unmatched MI needed name matching, in which case there is no second join
+        pre_aggregate, monthly_spend: see combine_data
+    Returns:
+        (combined data, unmatched MI)
+    """
+    mi_pair_keys = pair_keys.encode(mi["SupplierKey"], mi["CustomerName"])
+    # join MI onto contracts
+    mi_to_join = mi.assign(_pair_key=mi_pair_keys)
+    if pre_aggregate:
+        mi_to_join = aggregate_mi(mi, monthly_spend)
+        mi_to_join["_pair_key"] = pair_keys.encode(
+            mi_to_join["SupplierKey"], mi_to_join["CustomerName"]
+        )
+    contracts_with_mi = contracts.merge(mi_to_join, on="_pair_key", how="left")
+    unmatched_mi_all, unmatched_mi = split_unmatched_mi(
+        mi, mi_pair_keys, contracts["_pair_key"], buyer_names
+    )
+
+    if name_map is not None:
         unmatched_mi["AIMatchedName"] = unmatched_mi["CustomerName"].map(name_map)
-        # Ensure SupplierKey is treated as an integer string, to avoid mismatches due to float representations (e.g. '123.0' vs '123')
-        unmatched_mi["PairID"] = (
-            unmatched_mi["SupplierKey"].astype("Int64").astype(str)
-            + "+"
-            + unmatched_mi["AIMatchedName"].str.lower()
+        # key on the matched name, with SupplierKey treated as an integer (the same pair for '123.0' and '123')
+        ai_pair_keys = pair_keys.encode(
+            unmatched_mi["SupplierKey"], unmatched_mi["AIMatchedName"]
         )
         # join unmatched MI onto contracts
-        contracts_with_mi_AI = contracts.merge(unmatched_mi, on="PairID", how="left")
+        ai_to_join = unmatched_mi.drop(columns="PairID").assign(_pair_key=ai_pair_keys)
+        if pre_aggregate:
+            ai_to_join = aggregate_mi(
+                ai_to_join, monthly_spend, extra_keys=["AIMatchedName", "_pair_key"]
+            )
+        contracts_with_mi_AI = contracts.merge(ai_to_join, on="_pair_key", how="left")
 
         contracts_with_mi = pd.concat([contracts_with_mi, contracts_with_mi_AI])
-        matched_pair_ids = mi["PairID"].isin(contracts_with_mi["PairID"])
-        unmatched_mi = mi[~matched_pair_ids]
+        # the combined rows carry the contracts' own pair keys, so the MI left unmatched is unchanged
+        unmatched_mi = unmatched_mi_all
 
-    return (contracts_with_mi, unmatched_mi)
+    return (contracts_with_mi.drop(columns="_pair_key"), unmatched_mi)
+
+
+def combine_data(
+    contracts_data,
+    mi_data,
+    regno_key_pairs,
+    match_workers=8,
+    match_cache=None,
+    candidate_top_k=None,
+    pre_aggregate=False,
+    monthly_spend=False,
+):
+    """Combines contracts data with MI data
+    Args:
+        contracts_data: path to the contracts data CSV or Parquet file
+        mi_data: path to the MI data CSV or Parquet file
+        regno_key_pairs: path to the registration number - supplier key CSV or Parquet file
+        match_workers: maximum number of concurrent requests to the matching API
+        match_cache: optional MatchCache, so only names not matched on a previous run are sent to the API
+        candidate_top_k: if set, only send the API the top K most similar contract buyer names per MI name, rather than all of them
+        pre_aggregate: join MI onto contracts already summed per supplier-buyer pair (see aggregate_mi), giving one
+            combined row per contract and pair rather than one per contract and financial month
+        monthly_spend: with pre_aggregate, keep each pair's spend per financial month in a MonthlySpend column
+    """
+    if not os.path.exists(mi_data):
+        raise Exception(f"MI data file {mi_data} does not exist")
+    contracts, pair_keys = load_contracts(contracts_data, regno_key_pairs)
+    mi = read_table(mi_data, "mi")
+
+    buyer_names_from_contracts = contracts["buyer"].unique().tolist()
+    _, unmatched_mi = split_unmatched_mi(
+        mi,
+        pair_keys.encode(mi["SupplierKey"], mi["CustomerName"]),
+        contracts["_pair_key"],
+        buyer_names_from_contracts,
+    )
+    name_map = None
+    if not unmatched_mi.empty:
+        name_map = match_buyer_names(
+            unmatched_mi["CustomerName"].unique().tolist(),
+            buyer_names_from_contracts,
+            match_workers=match_workers,
+            match_cache=match_cache,
+            candidate_top_k=candidate_top_k,
+        )
+    return join_mi(
+        contracts,
+        mi,
+        pair_keys,
+        buyer_names_from_contracts,
+        name_map,
+        pre_aggregate=pre_aggregate,
+        monthly_spend=monthly_spend,
+    )
+
+
+def partition_of(supplier_keys, names, partitions):
+    """Partition number of each row, from a hash of its SupplierKey
+    Rows with a missing name all go to partition 0: a missing MI customer name joins onto a contract
+    with a missing buyer name whatever their SupplierKeys, so those rows must meet in one partition.
+    """
+    hashes = pd.util.hash_pandas_object(
+        pd.Series(supplier_keys).astype("Int64"), index=False
+    ).to_numpy()
+    parts = (hashes % np.uint64(partitions)).astype(np.int64)
+    parts[pd.isna(pd.Series(names)).to_numpy()] = 0
+    return parts
+
+
+# what every partition is joined with, set once per worker process by _set_partition_context
+_partition_context = {}
+
+
+def _set_partition_context(
+    pair_keys, buyer_names, name_map, empty_mi, pre_aggregate, monthly_spend
+):
+    _partition_context.update(
+        pair_keys=pair_keys,
+        buyer_names=buyer_names,
+        name_map=name_map,
+        empty_mi=empty_mi,
+        pre_aggregate=pre_aggregate,
+        monthly_spend=monthly_spend,
+    )
+
+
+def _join_partition(mi_path, contracts_part):
+    """join_mi for one partition's MI file (None if the partition has no MI) and contracts"""
+    context = _partition_context
+    mi_part = read_table(mi_path, "mi") if mi_path else context["empty_mi"]
+    return join_mi(
+        contracts_part,
+        mi_part,
+        context["pair_keys"],
+        context["buyer_names"],
+        context["name_map"],
+        pre_aggregate=context["pre_aggregate"],
+        monthly_spend=context["monthly_spend"],
+    )
+
+
+def _join_partition_to_files(part, mi_path, contracts_part, directory):
+    """_join_partition in a worker process, returning the paths its results are written to"""
+    combined, unmatched = _join_partition(mi_path, contracts_part)
+    combined_file = os.path.join(directory, f"combined_{part}.parquet")
+    unmatched_file = os.path.join(directory, f"unmatched_{part}.parquet")
+    write_table(combined, combined_file)
+    write_table(unmatched, unmatched_file)
+    return combined_file, unmatched_file
+
+
+def combine_data_partitioned(
+    contracts_data,
+    mi_data,
+    regno_key_pairs,
+    combined_path,
+    unmatched_path,
+    partitions=16,
+    chunksize=500_000,
+    spill_dir=None,
+    match_workers=8,
+    match_cache=None,
+    candidate_top_k=None,
+    pre_aggregate=False,
+    monthly_spend=False,
+    workers=1,
+):
+    """Combines contracts data with MI data that may not fit in memory, writing the results to disk
+    MI is read in chunks and split by SupplierKey hash into `partitions` temporary Parquet files. Every
+    contract and MI entry of a supplier-buyer pair lands in the same partition, so each partition is
+    joined against its share of the (small) contracts data on its own and the results are appended to
+    the output files. Peak memory is that of one MI chunk or one partition, plus the contracts.
+    With workers > 1, partitions are joined in parallel in a pool of worker processes, each holding one
+    partition at a time.
+    The output has the same rows as combine_data, grouped by partition rather than in contract order,
+    and is the same whatever the number of workers.
+    Args:
+        combined_path: path of the combined data CSV or Parquet file to write
+        unmatched_path: path of the unmatched MI CSV or Parquet file to write
+        partitions: number of partitions MI is split into
+        chunksize: number of MI rows read at a time
+        spill_dir: directory for the partition files, by default the system temporary directory
+        workers: number of processes joining partitions
+        other arguments: see combine_data
+    Returns:
+        (number of combined rows, number of unmatched MI rows)
+    """
+    if partitions < 1:
+        raise ValueError("partitions must be at least 1")
+    if not os.path.exists(mi_data):
+        raise Exception(f"MI data file {mi_data} does not exist")
+    contracts, pair_keys = load_contracts(contracts_data, regno_key_pairs)
+    buyer_names_from_contracts = contracts["buyer"].unique().tolist()
+
+    with tempfile.TemporaryDirectory(dir=spill_dir) as spill:
+        # split MI into partitions, collecting the unmatched names to send for matching on the way
+        partition_writers = {}
+        customers_to_match = set()
+        for chunk in iter_table(mi_data, "mi", chunksize=chunksize):
+            empty_mi = chunk.iloc[:0]
+            _, unmatched_mi = split_unmatched_mi(
+                chunk,
+                pair_keys.encode(chunk["SupplierKey"], chunk["CustomerName"]),
+                contracts["_pair_key"],
+                buyer_names_from_contracts,
+            )
+            customers_to_match.update(unmatched_mi["CustomerName"].unique())
+            chunk_parts = partition_of(
+                chunk["SupplierKey"], chunk["CustomerName"], partitions
+            )
+            for part, rows in chunk.groupby(chunk_parts, sort=False):
+                if part not in partition_writers:
+                    partition_writers[part] = TableWriter(
+                        os.path.join(spill, f"mi_{part}.parquet"), "mi"
+                    )
+                partition_writers[part].write(rows)
+        for writer in partition_writers.values():
+            writer.close()
+        print(
+            f"Split MI into {len(partition_writers)} partitions: "
+            + ", ".join(
+                f"{part}: {writer.rows} rows"
+                for part, writer in sorted(partition_writers.items())
+            )
+        )
+
+        customers_to_match = list(customers_to_match)
+        name_map = None
+        if customers_to_match:
+            name_map = match_buyer_names(
+                customers_to_match,
+                buyer_names_from_contracts,
+                match_workers=match_workers,
+                match_cache=match_cache,
+                candidate_top_k=candidate_top_k,
+            )
+
+        contract_parts = partition_of(
+            contracts["SupplierKey"], contracts["buyer"], partitions
+        )
+        context = (
+            pair_keys,
+            buyer_names_from_contracts,
+            name_map,
+            empty_mi,
+            pre_aggregate,
+            monthly_spend,
+        )
+        tasks = [
+            (
+                part,
+                partition_writers[part].path if part in partition_writers else None,
+                contracts[contract_parts == part],
+            )
+            for part in range(partitions)
+        ]
+        combined_writer = TableWriter(combined_path, "combined")
+        unmatched_writer = TableWriter(unmatched_path, "unmatched")
+
+        def append(part, combined, unmatched):
+            # an empty first chunk would fix every text column's Parquet type, so only
+            # write empty results if nothing else is written
+            for writer, rows in (
+                (combined_writer, combined),
+                (unmatched_writer, unmatched),
+            ):
+                if len(rows) or (part == partitions - 1 and writer.rows == 0):
+                    writer.write(rows)
+
+        if workers > 1:
+            # each worker writes its partition's results to the spill directory; they are
+            # appended to the outputs in partition order, so the output doesn't depend on
+            # which worker finishes first
+            # spawn rather than fork, since the matching API's threads may have run in this process
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_set_partition_context,
+                initargs=context,
+            ) as executor:
+                futures = [
+                    executor.submit(_join_partition_to_files, *task, spill)
+                    for task in tasks
+                ]
+                for (part, _, _), future in zip(tasks, futures):
+                    combined_file, unmatched_file = future.result()
+                    append(
+                        part,
+                        read_table(combined_file, "combined"),
+                        read_table(unmatched_file, "unmatched"),
+                    )
+                    os.remove(combined_file)
+                    os.remove(unmatched_file)
+        else:
+            _set_partition_context(*context)
+            for part, mi_path, contracts_part in tasks:
+                append(part, *_join_partition(mi_path, contracts_part))
+        combined_writer.close()
+        unmatched_writer.close()
+    return combined_writer.rows, unmatched_writer.rows
 
 
 if __name__ == "__main__":
@@ -101,14 +491,75 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--indir", required=True)
     parser.add_argument("--outdir", required=True)
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--match-workers", type=int, default=8)
+    parser.add_argument("--match-top-k", type=int, default=0)
+    parser.add_argument("--match-cache", default=".match_cache/buyer_matches.sqlite")
+    parser.add_argument("--match-cache-max-entries", type=int, default=None)
+    parser.add_argument("--match-cache-max-age-days", type=float, default=None)
+    parser.add_argument(
+        "--mi-aggregate",
+        type=lambda s: s.lower() in ("1", "true", "yes"),
+        default=False,
+        help="join MI onto contracts summed per supplier-buyer pair, rather than per financial month",
+    )
+    parser.add_argument(
+        "--mi-monthly-spend",
+        type=lambda s: s.lower() in ("1", "true", "yes"),
+        default=False,
+        help="with --mi-aggregate, keep each pair's spend per financial month in a MonthlySpend column",
+    )
+    parser.add_argument(
+        "--partitions",
+        type=int,
+        default=0,
+        help="if set, combine MI too large for memory in this many SupplierKey partitions, streaming the results to disk",
+    )
+    parser.add_argument("--mi-chunksize", type=int, default=500_000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of processes joining MI partitions; more than 1 combines in partitions even if --partitions is not set",
+    )
     args = parser.parse_args()
 
     os.makedirs(args.outdir, exist_ok=True)
+    # keep one connection open per concurrent worker
+    configure_http_session(pool_size=args.match_workers)
 
-    combined, unmatched = combine_data(
-        contracts_data=os.path.join(args.indir, "contracts.csv"),
-        mi_data=os.path.join(args.indir, "mi.csv"),
-        regno_key_pairs=os.path.join(args.indir, "reg_number_supplier_key.csv"),
-    )
-    combined.to_csv(os.path.join(args.outdir, "combined.csv"), index=False)
-    unmatched.to_csv(os.path.join(args.outdir, "unmatched.csv"), index=False)
+    with MatchCache(
+        args.match_cache,
+        max_entries=args.match_cache_max_entries,
+        max_age_days=args.match_cache_max_age_days,
+    ) as cache:
+        inputs = dict(
+            contracts_data=table_path(args.indir, "contracts", args.format),
+            mi_data=table_path(args.indir, "mi", args.format),
+            regno_key_pairs=table_path(
+                args.indir, "reg_number_supplier_key", args.format
+            ),
+            match_workers=args.match_workers,
+            match_cache=cache,
+            candidate_top_k=args.match_top_k,
+            pre_aggregate=args.mi_aggregate,
+            monthly_spend=args.mi_monthly_spend,
+        )
+        if args.partitions or args.workers > 1:
+            combined_rows, unmatched_rows = combine_data_partitioned(
+                **inputs,
+                combined_path=table_path(args.outdir, "combined", args.format),
+                unmatched_path=table_path(args.outdir, "unmatched", args.format),
+                partitions=args.partitions or args.workers,
+                chunksize=args.mi_chunksize,
+                workers=args.workers,
+            )
+            print(
+                f"Wrote {combined_rows} combined rows and {unmatched_rows} unmatched MI rows"
+            )
+        else:
+            combined, unmatched = combine_data(**inputs)
+    print(f"Match API requests: {request_stats.summary()}")
+    if not (args.partitions or args.workers > 1):
+        write_table(combined, table_path(args.outdir, "combined", args.format))
+        write_table(unmatched, table_path(args.outdir, "unmatched", args.format))
@@ -1,127 +1,295 @@
 import os
+import json
+import time
 import argparse
 import pandas as pd
 import numpy as np
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from dotenv import load_dotenv
+from data_io import FORMATS, SCHEMAS, TableWriter, read_table, table_path, write_table
+from db_connections import database_url, dispose_engines, get_engine, run_concurrently
+from queries import (
+    bind,
+    contracts_query,
+    mi_query,
+    reg_number_supplier_key_query,
+)
+from synthetic_data import generate_synthetic_data
 
 # Load credentials from .env file
 load_dotenv()
 
+# G-Cloud 10-14
+DEFAULT_FRAMEWORKS = ["RM1557.10", "RM1557.11", "RM1557.12", "RM1557.13", "RM1557.14"]
 
-def get_live_data(outdir: str):
-    ## STEP 1: GET CONTRACT DETAILS FROM TUSSELL DATA
-    # connect to db using creds
-    conn_string = "{}://{}:{}@{}:{}/{}?driver={}".format(
-        os.getenv("DB_TYPE"),
-        os.getenv("DB_USER"),
-        os.getenv("DB_PWD"),
-        os.getenv("DB_SERVER"),
-        os.getenv("DB_PORT"),
-        os.getenv("DB_NAME_TUSSELL"),
-        os.getenv("DB_DRIVER"),
-    )
-    engine = create_engine(conn_string)
-    conn = engine.connect()
-    # find GCloud 10-14 contract details
-    # note that we join the Company Registration Number from a separate table, and only keep contract entries where a match is found
-    # (because these are the only ones that we can link into MI data)
-    contracts_query = """
-        SELECT
-            t1.awarded,
-            t1.buyer,
-            t1.suppliers,
-            t1.award_value,
-            t1.contract_start,
-            t1.contract_end,
-            t1.contract_months,
-            t1.contract_title,
-            t1.contract_description,
-            t1.framework_title,
-            t1.source,
-            t1.supplier_ids,
-            t2.id AS supplier_id,
-            t2.company_number,
-            t2.latest_employees
-        FROM dbo.Tussell_ContractAwards_API t1
-        CROSS APPLY OPENJSON(t1.supplier_ids) AS j
-        INNER JOIN dbo.Tussell_Suppliers_API t2 
-            ON CAST(j.value AS INT) = t2.id
-        WHERE (
-                t1.framework_title LIKE 'RM1557.10%'
-                OR t1.framework_title LIKE 'RM1557.11%'
-                OR t1.framework_title LIKE 'RM1557.12%'
-                OR t1.framework_title LIKE 'RM1557.13%'
-                OR t1.framework_title LIKE 'RM1557.14%'
-            )
+WATERMARKS_FILE = "watermarks.json"
+
+# columns whose (ordered) maximum marks how far each table has been extracted;
+# tables not listed here are small and always reloaded in full
+WATERMARK_COLUMNS = {
+    "contracts": ["awarded"],
+    "mi": ["FinancialYear", "FinancialMonth"],
+}
+
+
+def extract_table(conn, query, path, table=None, rename=None, chunksize=None):
     """
-    contracts = pd.read_sql(contracts_query, conn)
-    contracts = contracts.rename(
-        columns={"company_number": "SupplierCompanyRegistrationNumber"}
-    )
-    print("Contracts parsed")
+    Runs a query and writes the result to a CSV or Parquet file (from its extension)
+    Args:
+        conn: SQLAlchemy connection
+        query: SQL query string
+        path: path of the .csv or .parquet file to write
+        table: name of the data_io schema to apply to the columns, if any
+        rename: optional column renames to apply before writing
+        chunksize: if set, stream the result with a server-side cursor and write it
+            chunksize rows at a time, so memory use is bounded by the chunk size
+    Returns:
+        number of rows written
+    """
+    start = time.perf_counter()
+    if chunksize:
+        chunks = pd.read_sql(
+            query, conn.execution_options(stream_results=True), chunksize=chunksize
+        )
+    else:
+        chunks = [pd.read_sql(query, conn)]
 
-    # Save contracts DataFrame to CSV
-    contracts.to_csv(os.path.join(outdir, "contracts.csv"), index=False)
-    print(f"Saved contracts data to {os.path.join(outdir, 'contracts.csv')}")
+    # the writer only replaces `path` once every chunk is written, so a failed
+    # extract never leaves a truncated table
+    writer = TableWriter(path, table=table)
+    for chunk in chunks:
+        if rename:
+            chunk = chunk.rename(columns=rename)
+        writer.write(chunk)
+        if chunksize:
+            elapsed = time.perf_counter() - start
+            print(
+                f"  {writer.rows} rows extracted ({writer.rows / elapsed:,.0f} rows/sec)"
+            )
+    writer.close()
 
-    ## STEP 2: GET MI DATA
-    # connect to db using creds
-    conn_string = "{}://{}:{}@{}:{}/{}?driver={}".format(
-        os.getenv("DB_TYPE"),
-        os.getenv("DB_USER"),
-        os.getenv("DB_PWD"),
-        os.getenv("DB_SERVER"),
-        os.getenv("DB_PORT"),
-        os.getenv("DB_NAME_MI"),
-        os.getenv("DB_DRIVER"),
+    rows = writer.rows
+    elapsed = time.perf_counter() - start
+    print(
+        f"Saved {rows} rows to {path} in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:,.0f} rows/sec)"
     )
-    engine = create_engine(conn_string)
-    conn = engine.connect()
+    return rows
 
-    MI_query = """
-            SELECT SupplierName,SupplierKey,CustomerName,[Group],FinancialYear,FinancialMonth,EvidencedSpend FROM dbo.AggregatedSpendReporting
-            WHERE FrameworkName LIKE 'G-Cloud 1%'
-        """
-    GCloud_MI = pd.read_sql(MI_query, conn)
-    GCloud_MI = GCloud_MI.rename(columns={"Group": "CustomerGroup"})
-    print("MI parsed")
 
-    # Save MI entries to CSV
-    GCloud_MI.to_csv(os.path.join(outdir, "mi.csv"), index=False)
-    print(f"Saved MI data to {os.path.join(outdir, 'mi.csv')}")
+def compute_watermark(df, columns):
+    """
+    Largest value of `columns` in `df`, compared in column order
+    (e.g. latest FinancialYear, then latest FinancialMonth within it).
+    Returns a JSON-serialisable {column: value} dict, or None if there are no rows.
+    """
+    df = df.dropna(subset=columns)
+    if df.empty:
+        return None
+    top = df.sort_values(columns).iloc[-1]
+    watermark = {}
+    for col in columns:
+        value = top[col]
+        if isinstance(value, pd.Timestamp):
+            watermark[col] = value.isoformat()
+        else:
+            watermark[col] = value.item() if hasattr(value, "item") else value
+    return watermark
 
-    ## STEP 3: GET COMPANY REGISTRATION NUMBER - SUPPLIER KEY PAIRS
-    # connect to db using creds
-    conn_string = "{}://{}:{}@{}:{}/{}?driver={}".format(
-        os.getenv("DB_TYPE"),
-        os.getenv("DB_USER"),
-        os.getenv("DB_PWD"),
-        os.getenv("DB_SERVER"),
-        os.getenv("DB_PORT"),
-        os.getenv("DB_NAME_REG"),
-        os.getenv("DB_DRIVER"),
-    )
-    engine = create_engine(conn_string)
-    conn = engine.connect()
-    # find supplier Company Registration Number and CCS SupplierKey, to join Tussell to MI data
-    # also take supplier status
-    reg_number_supplier_key_query = """
-        SELECT SupplierKey,CompanyRegistrationNumber FROM sf.Attributes_sf_vw_Suppliers
+
+def load_watermarks(outdir):
+    path = os.path.join(outdir, WATERMARKS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_watermarks(outdir, watermarks):
+    with open(os.path.join(outdir, WATERMARKS_FILE), "w") as f:
+        json.dump(watermarks, f, indent=2, sort_keys=True)
+
+
+def _watermark_value(table, col, value):
+    if SCHEMAS.get(table, {}).get(col) == "datetime":
+        return pd.Timestamp(value)
+    return value
+
+
+def _at_or_after(df, columns, watermark):
+    """Mask of rows whose `columns` are at or after `watermark`, compared in order."""
+    col, rest = columns[0], columns[1:]
+    value = watermark[col]
+    if not rest:
+        mask = df[col] >= value
+    else:
+        mask = (df[col] > value) | (
+            (df[col] == value) & _at_or_after(df, rest, watermark)
+        )
+    return mask.fillna(False).astype(bool)
+
+
+def _at_or_after_sql(columns):
+    col, rest = columns[0], columns[1:]
+    if not rest:
+        return f"{col} >= :wm_{col}"
+    return f"({col} > :wm_{col} OR ({col} = :wm_{col} AND {_at_or_after_sql(rest)}))"
+
+
+def extract_table_incremental(
+    conn, query, path, table, params=None, watermark=None, rename=None, chunksize=None
+):
     """
-    reg_number_supplier_key = pd.read_sql(reg_number_supplier_key_query, conn)
-    reg_number_supplier_key = reg_number_supplier_key.rename(
-        columns={"CompanyRegistrationNumber": "SupplierCompanyRegistrationNumber"}
-    )
-    print("Company Registration Numbers parsed")
+    Incremental version of extract_table(). Only rows at or after `watermark`
+    are fetched; the rows in that window are then replaced in the existing table
+    at `path`, so re-fetched rows are never duplicated and late revisions to the
+    latest period are picked up. Without a watermark or an existing table, the
+    whole query is extracted.
+    Args:
+        conn: SQLAlchemy connection
+        query: SQL query string, whose output includes the WATERMARK_COLUMNS of `table`
+        params: values for the query's bound parameters, if any
+        path: path of the .csv or .parquet table to update
+        table: name of the table in WATERMARK_COLUMNS and data_io.SCHEMAS
+        watermark: {column: value} from a previous compute_watermark(), or None
+        rename, chunksize: as for extract_table()
+    Returns:
+        (number of rows fetched, new watermark)
+    """
+    columns = WATERMARK_COLUMNS[table]
+    if watermark is None or not os.path.exists(path):
+        rows = extract_table(
+            conn,
+            bind(query, params),
+            path,
+            table=table,
+            rename=rename,
+            chunksize=chunksize,
+        )
+        return rows, compute_watermark(
+            read_table(path, table, columns=columns), columns
+        )
 
-    # Save reg numbers DataFrame to CSV
-    reg_number_supplier_key.to_csv(
-        os.path.join(outdir, "reg_number_supplier_key.csv"), index=False
+    values = {col: _watermark_value(table, col, watermark[col]) for col in columns}
+    incremental_query = bind(
+        f"SELECT * FROM ({query}) AS q WHERE {_at_or_after_sql(columns)}",
+        {**(params or {}), **{f"wm_{col}": value for col, value in values.items()}},
+    )
+    root, ext = os.path.splitext(path)
+    increment_path = f"{root}.increment{ext}"
+    rows = extract_table(
+        conn,
+        incremental_query,
+        increment_path,
+        table=table,
+        rename=rename,
+        chunksize=chunksize,
     )
+
+    existing = read_table(path, table)
+    increment = read_table(increment_path, table)
+    kept = existing[~_at_or_after(existing, columns, values)]
+    merged = pd.concat([kept, increment], ignore_index=True)
+    write_table(merged, path)
+    os.remove(increment_path)
     print(
-        f"Saved reg number data to {os.path.join(outdir, 'reg_number_supplier_key.csv')}"
+        f"Merged {rows} rows at or after {watermark} into {path} "
+        f"({len(existing) - len(kept)} replaced, {len(merged)} rows in total)"
     )
+    return rows, compute_watermark(merged, columns) or watermark
+
+
+def get_live_data(
+    outdir: str,
+    chunksize=None,
+    data_format="csv",
+    incremental=False,
+    frameworks=None,
+    engine=None,
+):
+    """
+    Extracts contracts, MI and registration number - supplier key pairs from the live databases
+    Args:
+        outdir: directory to write the tables to
+        chunksize: stream each extract to disk this many rows at a time
+        data_format: "csv" or "parquet"
+        incremental: only fetch contracts and MI at or after the watermarks recorded by the previous run
+        frameworks: framework_title prefixes of the contracts to extract, e.g. ["RM1557.13", "RM1557.14"]
+        engine: optional engine to run every query against (e.g. build_sqlite_standin()),
+            instead of the databases configured by the DB_* environment variables
+    """
+    frameworks = frameworks or DEFAULT_FRAMEWORKS
+    watermarks = load_watermarks(outdir)
+
+    def connect(database_env):
+        if engine is not None:
+            return engine.connect()
+        return get_engine(database_url(os.getenv(database_env))).connect()
+
+    ## STEP 1: GET CONTRACT DETAILS FROM TUSSELL DATA
+    def extract_contracts():
+        with connect("DB_NAME_TUSSELL") as conn:
+            query, params = contracts_query(frameworks, dialect=conn.dialect.name)
+            _, watermark = extract_table_incremental(
+                conn,
+                query,
+                table_path(outdir, "contracts", data_format),
+                table="contracts",
+                params=params,
+                watermark=watermarks.get("contracts") if incremental else None,
+                rename={"company_number": "SupplierCompanyRegistrationNumber"},
+                chunksize=chunksize,
+            )
+        print("Contracts parsed")
+        return watermark
+
+    ## STEP 2: GET MI DATA
+    def extract_mi():
+        with connect("DB_NAME_MI") as conn:
+            query, params = mi_query()
+            _, watermark = extract_table_incremental(
+                conn,
+                query,
+                table_path(outdir, "mi", data_format),
+                table="mi",
+                params=params,
+                watermark=watermarks.get("mi") if incremental else None,
+                rename={"Group": "CustomerGroup"},
+                chunksize=chunksize,
+            )
+        print("MI parsed")
+        return watermark
+
+    ## STEP 3: GET COMPANY REGISTRATION NUMBER - SUPPLIER KEY PAIRS
+    def extract_reg_numbers():
+        with connect("DB_NAME_REG") as conn:
+            extract_table(
+                conn,
+                bind(*reg_number_supplier_key_query()),
+                table_path(outdir, "reg_number_supplier_key", data_format),
+                table="reg_number_supplier_key",
+                rename={
+                    "CompanyRegistrationNumber": "SupplierCompanyRegistrationNumber"
+                },
+                chunksize=chunksize,
+            )
+        print("Company Registration Numbers parsed")
+
+    # the three extracts are independent, so run them concurrently: the stage then
+    # takes as long as the slowest query rather than the sum of all three
+    try:
+        results = run_concurrently(
+            {
+                "contracts": extract_contracts,
+                "mi": extract_mi,
+                "reg_number_supplier_key": extract_reg_numbers,
+            }
+        )
+    finally:
+        if engine is None:
+            dispose_engines()
+    watermarks["contracts"] = results["contracts"]
+    watermarks["mi"] = results["mi"]
+    save_watermarks(outdir, watermarks)
 
 
 def generate_dummy_contracts_data():
@@ -278,29 +446,187 @@ def generate_dummy_reg_key_pairs():
     return df
 
 
-def get_dummy_data(outdir: str):
+def build_sqlite_standin(directory: str, frameworks=None, mi_tables=None):
+    """
+    Builds a local SQLite stand-in for the live databases, populated from the dummy
+    data generators, so the live queries can be run without database access.
+    Each schema (dbo, mi, sf) is a database file in `directory`, attached under its
+    schema name to every connection of the returned engine.
+    Contracts are spread across `frameworks`, and one extra contract (and MI entry)
+    is on another framework, so the framework filters have something to exclude.
+    """
+    frameworks = frameworks or DEFAULT_FRAMEWORKS
+    mi_tables = mi_tables or ["MI_RM155713", "MI_RM155714"]
+    os.makedirs(directory, exist_ok=True)
+    schemas = {
+        name: os.path.join(directory, f"{name}.db") for name in ("dbo", "mi", "sf")
+    }
+    for path in [os.path.join(directory, "main.db"), *schemas.values()]:
+        if os.path.exists(path):
+            os.remove(path)
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'main.db')}")
+
+    @event.listens_for(engine, "connect")
+    def attach_schemas(dbapi_conn, _):
+        for name, path in schemas.items():
+            dbapi_conn.execute(f"ATTACH DATABASE '{path}' AS {name}")
+
+    # Tussell contracts, with suppliers referenced by a JSON array of supplier ids
+    contracts = generate_dummy_contracts_data()
+    contracts["framework_title"] = [
+        f"{frameworks[i % len(frameworks)]} G-Cloud" for i in range(len(contracts))
+    ]
+    other_framework = contracts.iloc[[0]].assign(
+        framework_title="RM6116 Network Services",
+        contract_title="Contract on another framework",
+    )
+    contracts = pd.concat([contracts, other_framework], ignore_index=True)
+    suppliers = contracts[
+        ["SupplierCompanyRegistrationNumber", "latest_employees"]
+    ].drop_duplicates("SupplierCompanyRegistrationNumber")
+    suppliers = suppliers.reset_index(drop=True)
+    suppliers["id"] = suppliers.index + 1
+    supplier_ids = dict(
+        zip(suppliers["SupplierCompanyRegistrationNumber"], suppliers["id"])
+    )
+    contracts["supplier_ids"] = [
+        # id 999 isn't in the supplier table, so it is dropped by the join
+        json.dumps([int(supplier_ids[n])] + ([999] if i == 4 else []))
+        for i, n in enumerate(contracts["SupplierCompanyRegistrationNumber"])
+    ]
+    suppliers = suppliers.rename(
+        columns={"SupplierCompanyRegistrationNumber": "company_number"}
+    ).astype({"company_number": str})
+
+    # MI, with one entry on another framework
+    mi = generate_dummy_mi_data().rename(columns={"CustomerGroup": "Group"})
+    mi["FrameworkName"] = "G-Cloud 13"
+    other_mi = mi.iloc[[0]].assign(FrameworkName="Network Services 3")
+    mi = pd.concat([mi, other_mi], ignore_index=True)
+
+    reg = generate_dummy_reg_key_pairs().rename(
+        columns={"SupplierCompanyRegistrationNumber": "CompanyRegistrationNumber"}
+    )
+    customer_groups = mi[["CustomerName", "Group"]].rename(
+        columns={"Group": "CustomerGroup"}
+    )
+
+    with engine.begin() as conn:
+        contracts.drop(
+            columns=["SupplierCompanyRegistrationNumber", "latest_employees"]
+        ).to_sql("Tussell_ContractAwards_API", conn, schema="dbo", index=False)
+        suppliers.to_sql("Tussell_Suppliers_API", conn, schema="dbo", index=False)
+        mi.to_sql("AggregatedSpendReporting", conn, schema="dbo", index=False)
+        reg.to_sql("Attributes_sf_vw_Suppliers", conn, schema="sf", index=False)
+        customer_groups.rename(columns={"CustomerGroup": "Group"}).to_sql(
+            "Attributes_sf_vw_Customers", conn, schema="sf", index=False
+        )
+        # every MI table repeats the same customers, as the live tables overlap
+        for table in mi_tables:
+            customer_groups.to_sql(table, conn, schema="mi", index=False)
+    return engine
+
+
+def get_dummy_data(outdir: str, data_format="csv"):
     contracts = generate_dummy_contracts_data()
     mi = generate_dummy_mi_data()
     reg = generate_dummy_reg_key_pairs()
+    write_generated_data(outdir, contracts, mi, reg, data_format)
+
+
+def get_synthetic_data(outdir: str, rows: int, data_format="csv", seed=0):
+    """Generates a synthetic dataset with `rows` MI rows (see synthetic_data.py)"""
+    start = time.perf_counter()
+    contracts, mi, reg = generate_synthetic_data(rows, seed=seed)
+    print(
+        f"Generated {len(contracts)} contracts and {len(mi)} MI rows "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+    write_generated_data(outdir, contracts, mi, reg, data_format)
 
-    contracts.to_csv(os.path.join(outdir, "contracts.csv"), index=False)
-    mi.to_csv(os.path.join(outdir, "mi.csv"), index=False)
-    reg.to_csv(os.path.join(outdir, "reg_number_supplier_key.csv"), index=False)
+
+def write_generated_data(outdir: str, contracts, mi, reg, data_format="csv"):
+    """Writes generated tables and their watermarks, as the extracts would"""
+    write_table(contracts, table_path(outdir, "contracts", data_format))
+    write_table(mi, table_path(outdir, "mi", data_format))
+    write_table(reg, table_path(outdir, "reg_number_supplier_key", data_format))
+    save_watermarks(
+        outdir,
+        {
+            "contracts": compute_watermark(contracts, WATERMARK_COLUMNS["contracts"]),
+            "mi": compute_watermark(mi, WATERMARK_COLUMNS["mi"]),
+        },
+    )
 
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--mode", choices=["dummy", "live"], required=True)
+    parser.add_argument(
+        "--mode", choices=["dummy", "live", "standin", "synthetic"], required=True
+    )
     parser.add_argument("--outdir", required=True)
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=0,
+        help="stream live extracts to disk this many rows at a time (0 reads each table in one go)",
+    )
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument(
+        "--incremental",
+        type=lambda s: s.lower() in ("1", "true", "yes"),
+        default=False,
+        help="live mode only: fetch contracts and MI newer than the recorded watermarks and merge them into the existing tables",
+    )
+    parser.add_argument(
+        "--frameworks",
+        nargs="+",
+        default=DEFAULT_FRAMEWORKS,
+        help="framework_title prefixes of the contracts to extract in live mode",
+    )
+    parser.add_argument(
+        # DVC passes extract_filters.mi_tables as --mi_tables
+        "--mi-tables",
+        "--mi_tables",
+        nargs="+",
+        default=None,
+        help="standin mode only: per-framework MI tables to create in the SQLite copy",
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=1_000_000,
+        help="synthetic mode only: number of MI rows to generate",
+    )
+    parser.add_argument("--seed", type=int, default=0)
     args = parser.parse_args()
 
     if not os.path.exists(args.outdir):
         os.makedirs(args.outdir)
 
-    if args.mode == "live":
-        get_live_data(args.outdir)
+    if args.mode in ("live", "standin"):
+        # standin runs the live queries against a local SQLite copy of the dummy data
+        engine = None
+        if args.mode == "standin":
+            engine = build_sqlite_standin(
+                os.path.join(args.outdir, "standin_db"),
+                frameworks=args.frameworks,
+                mi_tables=args.mi_tables,
+            )
+        get_live_data(
+            args.outdir,
+            chunksize=args.chunksize or None,
+            data_format=args.format,
+            incremental=args.incremental,
+            frameworks=args.frameworks,
+            engine=engine,
+        )
+    elif args.mode == "synthetic":
+        get_synthetic_data(
+            args.outdir, args.rows, data_format=args.format, seed=args.seed
+        )
     else:
-        get_dummy_data(args.outdir)
+        get_dummy_data(args.outdir, data_format=args.format)
 
 
 if __name__ == "__main__":
@@ -1,111 +1,198 @@
+import numpy as np
 import pandas as pd
 import argparse
 import os
+from data_io import FORMATS, read_table, table_path
 
-parser = argparse.ArgumentParser()
-parser.add_argument("--indir", required=True)
-parser.add_argument("--outdir", required=True)
-args = parser.parse_args()
+# combined data columns used in the summary, and their names in the line-level output
+COMBINED_COLUMNS = {
+    "buyer": "Contracting Authority",
+    "suppliers": "Supplier",
+    "award_value": "Award Value",
+    "contract_start": "Contract Start Date",
+    "contract_end": "Contract End Date",
+    "contract_months": "Contract Duration (Months)",
+    "CustomerGroup": "Customer Group",
+    "awarded": "awarded",
+    "EvidencedSpend": "EvidencedSpend",
+    "contract_title": "contract_title",
+    "contract_description": "contract_description",
+    "framework_title": "framework_title",
+    "source": "source",
+    "latest_employees": "latest_employees",
+}
+PAIR_KEYS = ["Contracting Authority", "Supplier"]
+# line-level columns: spend is summed over each pair's most recent contract rows, and every
+# other column is taken from the first of those rows that has a value
+LINE_LEVEL_COLUMNS = PAIR_KEYS + [
+    "awarded",
+    "Award Value",
+    "EvidencedSpend",
+    "Contract Start Date",
+    "Contract End Date",
+    "Contract Duration (Months)",
+    "contract_title",
+    "contract_description",
+    "framework_title",
+    "source",
+    "latest_employees",
+    "Customer Group",
+]
 
-os.makedirs(args.outdir, exist_ok=True)
 
-# read in data and make sure that column types are correct
-contracts = pd.read_csv(os.path.join(args.indir, "contracts.csv"), low_memory=False)
-matched = pd.read_csv(os.path.join(args.indir, "combined.csv"), low_memory=False)
-matched["contract_start"] = pd.to_datetime(matched["contract_start"])
-matched["contract_end"] = pd.to_datetime(matched["contract_end"])
-matched = matched.rename(
-    columns={
-        "buyer": "Contracting Authority",
-        "suppliers": "Supplier",
-        "award_value": "Award Value",
-        "contract_start": "Contract Start Date",
-        "contract_end": "Contract End Date",
-        "contract_months": "Contract Duration (Months)",
-        "CustomerGroup": "Customer Group",
-    }
-)
-unmatched = pd.read_csv(os.path.join(args.indir, "unmatched.csv"), low_memory=False)
-# For each buyer-supplier pair, find the most recent contract (or contracts, if they share the same start date)
-matched["MostRecentStartDate"] = matched.groupby(["Contracting Authority", "Supplier"])[
-    "Contract Start Date"
-].transform("max")
-recent_contracts_only = matched[
-    matched["Contract Start Date"] == matched["MostRecentStartDate"]
-]
+def read_summary_inputs(indir, data_format="csv"):
+    """Reads the contracts, combined and unmatched tables, loading only the columns summarise uses
+    Args:
+        indir: directory of the pipeline tables
+        data_format: csv or parquet
+    Returns:
+        (contracts, combined, unmatched)
+    """
+    # column types come from data_io.SCHEMAS
+    contracts = read_table(
+        table_path(indir, "contracts", data_format), "contracts", columns=["buyer"]
+    )
+    combined = read_table(
+        table_path(indir, "combined", data_format),
+        "combined",
+        columns=list(COMBINED_COLUMNS),
+    )
+    unmatched = read_table(
+        table_path(indir, "unmatched", data_format),
+        "unmatched",
+        columns=["SupplierName", "CustomerName"],
+    )
+    return contracts, combined, unmatched
+
+
+def _first_valid(column, rows, groups, first_rows):
+    """
+    The value of `column` on the first of each group's rows that has one, like GroupBy.first:
+    the group's first row, unless its value is missing
+    Args:
+        column: column values
+        rows: positions of the rows being grouped
+        groups: group number (0 to n - 1) of each of `rows`
+        first_rows: position of each group's first row
+    """
+    values = column.take(first_rows).reset_index(drop=True)
+    missing = np.flatnonzero(values.isna().to_numpy())
+    if len(missing):
+        candidates = column.notna().to_numpy()[rows] & np.isin(groups, missing)
+        found, first_found = np.unique(groups[candidates], return_index=True)
+        values.iloc[found] = column.take(rows[candidates][first_found]).to_numpy()
+    return values
+
+
+def summarise(contracts, combined, unmatched, now=None):
+    """Summarises spend against each buyer-supplier pair's most recent contract(s)
+    Args:
+        contracts: contracts data
+        combined: combined contracts and MI data, from combine_data
+        unmatched: unmatched MI, from combine_data
+        now: date that contract durations and expiry are measured to, by default today
+    Returns:
+        (summary statistics, line-level data with one row per buyer-supplier pair)
+    """
+    if now is None:
+        now = pd.Timestamp.now().normalize()
+    combined = combined.reset_index(drop=True)
+
+    # number the buyer-supplier pairs in sorted order, hashing each name column once;
+    # rows with a missing buyer or supplier belong to no pair
+    buyer_codes, _ = pd.factorize(combined["buyer"], sort=True)
+    supplier_codes, suppliers = pd.factorize(combined["suppliers"], sort=True)
+    pair_codes = np.where(
+        (buyer_codes >= 0) & (supplier_codes >= 0),
+        buyer_codes.astype(np.int64) * len(suppliers) + supplier_codes,
+        -1,
+    )
+    # For each buyer-supplier pair, find the most recent contract (or contracts, if they share the same start date)
+    start_dates = combined["contract_start"]
+    most_recent_start_date = start_dates.groupby(pair_codes).transform("max")
+    recent = (pair_codes >= 0) & (start_dates == most_recent_start_date).to_numpy()
+    rows = np.flatnonzero(recent)
 
-# For each buyer-supplier pair, aggregate the spend from their most recent contract(s)
-reported_spend_per_pair = (
-    recent_contracts_only.groupby(["Contracting Authority", "Supplier"])
-    .agg(
+    # For each buyer-supplier pair, aggregate the spend from their most recent contract(s),
+    # taking the other columns from the pair's first recent row
+    groups, _ = pd.factorize(pair_codes[rows], sort=True)
+    first_seen = pd.Series(groups).drop_duplicates()
+    first_rows = np.empty(len(first_seen), dtype=np.int64)
+    first_rows[first_seen.to_numpy()] = rows[first_seen.index]
+    reported_spend_per_pair = pd.DataFrame(
         {
-            "awarded": "first",
-            "Award Value": "first",
-            "EvidencedSpend": "sum",
-            "Contract Start Date": "first",
-            "Contract End Date": "first",
-            "Contract Duration (Months)": "first",
-            "contract_title": "first",
-            "contract_description": "first",
-            "framework_title": "first",
-            "source": "first",
-            "latest_employees": "first",
-            "Customer Group": "first",
+            column: _first_valid(combined[column], rows, groups, first_rows)
+            for column in COMBINED_COLUMNS
+            if column != "EvidencedSpend"
         }
     )
-    .reset_index()
-)
-# add a column of the number of months between each start date and the present day
-now = pd.Timestamp.now().normalize()
-reported_spend_per_pair["Total Months Run So Far"] = (
-    now.year - reported_spend_per_pair["Contract Start Date"].dt.year
-) * 12 + (now.month - reported_spend_per_pair["Contract Start Date"].dt.month)
-# find expired contracts
-reported_spend_per_pair["Expired"] = reported_spend_per_pair["Contract End Date"] < now
-expired_contracts = reported_spend_per_pair[reported_spend_per_pair["Expired"]].copy()
+    reported_spend_per_pair["EvidencedSpend"] = (
+        combined["EvidencedSpend"].take(rows).groupby(groups).sum().to_numpy()
+    )
+    reported_spend_per_pair = reported_spend_per_pair.rename(columns=COMBINED_COLUMNS)[
+        LINE_LEVEL_COLUMNS
+    ]
+    # add a column of the number of months between each start date and the present day
+    contract_start = reported_spend_per_pair["Contract Start Date"]
+    reported_spend_per_pair["Total Months Run So Far"] = (
+        now.year - contract_start.dt.year
+    ) * 12 + (now.month - contract_start.dt.month)
+    # find expired contracts
+    reported_spend_per_pair["Expired"] = (
+        reported_spend_per_pair["Contract End Date"] < now
+    )
 
-# summary stats
-total_contracts = len(contracts)
-total_contracts_with_key = len(reported_spend_per_pair)
-unmatched_mi_entries = len(unmatched)
-unique_unmatched_suppliers = len(unmatched["SupplierName"].unique())
-unique_unmatched_buyers = len(unmatched["CustomerName"].unique())
-total_contracts_with_spend = len(
-    reported_spend_per_pair[reported_spend_per_pair["EvidencedSpend"] > 0.0]
-)
-red_filter = expired_contracts["EvidencedSpend"] == 0.0
-no_spend_expired = len(expired_contracts[red_filter])
-amber_filter = (
-    (~reported_spend_per_pair["Expired"])
-    & (reported_spend_per_pair["Total Months Run So Far"] > 3)
-    & (reported_spend_per_pair["EvidencedSpend"] == 0.0)
-)
-no_spend_3month_run = len(reported_spend_per_pair[amber_filter])
-summary_stats = {
-    "Summary Statistic": [
-        "Total Contracts",
-        "Total Contracts with Supplier Key",
-        "Unmatched MI Entries",
-        "Unique Unmatched Suppliers",
-        "Unique Unmatched Buyers",
-        "Total Contracts with Spend",
-        "Total Contracts No Spend and Expired",
-        "Total Contracts No Spend and Running >3 Months",
-    ],
-    "Value": [
-        total_contracts,
-        total_contracts_with_key,
-        unmatched_mi_entries,
-        unique_unmatched_suppliers,
-        unique_unmatched_buyers,
-        total_contracts_with_spend,
-        no_spend_expired,
-        no_spend_3month_run,
-    ],
-}
-summary_stats_df = pd.DataFrame(summary_stats)
-print(summary_stats_df)
-summary_stats_df.to_csv(os.path.join(args.outdir, "summary_stats.csv"), index=False)
+    # summary stats, from one set of masks over the line-level data
+    expired = reported_spend_per_pair["Expired"].to_numpy()
+    spend = reported_spend_per_pair["EvidencedSpend"].to_numpy()
+    no_spend = spend == 0.0
+    red_filter = expired & no_spend
+    amber_filter = (
+        ~expired
+        & (reported_spend_per_pair["Total Months Run So Far"] > 3).to_numpy()
+        & no_spend
+    )
+    summary_stats = {
+        "Summary Statistic": [
+            "Total Contracts",
+            "Total Contracts with Supplier Key",
+            "Unmatched MI Entries",
+            "Unique Unmatched Suppliers",
+            "Unique Unmatched Buyers",
+            "Total Contracts with Spend",
+            "Total Contracts No Spend and Expired",
+            "Total Contracts No Spend and Running >3 Months",
+        ],
+        "Value": [
+            len(contracts),
+            len(reported_spend_per_pair),
+            len(unmatched),
+            len(unmatched["SupplierName"].unique()),
+            len(unmatched["CustomerName"].unique()),
+            int((spend > 0.0).sum()),
+            int(red_filter.sum()),
+            int(amber_filter.sum()),
+        ],
+    }
+    return pd.DataFrame(summary_stats), reported_spend_per_pair
 
-# line-level data output
-reported_spend_per_pair.to_csv(os.path.join(args.outdir, "line_level.csv"), index=False)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--indir", required=True)
+    parser.add_argument("--outdir", required=True)
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    args = parser.parse_args()
+
+    os.makedirs(args.outdir, exist_ok=True)
+
+    summary_stats_df, reported_spend_per_pair = summarise(
+        *read_summary_inputs(args.indir, args.format)
+    )
+    print(summary_stats_df)
+    summary_stats_df.to_csv(os.path.join(args.outdir, "summary_stats.csv"), index=False)
+
+    # line-level data output
+    reported_spend_per_pair.to_csv(
+        os.path.join(args.outdir, "line_level.csv"), index=False
+    )
@@ -4,87 +4,134 @@ document.addEventListener('DOMContentLoaded', () => {
     const detailsBox = document.getElementById('supplier-details');
     const thresholdSlider = document.getElementById('threshold');
     const thresholdValue = document.getElementById('threshold-value');
+    const statusSelect = document.getElementById('status');
+    const buyerInput = document.getElementById('buyer');
+    const customerGroupSelect = document.getElementById('customer-group');
+    const statusCounts = document.getElementById('status-counts');
+    const previousButton = document.getElementById('previous-page');
+    const nextButton = document.getElementById('next-page');
+    const pageInfo = document.getElementById('page-info');
+
+    // the page of suppliers on screen, as returned by /suppliers/<framework>
+    let currentPage = JSON.parse(document.getElementById('initial-page').textContent);
+    let pageNumber = 1;
+    let latestRequest = 0;
 
     function formatCurrency(value) {
         return new Intl.NumberFormat('en-GB', { style: 'currency', currency: 'GBP' }).format(value);
     }
 
-    function updateSupplierColors() {
-        const threshold = parseInt(thresholdSlider.value, 10);
-        thresholdValue.textContent = threshold;
-        const supplierBoxes = document.querySelectorAll('.supplier-box');
-        supplierBoxes.forEach(box => {
-            const details = JSON.parse(box.dataset.details);
-            const reportedSpend = details['Reported spend'];
-            const contractEnd = new Date(details['Contract end']);
-            const monthsRun = details['Months Run So Far'];
-            const today = new Date();
-
-            box.classList.remove('red', 'yellow', 'green');
+    function showDetails(supplier) {
+        const details = supplier.details;
+        const name = supplier.name;
+        let detailsHtml = `<h2>${name}</h2>`;
+        const detailOrder = ['Buyer name', 'Contract value', 'Contract start', 'Contract end', 'Reported spend', 'Months Run So Far'];
 
-            if (reportedSpend > 0) {
-                box.classList.add('green');
-            } else if (contractEnd < today) {
-                box.classList.add('red');
-            } else if (monthsRun > threshold) {
-                box.classList.add('yellow');
-            } else {
-                box.classList.add('green');
+        for (const key of detailOrder) {
+            if (details.hasOwnProperty(key)) {
+                const value = details[key];
+                const label = key;
+                let formattedValue = value;
+                if (['Contract value', 'Reported spend'].includes(key)) {
+                    formattedValue = formatCurrency(value);
+                }
+                detailsHtml += `<p><strong>${label}:</strong> ${formattedValue}</p>`;
             }
+        }
+        const buyerName = details['Buyer name'];
+        const draftEmail = `Dear ${name},\n\nWe are writing to you regarding your agreement with ${buyerName}. Please can you check your records for any unreported spend.\n\nBest regards,\nCrown Commercial Service`;
+        detailsHtml += `<p><strong>Draft Email:</strong></p><textarea readonly style="width: 100%; height: 150px; resize: vertical; background-color: #f5f5f7; border: 1px solid #d2d2d7; border-radius: 12px; padding: 10px; color: #1d1d1f;">${draftEmail}</textarea>`;
+        detailsBox.innerHTML = detailsHtml;
+        detailsBox.style.display = 'block';
+    }
+
+    function renderPage(page) {
+        currentPage = page;
+        if (!page) {
+            return;
+        }
+        // the status of each supplier comes from the server, so nothing is recomputed here
+        const boxes = page.suppliers.map((supplier, index) => {
+            const supplierBox = document.createElement('div');
+            supplierBox.className = `supplier-box ${supplier.status}`;
+            supplierBox.dataset.index = index;
+            supplierBox.textContent = supplier.name;
+            return supplierBox;
         });
+        suppliersContainer.replaceChildren(...boxes);
+        statusCounts.textContent = `Red: ${page.counts.red} · Yellow: ${page.counts.yellow} · Green: ${page.counts.green}`;
+        pageInfo.textContent = `Page ${page.page} of ${page.pages} (${page.total} suppliers)`;
+        previousButton.disabled = page.page <= 1;
+        nextButton.disabled = page.page >= page.pages;
     }
 
-    function attachEventListenersToSupplierBoxes() {
-        const supplierBoxes = document.querySelectorAll('.supplier-box');
-        supplierBoxes.forEach(box => {
-            box.addEventListener('click', () => {
-                const details = JSON.parse(box.dataset.details);
-                const name = box.dataset.name;
-                let detailsHtml = `<h2>${name}</h2>`;
-                const detailOrder = ['Buyer name', 'Contract value', 'Contract start', 'Contract end', 'Reported spend', 'Months Run So Far'];
+    function updateCustomerGroups(groups) {
+        const selected = customerGroupSelect.value;
+        const options = [new Option('All customer groups', '')];
+        groups.forEach(group => options.push(new Option(group, group)));
+        customerGroupSelect.replaceChildren(...options);
+        customerGroupSelect.value = groups.includes(selected) ? selected : '';
+    }
 
-                for (const key of detailOrder) {
-                    if (details.hasOwnProperty(key)) {
-                        const value = details[key];
-                        const label = key;
-                        let formattedValue = value;
-                        if (['Contract value', 'Reported spend'].includes(key)) {
-                            formattedValue = formatCurrency(value);
-                        }
-                        detailsHtml += `<p><strong>${label}:</strong> ${formattedValue}</p>`;
-                    }
+    function loadPage() {
+        const params = new URLSearchParams({ page: pageNumber, threshold: thresholdSlider.value });
+        if (statusSelect.value) {
+            params.set('status', statusSelect.value);
+        }
+        if (buyerInput.value.trim()) {
+            params.set('buyer', buyerInput.value.trim());
+        }
+        if (customerGroupSelect.value) {
+            params.set('customer_group', customerGroupSelect.value);
+        }
+        // only the latest request's response is shown, if an earlier one arrives after it
+        const request = ++latestRequest;
+        fetch(`/suppliers/${encodeURIComponent(frameworkSelect.value)}?${params}`)
+            .then(response => response.json())
+            .then(page => {
+                if (request !== latestRequest || page.error) {
+                    return;
                 }
-                const buyerName = details['Buyer name'];
-                const draftEmail = `Dear ${name},\n\nWe are writing to you regarding your agreement with ${buyerName}. Please can you check your records for any unreported spend.\n\nBest regards,\nCrown Commercial Service`;
-                detailsHtml += `<p><strong>Draft Email:</strong></p><textarea readonly style="width: 100%; height: 150px; resize: vertical; background-color: #f5f5f7; border: 1px solid #d2d2d7; border-radius: 12px; padding: 10px; color: #1d1d1f;">${draftEmail}</textarea>`;
-                detailsBox.innerHTML = detailsHtml;
-                detailsBox.style.display = 'block';
+                updateCustomerGroups(page.customer_groups);
+                renderPage(page);
             });
-        });
     }
 
-    frameworkSelect.addEventListener('change', () => {
-        const selectedFramework = frameworkSelect.value;
+    function reload() {
+        pageNumber = 1;
         detailsBox.style.display = 'none';
-        fetch(`/suppliers/${selectedFramework}`)
-            .then(response => response.json())
-            .then(suppliers => {
-                suppliersContainer.innerHTML = '';
-                suppliers.forEach(supplier => {
-                    const supplierBox = document.createElement('div');
-                    supplierBox.className = 'supplier-box';
-                    supplierBox.dataset.details = JSON.stringify(supplier.details);
-                    supplierBox.dataset.name = supplier.name;
-                    supplierBox.textContent = supplier.name;
-                    suppliersContainer.appendChild(supplierBox);
-                });
-                attachEventListenersToSupplierBoxes();
-                updateSupplierColors();
-            });
+        loadPage();
+    }
+
+    let debounceTimer;
+    function reloadSoon() {
+        clearTimeout(debounceTimer);
+        debounceTimer = setTimeout(reload, 250);
+    }
+
+    suppliersContainer.addEventListener('click', event => {
+        const box = event.target.closest('.supplier-box');
+        if (box) {
+            showDetails(currentPage.suppliers[box.dataset.index]);
+        }
     });
 
-    thresholdSlider.addEventListener('input', updateSupplierColors);
+    frameworkSelect.addEventListener('change', reload);
+    statusSelect.addEventListener('change', reload);
+    customerGroupSelect.addEventListener('change', reload);
+    buyerInput.addEventListener('input', reloadSoon);
+    thresholdSlider.addEventListener('input', () => {
+        thresholdValue.textContent = thresholdSlider.value;
+        reloadSoon();
+    });
+    previousButton.addEventListener('click', () => {
+        pageNumber -= 1;
+        loadPage();
+    });
+    nextButton.addEventListener('click', () => {
+        pageNumber += 1;
+        loadPage();
+    });
 
-    attachEventListenersToSupplierBoxes();
-    updateSupplierColors();
+    renderPage(currentPage);
 });
@@ -0,0 +1,62 @@
+document.addEventListener('DOMContentLoaded', () => {
+    const groupBySelect = document.getElementById('group-by');
+    const frameworkSelect = document.getElementById('framework');
+    const thresholdSlider = document.getElementById('threshold');
+    const thresholdValue = document.getElementById('threshold-value');
+    const groupHeading = document.getElementById('group-heading');
+    const rows = document.getElementById('summary-rows');
+    const totals = document.getElementById('summary-totals');
+    const note = document.getElementById('summary-note');
+
+    // only the largest groups are shown, e.g. when grouping by supplier
+    const LIMIT = 500;
+    let latestRequest = 0;
+
+    function formatCurrency(value) {
+        return new Intl.NumberFormat('en-GB', { style: 'currency', currency: 'GBP', maximumFractionDigits: 0 }).format(value);
+    }
+
+    function row(label, values, cell) {
+        const tr = document.createElement('tr');
+        const cells = [label, values.contracts, values.red, values.yellow, values.green, values.with_spend,
+            formatCurrency(values.award_value), formatCurrency(values.reported_spend)];
+        cells.forEach(value => {
+            const td = document.createElement(cell);
+            td.textContent = value;
+            tr.appendChild(td);
+        });
+        return tr;
+    }
+
+    function load() {
+        const params = new URLSearchParams({ threshold: thresholdSlider.value, limit: LIMIT });
+        if (frameworkSelect.value) {
+            params.set('framework', frameworkSelect.value);
+        }
+        const request = ++latestRequest;
+        fetch(`/summary/${groupBySelect.value}?${params}`)
+            .then(response => response.json())
+            .then(summary => {
+                if (request !== latestRequest || summary.error) {
+                    return;
+                }
+                groupHeading.textContent = groupBySelect.options[groupBySelect.selectedIndex].text.replace('By ', '');
+                rows.replaceChildren(...summary.groups.map(group => row(group.group, group, 'td')));
+                totals.replaceChildren(row('Total', summary.totals, 'th'));
+                note.textContent = summary.group_count > summary.groups.length
+                    ? `Showing the ${summary.groups.length} largest of ${summary.group_count} groups`
+                    : '';
+            });
+    }
+
+    let debounceTimer;
+    groupBySelect.addEventListener('change', load);
+    frameworkSelect.addEventListener('change', load);
+    thresholdSlider.addEventListener('input', () => {
+        thresholdValue.textContent = thresholdSlider.value;
+        clearTimeout(debounceTimer);
+        debounceTimer = setTimeout(load, 250);
+    });
+
+    load();
+});
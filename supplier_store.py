@@ -0,0 +1,484 @@
+from __future__ import annotations
+
+import datetime as dt
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+"""In-memory supplier data for the dashboard, indexed by framework and reloaded when its file changes."""
+
+# suppliers.csv columns and the line_level.csv (from summarise_data.py) columns they are read from
+SUPPLIER_COLUMNS = {
+    "framework": "framework_title",
+    "name": "Supplier",
+    "buyer_name": "Contracting Authority",
+    "contract_value": "Award Value",
+    "contract_start": "Contract Start Date",
+    "contract_end": "Contract End Date",
+    "reported_spend": "EvidencedSpend",
+}
+# optional columns, kept when the source has them
+OPTIONAL_COLUMNS = {"customer_group": "Customer Group"}
+
+# RAG status of a contract line: green if spend has been reported, otherwise red if
+# the contract has ended, yellow if it has run more than the threshold months or its
+# start date is missing, else green
+RAG_STATUSES = ("red", "yellow", "green")
+DEFAULT_THRESHOLD = 6
+DEFAULT_PER_PAGE = 100
+MAX_PER_PAGE = 1000
+# what the summary can be grouped by
+SUMMARY_GROUPS = ("framework", "customer_group", "supplier", "status")
+
+
+def read_suppliers(path: str) -> pd.DataFrame:
+    """
+    Reads suppliers.csv, or line_level.csv from the summarise stage, into one
+    frame with the suppliers.csv columns, in a single vectorised pass.
+    Contract dates are parsed to datetime64 and rows are ordered by framework,
+    keeping the file order within each framework.
+    """
+    df = pd.read_csv(path)
+    if "framework" not in df.columns:
+        renames = {v: k for k, v in {**SUPPLIER_COLUMNS, **OPTIONAL_COLUMNS}.items()}
+        df = df.rename(columns=renames)
+    missing = [c for c in SUPPLIER_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"{path} is missing supplier columns {missing}")
+    columns = list(SUPPLIER_COLUMNS) + [c for c in OPTIONAL_COLUMNS if c in df.columns]
+    df = df[columns].dropna(subset=["framework"])
+    for column in ["contract_start", "contract_end"]:
+        df[column] = pd.to_datetime(df[column], format="ISO8601")
+    df["framework"] = df["framework"].astype(str)
+    return df.sort_values("framework", kind="stable").reset_index(drop=True)
+
+
+def read_summary_stats(path: str) -> List[dict]:
+    """The summarise stage's summary_stats.csv, as [{"statistic", "value"}]."""
+    stats = pd.read_csv(path)
+    return [
+        {"statistic": statistic, "value": value}
+        for statistic, value in zip(
+            stats["Summary Statistic"].tolist(), stats["Value"].tolist()
+        )
+    ]
+
+
+def months_run(
+    contract_start: pd.Series, contract_end: pd.Series, today: dt.date
+) -> np.ndarray:
+    """
+    Whole calendar months each contract has run: from its start to its end if it
+    has ended, otherwise to today. NaN where the start date is missing.
+    """
+    until = contract_end.where(contract_end < pd.Timestamp(today), pd.Timestamp(today))
+    return (
+        (until.dt.year - contract_start.dt.year) * 12
+        + (until.dt.month - contract_start.dt.month)
+    ).to_numpy()
+
+
+def _json_values(column: pd.Series) -> list:
+    """Column values as JSON-safe Python objects, with missing values as None."""
+    if column.dtype.kind == "M":
+        column = column.dt.strftime("%Y-%m-%d")
+    values = column.astype(object).where(column.notna(), None)
+    return values.tolist()
+
+
+class SupplierSnapshot:
+    """
+    One immutable load of the supplier data: the rows, the row range of each
+    framework, and date-dependent fields computed on first use for each day.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        version: Tuple,
+        summary_stats: Optional[List[dict]] = None,
+    ):
+        self.df = df
+        self.version = version
+        self.summary_stats = summary_stats or []
+        frameworks = df["framework"].to_numpy()
+        names, starts = np.unique(frameworks, return_index=True)
+        ends = np.append(starts[1:], len(df))
+        # rows are sorted by framework, so each framework is one contiguous slice
+        self.index: Dict[str, slice] = {
+            name: slice(start, end) for name, start, end in zip(names, starts, ends)
+        }
+        self._months: Tuple[Optional[dt.date], Optional[np.ndarray]] = (None, None)
+        self._records: Dict[Tuple[str, dt.date], List[dict]] = {}
+        self._statuses: Dict[Tuple[dt.date, int], np.ndarray] = {}
+        self._rollups: Dict[Tuple[str, int, dt.date], Dict[Optional[str], dict]] = {}
+        self._lock = threading.Lock()
+        # flags and filter columns that don't depend on the date, computed once
+        self._has_spend = (df["reported_spend"] > 0).to_numpy()
+        self._buyers = df["buyer_name"].fillna("").astype(str).str.lower()
+        self._groups = (
+            df["customer_group"].to_numpy(dtype=object)
+            if "customer_group" in df.columns
+            else None
+        )
+
+    @property
+    def frameworks(self) -> List[str]:
+        return list(self.index)
+
+    def months_run(self, today: Optional[dt.date] = None) -> np.ndarray:
+        """Months Run So Far for every row, computed once per day."""
+        today = today or dt.date.today()
+        day, months = self._months
+        if day != today:
+            months = months_run(
+                self.df["contract_start"], self.df["contract_end"], today
+            )
+            self._months = (today, months)
+        return months
+
+    def rag_statuses(
+        self, threshold: int = DEFAULT_THRESHOLD, today: Optional[dt.date] = None
+    ) -> np.ndarray:
+        """The RAG status of every row, computed once per threshold and day."""
+        today = today or dt.date.today()
+        key = (today, threshold)
+        statuses = self._statuses.get(key)
+        if statuses is None:
+            expired = (self.df["contract_end"] <= pd.Timestamp(today)).to_numpy()
+            months = self.months_run(today)
+            statuses = np.select(
+                # a running contract with no start date can't be shown to be new, so it's flagged
+                [self._has_spend, expired, np.isnan(months) | (months > threshold)],
+                ["green", "red", "yellow"],
+                "green",
+            ).astype(object)
+            # keep only today's thresholds
+            self._statuses = {k: v for k, v in self._statuses.items() if k[0] == today}
+            self._statuses[key] = statuses
+        return statuses
+
+    def customer_groups(self, framework: str) -> List[str]:
+        if self._groups is None:
+            return []
+        groups = self._groups[self.index.get(framework, slice(0, 0))]
+        return sorted({g for g in groups if isinstance(g, str)})
+
+    def query(
+        self,
+        framework: str,
+        page: int = 1,
+        per_page: int = DEFAULT_PER_PAGE,
+        threshold: int = DEFAULT_THRESHOLD,
+        statuses: Optional[Iterable[str]] = None,
+        buyer: Optional[str] = None,
+        customer_group: Optional[str] = None,
+        today: Optional[dt.date] = None,
+    ) -> dict:
+        """
+        One page of a framework's suppliers, filtered and flagged on the server.
+        Args:
+            framework: framework name
+            page: page number, from 1
+            per_page: suppliers per page, at most MAX_PER_PAGE
+            threshold: months run after which a contract with no spend is yellow
+            statuses: only suppliers with these RAG statuses, by default all
+            buyer: only suppliers whose buyer name contains this, ignoring case
+            customer_group: only suppliers in this customer group
+            today: date that months run and expiry are measured to, by default today
+        Returns:
+            {"framework", "page", "per_page", "pages", "total", "threshold",
+             "counts": {status: suppliers matching the buyer and group filters},
+             "suppliers": [supplier with its "status"]}
+        """
+        if page < 1:
+            raise ValueError("page must be at least 1")
+        if not 1 <= per_page <= MAX_PER_PAGE:
+            raise ValueError(f"per_page must be between 1 and {MAX_PER_PAGE}")
+        statuses = set(statuses or RAG_STATUSES)
+        unknown = statuses - set(RAG_STATUSES)
+        if unknown:
+            raise ValueError(
+                f"Unknown status {sorted(unknown)}, expected {RAG_STATUSES}"
+            )
+        today = today or dt.date.today()
+
+        rows = self.index.get(framework, slice(0, 0))
+        status = self.rag_statuses(threshold, today)[rows]
+        mask = np.ones(len(status), dtype=bool)
+        if buyer:
+            mask &= (
+                self._buyers.iloc[rows]
+                .str.contains(buyer.lower(), regex=False)
+                .to_numpy()
+            )
+        if customer_group:
+            if self._groups is None:
+                mask[:] = False
+            else:
+                mask &= self._groups[rows] == customer_group
+        counts = dict(zip(*np.unique(status[mask], return_counts=True)))
+        mask &= np.isin(status, list(statuses))
+        matches = np.flatnonzero(mask)
+
+        records = self.suppliers(framework, today)
+        start = (page - 1) * per_page
+        return {
+            "framework": framework,
+            "page": page,
+            "per_page": per_page,
+            "pages": max(1, -(-len(matches) // per_page)),
+            "total": len(matches),
+            "threshold": threshold,
+            "counts": {s: int(counts.get(s, 0)) for s in RAG_STATUSES},
+            "suppliers": [
+                {**records[i], "status": status[i]}
+                for i in matches[start : start + per_page]
+            ],
+        }
+
+    def rollup(
+        self,
+        group_by: str,
+        framework: Optional[str] = None,
+        threshold: int = DEFAULT_THRESHOLD,
+        today: Optional[dt.date] = None,
+    ) -> dict:
+        """
+        Contract counts, RAG status counts, award value and reported spend per group.
+        The first call for a grouping, threshold and day aggregates every row once,
+        by framework and group; later calls, for any framework, are lookups.
+        Args:
+            group_by: one of SUMMARY_GROUPS
+            framework: only this framework's contracts, by default all
+            threshold, today: see query
+        Returns:
+            {"totals": {...}, "groups": [{"group", "contracts", "red", "yellow",
+             "green", "with_spend", "award_value", "reported_spend"}]}, with groups in
+            descending order of contracts
+        """
+        if group_by not in SUMMARY_GROUPS:
+            raise ValueError(f"Unknown group_by {group_by}, expected {SUMMARY_GROUPS}")
+        today = today or dt.date.today()
+        key = (group_by, threshold, today)
+        with self._lock:
+            rollups = self._rollups.get(key)
+        if rollups is None:
+            rollups = self._build_rollups(group_by, threshold, today)
+            with self._lock:
+                self._rollups = {
+                    k: v for k, v in self._rollups.items() if k[2] == today
+                }
+                self._rollups[key] = rollups
+        return rollups.get(framework, {"totals": self._rollup_row({}), "groups": []})
+
+    # rollup columns: counts of contracts, and sums of money
+    _ROLLUP_COUNTS = ["contracts", "red", "yellow", "green", "with_spend"]
+    _ROLLUP_AMOUNTS = ["award_value", "reported_spend"]
+
+    @classmethod
+    def _rollup_row(cls, values: dict) -> dict:
+        row = {c: int(values.get(c, 0)) for c in cls._ROLLUP_COUNTS}
+        row.update({c: float(values.get(c, 0.0)) for c in cls._ROLLUP_AMOUNTS})
+        return row
+
+    @classmethod
+    def _rollup_records(cls, table: pd.DataFrame) -> dict:
+        table = table.reset_index().sort_values(
+            ["contracts", "group"], ascending=[False, True], kind="stable"
+        )
+        columns = cls._ROLLUP_COUNTS + cls._ROLLUP_AMOUNTS
+        table = table.astype({c: "int64" for c in cls._ROLLUP_COUNTS})
+        table = table.astype({c: "float64" for c in cls._ROLLUP_AMOUNTS})
+        return {
+            "totals": cls._rollup_row(table[columns].sum().to_dict()),
+            "groups": [
+                dict(zip(["group"] + columns, values))
+                for values in zip(*(table[c].tolist() for c in ["group"] + columns))
+            ],
+        }
+
+    def _build_rollups(
+        self, group_by: str, threshold: int, today: dt.date
+    ) -> Dict[Optional[str], dict]:
+        statuses = self.rag_statuses(threshold, today)
+        if group_by == "status":
+            groups = statuses
+        elif group_by == "supplier":
+            groups = self.df["name"].to_numpy(dtype=object)
+        elif group_by == "customer_group":
+            groups = (
+                self._groups
+                if self._groups is not None
+                else np.full(len(self.df), None)
+            )
+        else:
+            groups = self.df["framework"].to_numpy(dtype=object)
+        frame = pd.DataFrame(
+            {
+                "framework": self.df["framework"].to_numpy(),
+                "group": pd.Series(groups, dtype=object).fillna("Unknown").astype(str),
+                "contracts": 1,
+                "red": statuses == "red",
+                "yellow": statuses == "yellow",
+                "green": statuses == "green",
+                "with_spend": self._has_spend,
+                "award_value": self.df["contract_value"]
+                .fillna(0)
+                .to_numpy(dtype=float),
+                "reported_spend": self.df["reported_spend"]
+                .fillna(0)
+                .to_numpy(dtype=float),
+            }
+        )
+        by_framework = frame.groupby(["framework", "group"], sort=True).sum()
+        rollups: Dict[Optional[str], dict] = {
+            None: self._rollup_records(by_framework.groupby(level="group").sum())
+        }
+        for framework, table in by_framework.groupby(level="framework"):
+            rollups[framework] = self._rollup_records(table.droplevel("framework"))
+        return rollups
+
+    def rows(self, framework: str) -> pd.DataFrame:
+        return self.df.iloc[self.index.get(framework, slice(0, 0))]
+
+    def suppliers(self, framework: str, today: Optional[dt.date] = None) -> List[dict]:
+        """
+        The framework's suppliers as the dashboard expects them:
+        [{"framework", "name", "details": {"Buyer name", ..., "Months Run So Far"}}].
+        Built once per framework and day.
+        """
+        today = today or dt.date.today()
+        key = (framework, today)
+        with self._lock:
+            if key not in self._records:
+                # yesterday's records are stale
+                self._records = {
+                    k: v for k, v in self._records.items() if k[1] == today
+                }
+                self._records[key] = self._build_records(framework, today)
+            return self._records[key]
+
+    def _build_records(self, framework: str, today: dt.date) -> List[dict]:
+        rows = self.rows(framework)
+        months = self.months_run(today)[self.index.get(framework, slice(0, 0))]
+        details = zip(
+            _json_values(rows["buyer_name"]),
+            _json_values(rows["contract_value"]),
+            _json_values(rows["contract_start"]),
+            _json_values(rows["contract_end"]),
+            _json_values(rows["reported_spend"]),
+            # whole months, or None without a start date (NaN isn't valid JSON)
+            [None if np.isnan(m) else int(m) for m in months.tolist()],
+        )
+        return [
+            {
+                "framework": framework,
+                "name": name,
+                "details": {
+                    "Buyer name": buyer,
+                    "Contract value": value,
+                    "Contract start": start,
+                    "Contract end": end,
+                    "Reported spend": spend,
+                    "Months Run So Far": months_ran,
+                },
+            }
+            for name, (buyer, value, start, end, spend, months_ran) in zip(
+                _json_values(rows["name"]), details
+            )
+        ]
+
+
+class SupplierStore:
+    """
+    The current SupplierSnapshot of a suppliers.csv or line_level.csv file.
+
+    The file's modification time and size are checked at most every
+    `check_interval` seconds, and a new snapshot is loaded when either changes,
+    so a running dashboard picks up new pipeline output without a restart.
+    Readers always get a complete snapshot: a reload builds a new one and swaps
+    it in, and if the new file can't be read the previous snapshot is kept.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        check_interval: float = 2.0,
+        summary_path: Optional[str] = None,
+    ):
+        self.path = path
+        self.summary_path = summary_path
+        self.check_interval = check_interval
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._snapshot = self._load(self._version())
+
+    def _version(self) -> Tuple:
+        stat = os.stat(self.path)
+        version = (stat.st_mtime, stat.st_size)
+        # the summary statistics file is optional
+        if self.summary_path and os.path.exists(self.summary_path):
+            summary = os.stat(self.summary_path)
+            return version + (summary.st_mtime, summary.st_size)
+        return version
+
+    def _load(self, version: Tuple) -> SupplierSnapshot:
+        summary_stats = None
+        if len(version) > 2:
+            summary_stats = read_summary_stats(self.summary_path)
+        return SupplierSnapshot(read_suppliers(self.path), version, summary_stats)
+
+    def snapshot(self) -> SupplierSnapshot:
+        """The current snapshot, reloading it first if the file has changed."""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._snapshot
+        with self._lock:
+            if now - self._checked_at >= self.check_interval:
+                self._checked_at = now
+                try:
+                    version = self._version()
+                    if version != self._snapshot.version:
+                        self._snapshot = self._load(version)
+                        self.reloads += 1
+                except (OSError, KeyError, ValueError, pd.errors.ParserError) as e:
+                    print(
+                        f"Keeping loaded supplier data, reloading {self.path} failed: {e}"
+                    )
+        return self._snapshot
+
+    @property
+    def frameworks(self) -> List[str]:
+        return self.snapshot().frameworks
+
+    def suppliers(self, framework: str, today: Optional[dt.date] = None) -> List[dict]:
+        return self.snapshot().suppliers(framework, today)
+
+    def customer_groups(self, framework: str) -> List[str]:
+        return self.snapshot().customer_groups(framework)
+
+    def warm(self, today: Optional[dt.date] = None) -> None:
+        """
+        Builds every framework's records and the default RAG statuses now rather
+        than on first request, e.g. before a preloading server forks its workers.
+        """
+        snapshot = self.snapshot()
+        for framework in snapshot.frameworks:
+            snapshot.suppliers(framework, today)
+        snapshot.rag_statuses(DEFAULT_THRESHOLD, today)
+        for group_by in SUMMARY_GROUPS:
+            snapshot.rollup(group_by, today=today)
+
+    def query(self, framework: str, **filters) -> dict:
+        """A page of suppliers from the current snapshot; see SupplierSnapshot.query."""
+        return self.snapshot().query(framework, **filters)
+
+    def rollup(self, group_by: str, **filters) -> dict:
+        """Aggregates from the current snapshot; see SupplierSnapshot.rollup."""
+        return self.snapshot().rollup(group_by, **filters)
@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+"""
+Synthetic contracts, MI and registration number tables of any size, for
+performance testing the pipeline.
+
+The tables have the shape of the live extracts and the awkward cases the
+dummy data covers, at realistic proportions: MI customer names written with
+different casing, typos, acronyms and "Ltd"/"Limited"; SupplierKeys stored
+as "12" or "12.0", or missing; suppliers with no registration number; MI
+for pairs without a contract; and many financial months per pair.
+
+Everything is generated with NumPy on per-buyer and per-supplier tables and
+then indexed per row, so even 10M-row MI tables generate in seconds.
+"""
+
+# MI spend is reported from this month onwards, and contracts start from this year
+FIRST_YEAR = 2018
+LAST_YEAR = 2026
+FRAMEWORKS = {
+    2018: "RM1557.10",
+    2019: "RM1557.11",
+    2020: "RM1557.11",
+    2021: "RM1557.12",
+    2022: "RM1557.12",
+    2023: "RM1557.13",
+    2024: "RM1557.13",
+    2025: "RM1557.14",
+    2026: "RM1557.14",
+}
+
+_PLACES = np.array(
+    [
+        "Northshire",
+        "Southmoor",
+        "Eastbridge",
+        "Westford",
+        "Highdale",
+        "Lowbury",
+        "Kingsmere",
+        "Ashvale",
+        "Brookfield",
+        "Carrow",
+        "Dunmore",
+        "Elmstead",
+    ],
+    dtype=object,
+)
+_SUBJECTS = np.array(
+    [
+        "Work and Pensions",
+        "Education",
+        "Health and Social Care",
+        "Transport",
+        "Business and Trade",
+        "Energy Security",
+        "Culture Media and Sport",
+        "Environment Food and Rural Affairs",
+        "Science Innovation and Technology",
+    ],
+    dtype=object,
+)
+# buyer name templates: (format, customer group)
+_BUYER_KINDS = [
+    ("Department for {subject}", "Central Government"),
+    ("{place} County Council", "Local Government"),
+    ("{place} Borough Council", "Local Government"),
+    ("NHS {place} Integrated Care Board", "Health"),
+    ("{place} Hospitals NHS Foundation Trust", "Health"),
+    ("University of {place}", "Education"),
+    ("{place} Police", "Blue Light"),
+    ("{place} Housing Services Limited", "Not For Profit"),
+]
+_SUPPLIER_WORDS = np.array(
+    [
+        "Cloud",
+        "Digital",
+        "Data",
+        "Cyber",
+        "Software",
+        "Systems",
+        "Analytics",
+        "Networks",
+        "Consulting",
+        "Hosting",
+        "Platform",
+        "Services",
+    ],
+    dtype=object,
+)
+
+# share of MI pairs whose customer name is written in each way
+NAME_VARIANTS = {
+    "exact": 0.74,
+    "upper": 0.06,
+    "lower": 0.04,
+    "ltd": 0.04,
+    "acronym": 0.04,
+    "typo": 0.08,
+}
+
+
+def _acronym(name: str) -> str:
+    return "".join(word[0] for word in name.split() if word[0].isupper())
+
+
+def _typo(name: str, rng: np.random.Generator) -> str:
+    # swap two neighbouring letters
+    i = int(rng.integers(1, len(name) - 2))
+    return name[:i] + name[i + 1] + name[i] + name[i + 2 :]
+
+
+def _ltd(name: str) -> str:
+    if name.endswith(" Limited"):
+        return name[: -len("Limited")] + "LTD"
+    return name + " Ltd"
+
+
+def _buyers(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """n distinct buyer names, their customer groups and each name variant."""
+    kinds = rng.integers(0, len(_BUYER_KINDS), n)
+    places = _PLACES[rng.integers(0, len(_PLACES), n)]
+    subjects = _SUBJECTS[rng.integers(0, len(_SUBJECTS), n)]
+    names = [
+        _BUYER_KINDS[k][0].format(place=p, subject=s)
+        for k, p, s in zip(kinds, places, subjects)
+    ]
+    # number repeated names, so every buyer is distinct
+    names = pd.Series(names)
+    repeat = names.groupby(names).cumcount()
+    names = names.where(repeat == 0, names + " " + (repeat + 1).astype(str))
+    buyers = pd.DataFrame(
+        {
+            "exact": names,
+            "group": [_BUYER_KINDS[k][1] for k in kinds],
+        }
+    )
+    buyers["upper"] = buyers["exact"].str.upper()
+    buyers["lower"] = buyers["exact"].str.lower()
+    buyers["ltd"] = buyers["exact"].map(_ltd)
+    buyers["acronym"] = buyers["exact"].map(_acronym)
+    buyers["typo"] = [_typo(name, rng) for name in buyers["exact"]]
+    return buyers
+
+
+def _suppliers(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """n suppliers with names, SupplierKeys and Company Registration Numbers."""
+    words = _SUPPLIER_WORDS[rng.integers(0, len(_SUPPLIER_WORDS), (n, 2))]
+    index = np.arange(n)
+    keys = rng.choice(10 * n, n, replace=False) + 1
+    reg_numbers = pd.Series(rng.choice(10_000_000, n, replace=False))
+    reg_numbers = reg_numbers.astype(str).str.zfill(8)
+    # Scottish companies' numbers start SC
+    scottish = rng.random(n) < 0.05
+    reg_numbers[scottish] = "SC" + reg_numbers[scottish].str[2:]
+    return pd.DataFrame(
+        {
+            "name": pd.Series(words[:, 0])
+            + " "
+            + words[:, 1]
+            + " "
+            + index.astype(str)
+            + " Ltd",
+            "key": keys,
+            "reg_number": reg_numbers,
+            "employees": np.maximum(1, rng.lognormal(3.5, 1.5, n)).astype(np.int64),
+        }
+    )
+
+
+def _popular(rng: np.random.Generator, n: int, size: int) -> np.ndarray:
+    """Indices below n where a few are common and most rare, like buyers and suppliers."""
+    weights = 1.0 / (np.arange(n) + 5.0)
+    return rng.choice(n, size, p=weights / weights.sum())
+
+
+def generate_synthetic_data(
+    rows: int, seed: int = 0
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Generates synthetic contracts, MI and registration number tables.
+    Args:
+        rows: number of MI rows; the other tables are scaled to it (about one
+            contract per 40 MI rows)
+        seed: random seed, so the same arguments give the same tables
+    Returns:
+        (contracts, mi, reg_number_supplier_key), with the columns of the dummy data
+    """
+    if rows < 1:
+        raise ValueError("rows must be at least 1")
+    rng = np.random.default_rng(seed)
+    total_months = (LAST_YEAR - FIRST_YEAR + 1) * 12
+    n_contracts = max(rows // 40, 20)
+    buyers = _buyers(max(n_contracts // 8, 10), rng)
+    suppliers = _suppliers(max(n_contracts // 20, 10), rng)
+
+    # contracts
+    contract_buyer = rng.permutation(len(buyers))[
+        _popular(rng, len(buyers), n_contracts)
+    ]
+    contract_supplier = rng.permutation(len(suppliers))[
+        _popular(rng, len(suppliers), n_contracts)
+    ]
+    start_month = rng.integers(0, total_months, n_contracts)
+    start = pd.to_datetime(
+        {
+            "year": FIRST_YEAR + start_month // 12,
+            "month": start_month % 12 + 1,
+            "day": rng.integers(1, 29, n_contracts),
+        }
+    )
+    months = rng.choice([6, 12, 24, 36, 48], n_contracts, p=[0.1, 0.3, 0.3, 0.2, 0.1])
+    contracts = pd.DataFrame(
+        {
+            "buyer": buyers["exact"].to_numpy()[contract_buyer],
+            "suppliers": suppliers["name"].to_numpy()[contract_supplier],
+            "SupplierCompanyRegistrationNumber": suppliers["reg_number"].to_numpy()[
+                contract_supplier
+            ],
+            "contract_start": start,
+            "contract_end": start
+            + pd.to_timedelta(months * 30.44, unit="D").round("D"),
+            "contract_months": months,
+            "contract_title": "Contract "
+            + pd.Series(np.arange(1, n_contracts + 1)).astype(str),
+            "contract_description": "Cloud services call-off, with commas that need to be handled when parsing",
+            "award_value": np.round(rng.lognormal(12, 1.5, n_contracts), -2),
+            "framework_title": pd.Series(FIRST_YEAR + start_month // 12)
+            .map(FRAMEWORKS)
+            .to_numpy(),
+            "source": rng.choice(
+                ["Contracts Finder", "Find a Tender", "Online"], n_contracts
+            ),
+            "awarded": start
+            - pd.to_timedelta(rng.integers(0, 60, n_contracts), unit="D"),
+            "latest_employees": suppliers["employees"].to_numpy()[contract_supplier],
+        }
+    )
+
+    # registration numbers of all but a few suppliers, whose contracts then have no SupplierKey
+    registered = rng.random(len(suppliers)) >= 0.03
+    reg = pd.DataFrame(
+        {
+            "SupplierCompanyRegistrationNumber": suppliers["reg_number"][registered],
+            "SupplierKey": suppliers["key"][registered],
+        }
+    ).reset_index(drop=True)
+
+    # MI: a run of consecutive financial months for each supplier-buyer pair, mostly
+    # pairs with a contract starting around the contract start, the rest without one
+    pair_months = rng.integers(1, 37, rows // 10 + 10)
+    if pair_months.sum() < rows:
+        pair_months = np.append(pair_months, rows - pair_months.sum())
+    n_pairs = int(np.searchsorted(np.cumsum(pair_months), rows)) + 1
+    pair_months = pair_months[:n_pairs]
+    pair_months[-1] -= pair_months.sum() - rows
+    pair_contract = rng.integers(0, n_contracts, n_pairs)
+    with_contract = rng.random(n_pairs) < 0.85
+    pair_buyer = np.where(
+        with_contract,
+        contract_buyer[pair_contract],
+        _popular(rng, len(buyers), n_pairs),
+    )
+    pair_supplier = np.where(
+        with_contract,
+        contract_supplier[pair_contract],
+        rng.integers(0, len(suppliers), n_pairs),
+    )
+    pair_start = np.where(
+        with_contract,
+        start_month[pair_contract] + rng.integers(0, 3, n_pairs),
+        rng.integers(0, total_months, n_pairs),
+    )
+    # runs end by the last month
+    pair_start = np.maximum(np.minimum(pair_start, total_months - pair_months), 0)
+    variant_names = list(NAME_VARIANTS)
+    pair_variant = rng.choice(
+        len(variant_names), n_pairs, p=list(NAME_VARIANTS.values())
+    )
+    # SupplierKeys are stored as "12" or "12.0", and a few are missing
+    key_forms = np.stack(
+        [
+            suppliers["key"].astype(str).to_numpy(dtype=object),
+            (suppliers["key"].astype(str) + ".0").to_numpy(dtype=object),
+            np.full(len(suppliers), np.nan, dtype=object),
+        ],
+        axis=1,
+    )
+    pair_key_form = rng.choice(3, n_pairs, p=[0.8, 0.18, 0.02])
+    pair_scale = rng.lognormal(8, 1.5, n_pairs)
+
+    row_pair = np.repeat(np.arange(n_pairs), pair_months)
+    month_in_run = np.arange(rows) - np.repeat(
+        np.cumsum(pair_months) - pair_months, pair_months
+    )
+    month = pair_start[row_pair] + month_in_run
+    customer_names = buyers[variant_names].to_numpy(dtype=object)
+    spend = np.round(pair_scale[row_pair] * rng.lognormal(0, 0.5, rows), 2)
+    # a few months with nothing spent
+    spend[rng.random(rows) < 0.03] = 0.0
+    mi = pd.DataFrame(
+        {
+            "SupplierName": suppliers["name"].to_numpy()[pair_supplier][row_pair],
+            "SupplierKey": key_forms[pair_supplier, pair_key_form][row_pair],
+            "CustomerName": customer_names[pair_buyer, pair_variant][row_pair],
+            "FinancialYear": FIRST_YEAR + month // 12,
+            "FinancialMonth": month % 12 + 1,
+            "EvidencedSpend": spend,
+            "CustomerGroup": buyers["group"].to_numpy()[pair_buyer][row_pair],
+        }
+    )
+    return contracts, mi, reg
@@ -0,0 +1,70 @@
+import pytest
+
+import app as dashboard
+
+
+@pytest.fixture
+def client():
+    return dashboard.app.test_client()
+
+
+def test_index_renders_first_page(client):
+    response = client.get("/")
+    assert response.status_code == 200
+    assert b'id="initial-page"' in response.data
+
+
+def test_suppliers_are_paged_and_flagged(client):
+    framework = dashboard.store.frameworks[0]
+    response = client.get(f"/suppliers/{framework}?per_page=2&threshold=0")
+    page = response.get_json()
+
+    assert response.status_code == 200
+    assert page["per_page"] == 2 and len(page["suppliers"]) <= 2
+    assert page["total"] == len(dashboard.store.suppliers(framework))
+    assert all(s["status"] in ("red", "yellow", "green") for s in page["suppliers"])
+
+
+def test_suppliers_rejects_bad_parameters(client):
+    framework = dashboard.store.frameworks[0]
+    assert client.get(f"/suppliers/{framework}?page=x").status_code == 400
+    assert client.get(f"/suppliers/{framework}?status=blue").status_code == 400
+
+
+def test_suppliers_revalidate_with_etag(client):
+    framework = dashboard.store.frameworks[0]
+    url = f"/suppliers/{framework}?per_page=5"
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    etag = response.headers["ETag"]
+
+    assert response.status_code == 200
+    assert response.headers["Vary"] == "Accept-Encoding"
+
+    revalidated = client.get(
+        url, headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.data == b""
+    # a different page is a different body
+    other = client.get(f"{url}&page=2", headers={"If-None-Match": etag})
+    assert other.status_code == 200
+
+
+def test_wsgi_entry_point_serves_the_app():
+    import wsgi
+
+    assert wsgi.application is dashboard.app
+
+
+def test_summary_view_and_api(client):
+    assert client.get("/summary").status_code == 200
+
+    response = client.get("/summary/framework?limit=1")
+    summary = response.get_json()
+    assert response.status_code == 200
+    assert len(summary["groups"]) == 1
+    assert summary["group_count"] == len(dashboard.store.frameworks)
+    assert summary["totals"]["contracts"] == sum(
+        len(dashboard.store.suppliers(f)) for f in dashboard.store.frameworks
+    )
+    assert client.get("/summary/colour").status_code == 400
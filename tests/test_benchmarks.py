@@ -0,0 +1,99 @@
+import contextlib
+import json
+import threading
+
+from werkzeug.serving import make_server
+
+import app as dashboard
+from benchmarks import suite
+from benchmarks.harness import (
+    compare,
+    load_metadata,
+    load_results,
+    machine_differences,
+    save_results,
+    time_case,
+)
+from benchmarks.load_test import run_load
+
+
+def _result(seconds):
+    return {"min_s": seconds, "median_s": seconds, "repeats": 3}
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = {
+        "slower[1]": _result(1.0),
+        "faster[1]": _result(1.0),
+        "same[1]": _result(1.0),
+        "tiny[1]": _result(0.001),
+    }
+    results = {
+        "slower[1]": _result(1.5),
+        "faster[1]": _result(0.5),
+        "same[1]": _result(1.1),
+        # 3x slower, but by less than min_seconds
+        "tiny[1]": _result(0.003),
+        "new[1]": _result(1.0),
+    }
+
+    statuses = {
+        c["key"]: c["status"] for c in compare(results, baseline, threshold=0.25)
+    }
+
+    assert statuses == {
+        "slower[1]": "regression",
+        "faster[1]": "improvement",
+        "same[1]": "ok",
+        "tiny[1]": "ok",
+    }
+
+
+def test_results_round_trip_as_json(tmp_path):
+    path = tmp_path / "results.json"
+    calls = []
+
+    @contextlib.contextmanager
+    def case(size):
+        yield lambda: calls.append(size)
+
+    results = {"case[5]": time_case(case, 5, repeats=2)}
+    save_results(results, path)
+
+    assert calls == [5, 5, 5]  # one warm-up call and two timed
+    assert load_results(path) == results
+    assert set(json.loads(path.read_text())["metadata"]) >= {"created", "python"}
+    metadata = load_metadata(path)
+    assert {"cpu_model", "cpu_count"} <= set(metadata)
+    assert machine_differences(metadata) == []
+    assert (
+        len(machine_differences({**metadata, "python": "2.7.18", "cpu_count": 0})) == 2
+    )
+
+
+def test_match_string_via_api_case_against_mock_server():
+    result = time_case(suite.match_string_via_api_case, 10, repeats=1)
+    assert result["size"] == 10 and result["min_s"] > 0
+
+
+def test_load_test_reports_throughput_and_percentiles():
+    server = make_server("127.0.0.1", 0, dashboard.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        framework = dashboard.store.frameworks[0]
+        results = run_load(
+            f"http://127.0.0.1:{server.port}",
+            [f"/suppliers/{framework}"],
+            concurrency=2,
+            duration_s=0.5,
+            warmup_s=0.1,
+            revalidate=True,
+        )
+    finally:
+        server.shutdown()
+
+    assert results["requests"] > 0 and results["errors"] == 0
+    assert results["p50_ms"] <= results["p99_ms"] <= results["max_ms"]
+    # after the first response, each client revalidates with its ETag
+    assert "304" in results["statuses"]
@@ -0,0 +1,53 @@
+from candidate_index import CandidateIndex, acronym, recall_at_k, shortlist_candidates
+
+BUYERS = [
+    "Department for Work and Pensions",
+    "Department for Transport",
+    "Ministry of Defence",
+    "Ministry of Justice",
+    "Home Office",
+    "Cabinet Office",
+    "Buyer C Limited",
+]
+
+
+def test_acronym():
+    assert acronym("Department for Work and Pensions") == "DWP"
+    assert acronym("Ministry of Defence", keep_stopwords=True) == "MOD"
+
+
+def test_top_k_ranks_typos_and_variants_first():
+    index = CandidateIndex(BUYERS)
+    assert index.top_k("Home Ofice", 1) == ["Home Office"]
+    assert index.top_k("BUYER C LTD", 1) == ["Buyer C Limited"]
+    assert index.top_k("Ministry of Defense", 2)[0] == "Ministry of Defence"
+
+
+def test_top_k_uses_acronyms():
+    index = CandidateIndex(BUYERS + ["DWP"])
+    assert index.top_k("DWP", 2) == ["DWP", "Department for Work and Pensions"]
+    assert index.top_k("MoD", 1) == ["Ministry of Defence"]
+    # a full name also finds a candidate that is its acronym
+    assert "DWP" in CandidateIndex(["DWP", "Home Office"]).top_k(
+        "Department for Work and Pensions", 1
+    )
+
+
+def test_top_k_is_bounded_and_deterministic():
+    index = CandidateIndex(BUYERS)
+    assert len(index.top_k("zzz", 3)) == 3
+    assert index.top_k("zzz", 3) == BUYERS[:3]  # no signal: ties keep candidate order
+    assert index.top_k("Home Office", 100) == index.top_k("Home Office", len(BUYERS))
+    assert index.top_k("Home Office", 0) == []
+
+
+def test_shortlist_and_recall():
+    shortlists = shortlist_candidates(["Home Ofice", "DfT"], BUYERS, k=2)
+    assert [s[0] for s in shortlists] == ["Home Office", "Department for Transport"]
+    index = CandidateIndex(BUYERS)
+    assert (
+        recall_at_k(
+            index, ["Home Ofice", "Cabnet Office"], ["Home Office", "Cabinet Office"], 1
+        )
+        == 1.0
+    )
@@ -0,0 +1,200 @@
+import json
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+import utils
+from data_io import read_table
+from scripts.combine_data import aggregate_mi, combine_data, combine_data_partitioned
+from scripts.get_data import get_dummy_data
+
+API_MATCHES = {"DWP": "Department for Work and Pensions"}
+
+
+@pytest.fixture
+def dummy_dir(tmp_path, monkeypatch):
+    def fake_http_get(url: str, timeout_s: float = 60.0):
+        name = parse_qs(urlparse(url).query)["input_string"][0]
+        return 200, json.dumps({"match": API_MATCHES.get(name)})
+
+    monkeypatch.setenv("NAME_MATCH_API_ENDPOINT", "http://example.test/match")
+    monkeypatch.setattr(utils, "_http_get", fake_http_get)
+    get_dummy_data(str(tmp_path))
+    return tmp_path
+
+
+def _combine(directory):
+    return combine_data(
+        str(directory / "contracts.csv"),
+        str(directory / "mi.csv"),
+        str(directory / "reg_number_supplier_key.csv"),
+    )
+
+
+def test_combine_dummy_data(dummy_dir):
+    combined, unmatched = _combine(dummy_dir)
+
+    assert len(combined) == 17
+    assert combined["PairID"].value_counts()["1+buyer a"] == 6
+    # "BUYER B" joins case-insensitively, "DWP" through the matching API
+    assert (combined["PairID"] == "2+buyer b").sum() == 3
+    ai_rows = combined[combined["AIMatchedName"].notna()]
+    assert ai_rows["CustomerName"].tolist() == ["DWP"]
+    assert ai_rows["PairID"].tolist() == ["1+department for work and pensions"]
+    assert combined["EvidencedSpend"].sum() == pytest.approx(9e5)
+
+    assert unmatched["PairID"].tolist() == [
+        "3+buyer c ltd",
+        "1+dwp",
+        "99+buyer y",
+        "100+buyer z",
+        "<NA>+buyer z",
+        "1+buyer c limited",
+        "3+buyer c ltd",
+    ]
+    assert "_pair_key" not in combined.columns
+    assert list(combined.columns[13:16]) == ["SupplierKey_x", "PairID", "SupplierName"]
+    pd.testing.assert_index_equal(
+        unmatched.columns,
+        pd.Index([*pd.read_csv(dummy_dir / "mi.csv").columns, "PairID"]),
+    )
+
+
+def test_aggregate_mi_sums_spend_per_pair():
+    mi = pd.DataFrame(
+        {
+            "SupplierName": ["S1", "S1", "S2", "S1"],
+            "SupplierKey": pd.array([1, 1, 2, 1], dtype="Int64"),
+            "CustomerName": ["Buyer A", "Buyer A", "Buyer A", "Buyer B"],
+            "CustomerGroup": ["G", "G", None, "G"],
+            "FinancialYear": [2024, 2024, 2024, 2025],
+            "FinancialMonth": [1, 2, 1, 11],
+            "EvidencedSpend": [10.0, 5.0, 1.0, 2.0],
+        }
+    )
+
+    aggregated = aggregate_mi(mi, monthly_spend=True)
+
+    assert aggregated["CustomerName"].tolist() == ["Buyer A", "Buyer A", "Buyer B"]
+    assert aggregated["EvidencedSpend"].tolist() == [15.0, 1.0, 2.0]
+    assert aggregated["MIEntries"].tolist() == [2, 1, 1]
+    assert aggregated["CustomerGroup"].isna().tolist() == [False, True, False]
+    assert json.loads(aggregated["MonthlySpend"][0]) == {
+        "2024-01": 10.0,
+        "2024-02": 5.0,
+    }
+    assert json.loads(aggregated["MonthlySpend"][2]) == {"2025-11": 2.0}
+
+
+def test_pre_aggregated_combine_keeps_spend_per_pair(dummy_dir):
+    combined, unmatched = _combine(dummy_dir)
+    aggregated, unmatched_aggregated = combine_data(
+        str(dummy_dir / "contracts.csv"),
+        str(dummy_dir / "mi.csv"),
+        str(dummy_dir / "reg_number_supplier_key.csv"),
+        pre_aggregate=True,
+    )
+
+    assert len(aggregated) < len(combined)
+    spend = ["buyer", "suppliers", "contract_title"]
+    pd.testing.assert_series_equal(
+        aggregated.groupby(spend)["EvidencedSpend"].sum(),
+        combined.groupby(spend)["EvidencedSpend"].sum(),
+    )
+    assert aggregated["MIEntries"].sum() == combined["EvidencedSpend"].notna().sum()
+    # unmatched MI is still reported entry by entry
+    pd.testing.assert_frame_equal(unmatched_aggregated, unmatched)
+
+
+@pytest.mark.parametrize("data_format", ["csv", "parquet"])
+@pytest.mark.parametrize("pre_aggregate", [False, True])
+def test_partitioned_combine_matches_in_memory(dummy_dir, data_format, pre_aggregate):
+    combined, unmatched = combine_data(
+        str(dummy_dir / "contracts.csv"),
+        str(dummy_dir / "mi.csv"),
+        str(dummy_dir / "reg_number_supplier_key.csv"),
+        pre_aggregate=pre_aggregate,
+    )
+    rows = combine_data_partitioned(
+        str(dummy_dir / "contracts.csv"),
+        str(dummy_dir / "mi.csv"),
+        str(dummy_dir / "reg_number_supplier_key.csv"),
+        combined_path=str(dummy_dir / f"combined.{data_format}"),
+        unmatched_path=str(dummy_dir / f"unmatched.{data_format}"),
+        partitions=3,
+        chunksize=4,
+        spill_dir=str(dummy_dir),
+        pre_aggregate=pre_aggregate,
+    )
+
+    assert rows == (len(combined), len(unmatched))
+    combined_partitioned = read_table(
+        str(dummy_dir / f"combined.{data_format}"), "combined"
+    )
+    unmatched_partitioned = read_table(
+        str(dummy_dir / f"unmatched.{data_format}"), "unmatched"
+    )
+    # same rows, grouped by partition rather than in contract order
+    assert list(combined_partitioned.columns) == list(combined.columns)
+    assert sorted(combined_partitioned["PairID"]) == sorted(combined["PairID"])
+    assert combined_partitioned["EvidencedSpend"].sum() == pytest.approx(
+        combined["EvidencedSpend"].sum()
+    )
+    assert sorted(unmatched_partitioned["PairID"]) == sorted(unmatched["PairID"])
+    # the partition files are cleaned up
+    assert sorted(p.name for p in dummy_dir.iterdir() if p.is_dir()) == []
+
+
+def test_partitioned_combine_matches_each_name_once(dummy_dir, monkeypatch):
+    import scripts.combine_data as combine_module
+
+    matched = []
+
+    def fake_match_buyer_names(customers, buyer_names, **kwargs):
+        matched.append(customers)
+        return {}
+
+    monkeypatch.setattr(combine_module, "match_buyer_names", fake_match_buyer_names)
+    _combine(dummy_dir)
+    # with chunks of two rows, the unmatched "Buyer Z" is in two chunks
+    combine_data_partitioned(
+        str(dummy_dir / "contracts.csv"),
+        str(dummy_dir / "mi.csv"),
+        str(dummy_dir / "reg_number_supplier_key.csv"),
+        combined_path=str(dummy_dir / "combined.parquet"),
+        unmatched_path=str(dummy_dir / "unmatched.parquet"),
+        partitions=2,
+        chunksize=2,
+    )
+
+    in_memory, partitioned = matched
+    assert len(partitioned) == len(set(partitioned))
+    assert sorted(partitioned) == sorted(in_memory)
+
+
+def test_parallel_partitioned_combine_matches_sequential(dummy_dir):
+    paths = [
+        str(dummy_dir / "contracts.csv"),
+        str(dummy_dir / "mi.csv"),
+        str(dummy_dir / "reg_number_supplier_key.csv"),
+    ]
+    outputs = {}
+    for workers in (1, 2):
+        out = dummy_dir / f"workers_{workers}"
+        out.mkdir()
+        combine_data_partitioned(
+            *paths,
+            combined_path=str(out / "combined.parquet"),
+            unmatched_path=str(out / "unmatched.parquet"),
+            partitions=4,
+            workers=workers,
+        )
+        outputs[workers] = (
+            read_table(str(out / "combined.parquet"), "combined"),
+            read_table(str(out / "unmatched.parquet"), "unmatched"),
+        )
+
+    # results are appended in partition order, whichever worker finishes first
+    pd.testing.assert_frame_equal(outputs[2][0], outputs[1][0])
+    pd.testing.assert_frame_equal(outputs[2][1], outputs[1][1])
@@ -0,0 +1,86 @@
+import pandas as pd
+import pytest
+
+from data_io import TableWriter, iter_table, read_table, table_path, write_table
+
+
+@pytest.fixture
+def contracts():
+    return pd.DataFrame(
+        {
+            "buyer": ["Buyer A", None],
+            "SupplierCompanyRegistrationNumber": ["01234567", "SC123456"],
+            "contract_start": ["2024-01-01", "2024-06-30"],
+            "contract_months": [12, None],
+            "award_value": [1000, 2500.5],
+        }
+    )
+
+
+def test_table_path_rejects_unknown_format():
+    assert table_path("data/dummy", "mi", "parquet") == "data/dummy/mi.parquet"
+    with pytest.raises(ValueError):
+        table_path("data/dummy", "mi", "xlsx")
+
+
+@pytest.mark.parametrize("data_format", ["csv", "parquet"])
+def test_round_trip_applies_schema(contracts, tmp_path, data_format):
+    path = table_path(str(tmp_path), "contracts", data_format)
+    write_table(contracts, path)
+
+    df = read_table(path, "contracts")
+
+    # leading zeros survive because registration numbers are read as strings
+    assert df["SupplierCompanyRegistrationNumber"].tolist() == ["01234567", "SC123456"]
+    assert df["buyer"].isna().tolist() == [False, True]
+    assert pd.api.types.is_datetime64_any_dtype(df["contract_start"])
+    assert str(df["contract_months"].dtype) == "Int64"
+    assert df["award_value"].dtype == "float64"
+
+
+@pytest.mark.parametrize("data_format", ["csv", "parquet"])
+def test_read_table_prunes_columns(contracts, tmp_path, data_format):
+    path = table_path(str(tmp_path), "contracts", data_format)
+    write_table(contracts, path)
+
+    df = read_table(path, "contracts", columns=["buyer", "award_value"])
+
+    assert sorted(df.columns) == ["award_value", "buyer"]
+
+
+def test_table_writer_keeps_null_first_chunk_as_string(tmp_path):
+    path = str(tmp_path / "unmatched.parquet")
+    writer = TableWriter(path, "unmatched")
+    writer.write(pd.DataFrame({"CustomerName": [None], "EvidencedSpend": [1.0]}))
+    writer.write(pd.DataFrame({"CustomerName": ["Buyer B"], "EvidencedSpend": [2.0]}))
+    writer.close()
+
+    df = read_table(path, "unmatched")
+    assert df["CustomerName"].tolist() == [None, "Buyer B"]
+    assert writer.rows == 2
+
+
+@pytest.mark.parametrize("data_format", ["csv", "parquet"])
+def test_iter_table_reads_in_chunks(contracts, tmp_path, data_format):
+    path = table_path(str(tmp_path), "contracts", data_format)
+    write_table(contracts, path)
+
+    chunks = list(iter_table(path, "contracts", chunksize=1))
+
+    assert [len(c) for c in chunks] == [1, 1]
+    assert chunks[1]["SupplierCompanyRegistrationNumber"].tolist() == ["SC123456"]
+    assert str(chunks[1]["contract_months"].dtype) == "Int64"
+
+
+@pytest.mark.parametrize("data_format", ["csv", "parquet"])
+def test_iter_table_yields_empty_chunk_for_empty_table(
+    contracts, tmp_path, data_format
+):
+    path = table_path(str(tmp_path), "contracts", data_format)
+    write_table(contracts.iloc[:0], path)
+
+    chunks = list(iter_table(path, "contracts"))
+
+    assert len(chunks) == 1
+    assert chunks[0].empty
+    assert list(chunks[0].columns) == list(contracts.columns)
@@ -0,0 +1,123 @@
+from io import StringIO
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from data_io import read_table
+from scripts.get_data import (
+    extract_table,
+    extract_table_incremental,
+    generate_dummy_contracts_data,
+    generate_dummy_mi_data,
+)
+
+
+@pytest.fixture
+def mi_conn():
+    engine = create_engine("sqlite://")
+    mi = generate_dummy_mi_data().rename(columns={"CustomerGroup": "Group"})
+    mi.to_sql("AggregatedSpendReporting", engine, index=False)
+    with engine.connect() as conn:
+        yield conn, mi
+
+
+@pytest.mark.parametrize("chunksize", [None, 1, 5, 100])
+def test_extract_table_streams_in_chunks(mi_conn, tmp_path, chunksize):
+    conn, mi = mi_conn
+    path = str(tmp_path / "mi.csv")
+
+    rows = extract_table(
+        conn,
+        "SELECT * FROM AggregatedSpendReporting",
+        path,
+        rename={"Group": "CustomerGroup"},
+        chunksize=chunksize,
+    )
+
+    assert rows == len(mi)
+    expected = mi.rename(columns={"Group": "CustomerGroup"})
+    pd.testing.assert_frame_equal(
+        pd.read_csv(path), pd.read_csv(StringIO(expected.to_csv(index=False)))
+    )
+    assert not (tmp_path / "mi.csv.part").exists()
+
+
+@pytest.mark.parametrize("chunksize", [None, 3])
+def test_extract_table_to_parquet_applies_schema(mi_conn, tmp_path, chunksize):
+    conn, mi = mi_conn
+    path = str(tmp_path / "mi.parquet")
+
+    extract_table(
+        conn,
+        "SELECT * FROM AggregatedSpendReporting",
+        path,
+        table="mi",
+        rename={"Group": "CustomerGroup"},
+        chunksize=chunksize,
+    )
+
+    df = pd.read_parquet(path)
+    assert len(df) == len(mi)
+    assert str(df["SupplierKey"].dtype) == "Int64"
+    assert str(df["FinancialYear"].dtype) == "Int64"
+    assert df["EvidencedSpend"].dtype == "float64"
+
+
+def test_incremental_extract_matches_full_reload(tmp_path):
+    engine = create_engine("sqlite://")
+    mi = generate_dummy_mi_data().astype({"SupplierKey": float})
+    query = "SELECT * FROM AggregatedSpendReporting"
+    path = str(tmp_path / "mi.parquet")
+    with engine.connect() as conn:
+        mi[mi["FinancialMonth"] <= 6].to_sql(
+            "AggregatedSpendReporting", conn, index=False
+        )
+        _, watermark = extract_table_incremental(conn, query, path, table="mi")
+        assert watermark == {"FinancialYear": 2024, "FinancialMonth": 6}
+
+        # the latest month is revised and later months arrive
+        conn.execute(
+            text(
+                "UPDATE AggregatedSpendReporting SET EvidencedSpend = 5 WHERE FinancialMonth = 6"
+            )
+        )
+        mi[mi["FinancialMonth"] > 6].to_sql(
+            "AggregatedSpendReporting", conn, index=False, if_exists="append"
+        )
+        rows, watermark = extract_table_incremental(
+            conn, query, path, table="mi", watermark=watermark
+        )
+        full_path = str(tmp_path / "full.parquet")
+        extract_table(conn, query, full_path, table="mi")
+
+    assert rows == 7  # month 6 is re-fetched, months 7-12 are new
+    assert watermark == {"FinancialYear": 2024, "FinancialMonth": 12}
+    pd.testing.assert_frame_equal(read_table(path, "mi"), read_table(full_path, "mi"))
+    assert not (tmp_path / "mi.increment.parquet").exists()
+
+
+def test_incremental_extract_by_datetime_watermark(tmp_path):
+    engine = create_engine("sqlite://")
+    contracts = generate_dummy_contracts_data()
+    query = "SELECT * FROM contracts"
+    path = str(tmp_path / "contracts.csv")
+    cutoff = pd.Timestamp("2025-06-01")
+    with engine.connect() as conn:
+        contracts[contracts["awarded"] <= cutoff].to_sql("contracts", conn, index=False)
+        _, watermark = extract_table_incremental(conn, query, path, table="contracts")
+        assert watermark == {"awarded": cutoff.isoformat()}
+
+        contracts[contracts["awarded"] > cutoff].to_sql(
+            "contracts", conn, index=False, if_exists="append"
+        )
+        rows, watermark = extract_table_incremental(
+            conn, query, path, table="contracts", watermark=watermark
+        )
+
+    # the row awarded on the watermark date is re-fetched, not duplicated
+    assert rows == 1 + (contracts["awarded"] > cutoff).sum()
+    result = read_table(path, "contracts")
+    assert len(result) == len(contracts)
+    assert sorted(result["contract_title"]) == sorted(contracts["contract_title"])
+    assert watermark == {"awarded": contracts["awarded"].max().isoformat()}
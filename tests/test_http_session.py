@@ -0,0 +1,102 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import utils
+
+
+class _MatchHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        server = self.server
+        server.client_ports.add(self.client_address[1])
+        server.requests += 1
+        if server.requests <= server.fail_first:
+            status, body = 503, b"busy"
+        else:
+            status, body = 200, json.dumps({"match": "A"}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def match_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MatchHandler)
+    server.client_ports = set()
+    server.requests = 0
+    server.fail_first = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_session_reuses_connections(match_server, monkeypatch):
+    monkeypatch.setenv(
+        "MATCH_STRING_API_URL", f"http://127.0.0.1:{match_server.server_port}/match"
+    )
+    utils.configure_http_session(pool_size=1, retries=0)
+    utils.request_stats.reset()
+
+    for _ in range(5):
+        assert (
+            utils.match_string_via_api(input_string="a", list_of_strings=["A"]) == "A"
+        )
+
+    assert match_server.requests == 5
+    assert len(match_server.client_ports) == 1
+    assert utils.request_stats.summary()["requests"] == 5
+
+
+def test_session_retries_5xx_with_backoff(match_server, monkeypatch):
+    monkeypatch.setenv(
+        "MATCH_STRING_API_URL", f"http://127.0.0.1:{match_server.server_port}/match"
+    )
+    match_server.fail_first = 2
+    utils.configure_http_session(pool_size=1, retries=3, backoff_factor=0.01)
+    utils.request_stats.reset()
+
+    assert utils.match_string_via_api(input_string="a", list_of_strings=["A"]) == "A"
+
+    assert match_server.requests == 3
+    summary = utils.request_stats.summary()
+    assert (summary["requests"], summary["retries"], summary["errors"]) == (1, 2, 0)
+
+
+def test_session_raises_after_retries_exhausted(match_server, monkeypatch):
+    monkeypatch.setenv(
+        "MATCH_STRING_API_URL", f"http://127.0.0.1:{match_server.server_port}/match"
+    )
+    match_server.fail_first = 10
+    utils.configure_http_session(pool_size=1, retries=1, backoff_factor=0.01)
+
+    with pytest.raises(RuntimeError, match="Match API error 503: busy"):
+        utils.match_string_via_api(input_string="a", list_of_strings=["A"])
+    assert match_server.requests == 2
+
+
+def test_first_calls_from_many_threads_share_one_session(monkeypatch):
+    monkeypatch.setattr(utils, "_session", None)
+    barrier = threading.Barrier(8)
+    sessions = []
+
+    def first_call():
+        barrier.wait()
+        sessions.append(utils._get_session())
+
+    threads = [threading.Thread(target=first_call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(s) for s in sessions}) == 1
+    assert sessions[0] is utils._session
@@ -0,0 +1,94 @@
+import json
+import time
+from urllib.parse import urlparse, parse_qs
+
+import utils
+from match_cache import MatchCache, cached_match_strings_via_api, sha256_candidates
+
+
+def _counting_http_get(calls):
+    def _fake_http_get(url: str, timeout_s: float = 60.0):
+        name = parse_qs(urlparse(url).query)["input_string"][0]
+        calls.append(name)
+        return 200, json.dumps(
+            {"input_string": name, "match": "A" if name == "a" else None}
+        )
+
+    return _fake_http_get
+
+
+def test_cached_match_only_calls_api_for_new_names(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setenv("MATCH_STRING_API_URL", "http://example.test/match")
+    monkeypatch.setattr(utils, "_http_get", _counting_http_get(calls))
+
+    with MatchCache(str(tmp_path / "cache.sqlite")) as cache:
+        out = cached_match_strings_via_api(["a", "b"], ["A", "B"], cache=cache)
+        assert out == ["A", "None"]
+        assert sorted(calls) == ["a", "b"]
+
+    # a fresh process reusing the same file only pays for the new name
+    calls.clear()
+    with MatchCache(str(tmp_path / "cache.sqlite")) as cache:
+        out = cached_match_strings_via_api(["b", "c", "a"], ["A", "B"], cache=cache)
+        assert out == ["None", "None", "A"]
+        assert calls == ["c"]
+        assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_cache_key_includes_candidates_and_prompt(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setenv("MATCH_STRING_API_URL", "http://example.test/match")
+    monkeypatch.setattr(utils, "_http_get", _counting_http_get(calls))
+    prompt = tmp_path / "prompt.txt"
+    prompt.write_text("v1")
+
+    with MatchCache(str(tmp_path / "cache.sqlite")) as cache:
+        cached_match_strings_via_api(
+            ["a"], ["A", "B"], cache=cache, prompt_path=str(prompt)
+        )
+        cached_match_strings_via_api(
+            ["a"], ["A", "C"], cache=cache, prompt_path=str(prompt)
+        )
+        prompt.write_text("v2")
+        cached_match_strings_via_api(
+            ["a"], ["A", "B"], cache=cache, prompt_path=str(prompt)
+        )
+    assert calls == ["a", "a", "a"]
+
+
+def test_cache_key_includes_endpoint(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(utils, "_http_get", _counting_http_get(calls))
+
+    with MatchCache(str(tmp_path / "cache.sqlite")) as cache:
+        monkeypatch.setenv("MATCH_STRING_API_URL", "http://example.test/match")
+        cached_match_strings_via_api(["a"], ["A", "B"], cache=cache)
+        # a different matcher, or the same one asked for another model, is asked again
+        monkeypatch.setenv("MATCH_STRING_API_URL", "http://matcher-v2.test/match")
+        cached_match_strings_via_api(["a"], ["A", "B"], cache=cache)
+        cached_match_strings_via_api(
+            ["a"], ["A", "B"], cache=cache, extra_query_params={"model": "large"}
+        )
+        cached_match_strings_via_api(
+            ["a"], ["A", "B"], cache=cache, api_url="http://matcher-v2.test/match"
+        )
+    assert calls == ["a", "a", "a"]
+
+
+def test_cache_evicts_least_recently_used_and_expired(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    sha = sha256_candidates(["A"])
+    with MatchCache(path, max_entries=2) as cache:
+        for name in ["x", "y", "z"]:
+            cache.set_many({name: "None"}, sha, "")
+            time.sleep(0.01)
+        # writes don't evict; the least recently used go when the cache is closed
+        assert len(cache) == 3
+
+    with MatchCache(path, max_entries=2) as cache:
+        assert len(cache) == 2
+        assert cache.get_many(["x", "y", "z"], sha, "") == {"y": "None", "z": "None"}
+
+    with MatchCache(path, max_age_days=0) as cache:
+        assert len(cache) == 0
@@ -1,4 +1,5 @@
 import json
+import threading
 from urllib.parse import urlparse, parse_qs
 
 import pytest
@@ -72,3 +73,144 @@ def test_match_string_via_api_propagates_http_errors(monkeypatch):
     with pytest.raises(RuntimeError, match="Match API error 500: boom"):
         utils.match_string_via_api(input_string="X", list_of_strings=["A", "B"])
 
+
+
+def test_match_strings_via_api_preserves_input_order(monkeypatch):
+    import time
+
+    def _fake_http_get(url: str, timeout_s: float = 60.0):
+        name = parse_qs(urlparse(url).query)["input_string"][0]
+        # later inputs finish first, so completion order differs from input order
+        time.sleep(0.01 * (5 - int(name[-1])))
+        match = {"in 1": "A", "in 2": "Not a candidate", "in 3": "B"}.get(name)
+        return 200, json.dumps({"input_string": name, "match": match, "raw": ""})
+
+    monkeypatch.setenv("MATCH_STRING_API_URL", "http://example.test/match")
+    monkeypatch.setattr(utils, "_http_get", _fake_http_get)
+
+    out = utils.match_strings_via_api(
+        inputs=["in 1", "in 2", "in 3", "in 4"],
+        list_of_strings=["A", "B"],
+        max_workers=4,
+    )
+    assert out == ["A", "None", "B", "None"]
+
+
+def test_match_strings_via_api_propagates_errors(monkeypatch):
+    def _fake_http_get(url: str, timeout_s: float = 60.0):
+        return 500, "internal error"
+
+    monkeypatch.setenv("MATCH_STRING_API_URL", "http://example.test/match")
+    monkeypatch.setattr(utils, "_http_get", _fake_http_get)
+
+    with pytest.raises(RuntimeError, match="Match API returned status 500"):
+        utils.match_strings_via_api(inputs=["X", "Y"], list_of_strings=["A", "B"], max_workers=2)
+
+
+def test_match_string_via_api_post_transport_sends_json_body(monkeypatch):
+    def _fake_http_get(url: str, timeout_s: float = 60.0):
+        raise AssertionError("GET should not be used with the post transport")
+
+    def _fake_http_post_json(url: str, payload, timeout_s: float = 60.0):
+        assert url == "http://example.test/match"
+        assert payload == {
+            "input_string": "Home Office",
+            "candidates": ["Cabinet Office", "HM Treasury"],
+            "prompt_path": "prompts/buyer_match_v1.txt",
+        }
+        return 200, json.dumps({"input_string": "Home Office", "match": "HM Treasury"})
+
+    monkeypatch.setenv("MATCH_STRING_API_URL", "http://example.test/match")
+    monkeypatch.setenv("MATCH_STRING_API_TRANSPORT", "post")
+    monkeypatch.setattr(utils, "_http_get", _fake_http_get)
+    monkeypatch.setattr(utils, "_http_post_json", _fake_http_post_json)
+
+    out = utils.match_string_via_api(
+        input_string="Home Office",
+        list_of_strings=["Home Office", "Cabinet Office", "HM Treasury"],
+        prompt_path="prompts/buyer_match_v1.txt",
+    )
+    assert out == "HM Treasury"
+
+
+def test_match_strings_via_api_registers_candidate_set_once(monkeypatch):
+    posts = []
+
+    def _fake_http_post_json(url: str, payload, timeout_s: float = 60.0):
+        posts.append((url, payload))
+        if url.endswith("/candidate_sets"):
+            return 200, json.dumps({"candidate_set_id": "set-1"})
+        assert "candidates" not in payload
+        assert payload["candidate_set_id"] == "set-1"
+        return 200, json.dumps({"match": "A" if payload["input_string"] == "a" else None})
+
+    monkeypatch.setenv("MATCH_STRING_API_URL", "http://example.test/match")
+    monkeypatch.setattr(utils, "_http_post_json", _fake_http_post_json)
+    monkeypatch.setattr(utils, "_registered_candidate_sets", {})
+
+    out = utils.match_strings_via_api(
+        inputs=["a", "b", "c"],
+        list_of_strings=["A", "B"],
+        transport="post_candidate_set",
+        max_workers=3,
+    )
+    assert out == ["A", "None", "None"]
+    registrations = [p for u, p in posts if u == "http://example.test/candidate_sets"]
+    assert registrations == [
+        {"candidate_set_id": utils.sha256_candidates(["A", "B"]), "candidates": ["A", "B"]}
+    ]
+    assert len(posts) == 4
+
+
+def test_match_string_via_api_rejects_unknown_transport(monkeypatch):
+    monkeypatch.setenv("MATCH_STRING_API_URL", "http://example.test/match")
+    with pytest.raises(ValueError, match="Unknown match API transport"):
+        utils.match_string_via_api(input_string="X", list_of_strings=["A"], transport="ftp")
+
+
+def test_match_strings_via_api_uses_per_input_candidate_lists(monkeypatch):
+    def _fake_http_get(url: str, timeout_s: float = 60.0):
+        qs = parse_qs(urlparse(url).query)
+        # reply with the first candidate each input was given
+        return 200, json.dumps({"match": qs["candidates"][0]})
+
+    monkeypatch.setenv("MATCH_STRING_API_URL", "http://example.test/match")
+    monkeypatch.setattr(utils, "_http_get", _fake_http_get)
+
+    out = utils.match_strings_via_api(
+        inputs=["x", "y"],
+        list_of_strings=["A", "B", "C"],
+        candidate_lists=[["B"], ["C", "A"]],
+    )
+    assert out == ["B", "C"]
+
+
+def test_register_candidate_set_does_not_hold_lock_during_upload(monkeypatch):
+    slow_upload_started = threading.Event()
+    release_slow_upload = threading.Event()
+
+    def _fake_http_post_json(url: str, payload, timeout_s: float = 60.0):
+        if payload["candidates"] == ["slow"]:
+            slow_upload_started.set()
+            release_slow_upload.wait(timeout=5)
+        return 200, json.dumps({})
+
+    monkeypatch.setenv("MATCH_STRING_API_URL", "http://example.test/match")
+    monkeypatch.setattr(utils, "_http_post_json", _fake_http_post_json)
+    monkeypatch.setattr(utils, "_registered_candidate_sets", {})
+
+    slow = threading.Thread(target=utils.register_candidate_set, args=(["slow"],))
+    slow.start()
+    assert slow_upload_started.wait(timeout=5)
+    # another set registers while the first upload is still waiting on the server
+    fast = threading.Thread(target=utils.register_candidate_set, args=(["fast"],))
+    fast.start()
+    fast.join(timeout=2)
+    assert not fast.is_alive()
+    release_slow_upload.set()
+    slow.join()
+
+    assert set(utils._registered_candidate_sets.values()) == {
+        utils.sha256_candidates(["slow"]),
+        utils.sha256_candidates(["fast"]),
+    }
@@ -0,0 +1,56 @@
+from name_normalisation import CanonicalNameIndex, canonical_name, name_keys
+
+BUYERS = [
+    "Department for Business and Trade",
+    "Transport for London",
+    "Buyer C Limited",
+    "Buyer C LTD",
+    "Deloitte LLP",
+    "Deloitte Limited",
+    "Home Office",
+]
+
+
+def test_canonical_name():
+    assert canonical_name("Accenture (UK) Ltd.") == "accenture uk limited"
+    assert canonical_name("HM Revenue & Customs") == "hm revenue and customs"
+    assert canonical_name("The  Royal Parks") == "royal parks"
+
+
+def test_name_keys():
+    keys = name_keys("Transport for London (TfL) Ltd")
+    assert keys["canonical"] == "transport for london tfl limited"
+    assert keys["brackets"] == "transport for london limited"
+    assert keys["legal_suffix"] == "transport for london"
+
+
+def test_resolve_by_tier():
+    index = CanonicalNameIndex(BUYERS)
+    assert index.resolve("DEPARTMENT FOR BUSINESS & TRADE") == (
+        "Department for Business and Trade",
+        "canonical",
+    )
+    assert index.resolve("Transport for London (TfL)") == (
+        "Transport for London",
+        "brackets",
+    )
+    assert index.resolve("Transport for London Limited") == (
+        "Transport for London",
+        "legal_suffix",
+    )
+    # spelling variants of one buyer resolve to the first seen
+    assert index.resolve("buyer c ltd.") == ("Buyer C Limited", "canonical")
+
+
+def test_ambiguous_and_unknown_names_are_left_for_the_api():
+    index = CanonicalNameIndex(BUYERS)
+    # "Deloitte" could be either Deloitte LLP or Deloitte Limited
+    assert index.resolve("Deloitte") == (None, None)
+    assert index.resolve("DWP") == (None, None)
+
+    resolved, unresolved, per_tier = index.resolve_many(
+        ["Home office", "Deloitte", "DWP"]
+    )
+    assert resolved == {"Home office": "Home Office"}
+    assert unresolved == ["Deloitte", "DWP"]
+    assert per_tier == {"canonical": 1}
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from pair_keys import MISSING_NAME, NO_MATCH, PairKeyEncoder, pair_ids
+
+
+def test_keys_are_equal_exactly_when_pair_ids_are():
+    contracts_keys = pd.Series([1, 1, 2, None], dtype="Int64")
+    buyers = pd.Series(["Buyer A", "Buyer B", "buyer a", "Buyer A"])
+    encoder = PairKeyEncoder(contracts_keys, buyers)
+
+    mi_keys = pd.Series(["1", "1.0", "2", None, "3", "1", "1"], dtype=object)
+    names = pd.Series(
+        ["BUYER A", "buyer b", "Buyer A", "Buyer A", "Buyer A", "Buyer Z", None]
+    )
+    keys = encoder.encode(pd.to_numeric(mi_keys), names)
+    contract_keys = encoder.encode(contracts_keys, buyers)
+
+    ids = pair_ids(pd.to_numeric(mi_keys), names)
+    contract_ids = pair_ids(contracts_keys, buyers)
+    for key, pair_id in zip(keys, ids):
+        if isinstance(pair_id, str) and pair_id in set(contract_ids):
+            assert key == contract_keys[list(contract_ids).index(pair_id)]
+        else:
+            assert key in (NO_MATCH, MISSING_NAME)
+    assert keys[-1] == MISSING_NAME
+    assert keys[4] == NO_MATCH  # unknown SupplierKey
+    assert keys[5] == NO_MATCH  # unknown buyer
+
+
+def test_all_missing_names():
+    encoder = PairKeyEncoder(pd.Series([1], dtype="Int64"), pd.Series(["Buyer A"]))
+    keys = encoder.encode(pd.Series([1, 1], dtype="Int64"), pd.Series([None, np.nan]))
+    assert keys.tolist() == [MISSING_NAME, MISSING_NAME]
@@ -0,0 +1,92 @@
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+
+import utils
+from evaluation.evaluate_buyer_matching_mlflow import (
+    collect_benchmark_rows,
+    pool_timing,
+    predict_benchmark_rows,
+    submit_benchmark_rows,
+)
+
+BENCHMARK = pd.DataFrame(
+    {
+        "Input Name": [
+            "Home Ofice",
+            "DWP",
+            "Ministry of Defnce",
+            "Not a buyer",
+            "Cabinet Ofice",
+        ],
+        "Match Option": [
+            "Home Office",
+            "Department for Work and Pensions",
+            "Ministry of Defence",
+            "N/A",
+            "Cabinet Office",
+        ],
+        "Error Type": [
+            "Typo",
+            "Acronym",
+            "Typo",
+            "Negative control - no match",
+            "Typo",
+        ],
+        "Entity Type": ["Buyer"] * 5,
+    }
+)
+
+
+def _fake_http_get(url: str, timeout_s: float = 60.0):
+    qs = parse_qs(urlparse(url).query)
+    # random latency so completion order differs from submission order
+    time.sleep(random.uniform(0, 0.02))
+    return 200, json.dumps({"match": qs["candidates"][0]})
+
+
+def test_parallel_predictions_match_serial(monkeypatch):
+    monkeypatch.setenv("MATCH_STRING_API_URL", "http://example.test/match")
+    monkeypatch.setattr(utils, "_http_get", _fake_http_get)
+
+    serial = predict_benchmark_rows(
+        BENCHMARK, "prompts/buyer_match_v1.txt", num_distractors=2, max_workers=1
+    )
+    parallel = predict_benchmark_rows(
+        BENCHMARK, "prompts/buyer_match_v1.txt", num_distractors=2, max_workers=5
+    )
+
+    assert parallel["rows"] == serial["rows"]
+    assert [r["input_name"] for r in parallel["rows"]] == BENCHMARK[
+        "Input Name"
+    ].tolist()
+    assert len(parallel["latencies_s"]) == len(BENCHMARK)
+    assert parallel["wall_clock_s"] > 0
+
+
+def test_shared_pool_times_each_prompt_from_its_own_rows(monkeypatch):
+    def _slow_http_get(url: str, timeout_s: float = 60.0):
+        qs = parse_qs(urlparse(url).query)
+        time.sleep(0.03)
+        return 200, json.dumps({"match": qs["candidates"][0]})
+
+    monkeypatch.setenv("MATCH_STRING_API_URL", "http://example.test/match")
+    monkeypatch.setattr(utils, "_http_get", _slow_http_get)
+
+    # two prompts queued in one single-worker pool, as in main()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        submitted = [
+            submit_benchmark_rows(BENCHMARK, prompt, executor, num_distractors=2)
+            for prompt in ["prompts/buyer_match_v1.txt", "prompts/buyer_match_v2.txt"]
+        ]
+        first, second = [collect_benchmark_rows(s) for s in submitted]
+
+    # the second prompt's rows waited behind the first's, but that wait isn't counted
+    assert second["wall_clock_s"] < 1.5 * first["wall_clock_s"]
+    pool = pool_timing([first, second])
+    assert pool["pool_rows"] == 2 * len(BENCHMARK)
+    assert pool["pool_wall_clock_s"] >= first["wall_clock_s"] + second["wall_clock_s"]
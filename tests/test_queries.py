@@ -0,0 +1,106 @@
+import pandas as pd
+import pytest
+
+from data_io import read_table, table_path
+from queries import (
+    bind,
+    contracts_query,
+    customer_groups_from_mi_query,
+    customer_groups_from_sf_query,
+    framework_filter,
+    mi_query,
+)
+from scripts.get_data import (
+    build_sqlite_standin,
+    generate_dummy_contracts_data,
+    generate_dummy_mi_data,
+    get_live_data,
+)
+
+MI_TABLES = ["MI_RM155713", "MI_RM155714", "MI_RM155714L4"]
+
+
+@pytest.fixture(scope="module")
+def standin(tmp_path_factory):
+    engine = build_sqlite_standin(
+        str(tmp_path_factory.mktemp("standin")), mi_tables=MI_TABLES
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_framework_filter_binds_prefixes():
+    sql, params = framework_filter("t1.framework_title", ["RM1557.13", "RM1557.14"])
+    assert (
+        sql
+        == "(t1.framework_title LIKE :framework_0 OR t1.framework_title LIKE :framework_1)"
+    )
+    assert params == {"framework_0": "RM1557.13%", "framework_1": "RM1557.14%"}
+    with pytest.raises(ValueError):
+        framework_filter("t1.framework_title", [])
+
+
+def test_invalid_identifiers_and_dialects_are_rejected():
+    with pytest.raises(ValueError):
+        customer_groups_from_mi_query(["MI_RM155713; DROP TABLE x"])
+    with pytest.raises(ValueError):
+        contracts_query(["RM1557.13"], dialect="postgresql")
+
+
+def test_contracts_query_filters_frameworks(standin):
+    with standin.connect() as conn:
+        all_frameworks = pd.read_sql(
+            bind(*contracts_query(["RM1557.1"], dialect="sqlite")), conn
+        )
+        one_framework = pd.read_sql(
+            bind(*contracts_query(["RM1557.10"], dialect="sqlite")), conn
+        )
+
+    dummy = generate_dummy_contracts_data()
+    # the contract on another framework and the unknown supplier id are dropped
+    assert all_frameworks["contract_title"].tolist() == dummy["contract_title"].tolist()
+    assert (
+        all_frameworks["company_number"].tolist()
+        == dummy["SupplierCompanyRegistrationNumber"].astype(str).tolist()
+    )
+    assert set(one_framework["framework_title"]) == {"RM1557.10 G-Cloud"}
+
+
+def test_mi_query_filters_framework(standin):
+    with standin.connect() as conn:
+        mi = pd.read_sql(bind(*mi_query()), conn)
+    assert len(mi) == len(generate_dummy_mi_data())
+
+
+def test_customer_groups_are_deduplicated_on_the_server(standin):
+    with standin.connect() as conn:
+        from_mi = pd.read_sql(bind(*customer_groups_from_mi_query(MI_TABLES)), conn)
+        from_sf = pd.read_sql(bind(*customer_groups_from_sf_query()), conn)
+
+    expected = (
+        generate_dummy_mi_data()[["CustomerName", "CustomerGroup"]]
+        .drop_duplicates()
+        .sort_values("CustomerName")
+        .reset_index(drop=True)
+    )
+    for result in (from_mi, from_sf):
+        pd.testing.assert_frame_equal(
+            result.sort_values("CustomerName").reset_index(drop=True), expected
+        )
+
+
+def test_get_live_data_against_standin(standin, tmp_path):
+    get_live_data(str(tmp_path), data_format="parquet", engine=standin)
+
+    contracts = read_table(
+        table_path(str(tmp_path), "contracts", "parquet"), "contracts"
+    )
+    mi = read_table(table_path(str(tmp_path), "mi", "parquet"), "mi")
+    dummy_contracts = generate_dummy_contracts_data()
+    assert (
+        contracts["SupplierCompanyRegistrationNumber"].tolist()
+        == dummy_contracts["SupplierCompanyRegistrationNumber"].astype(str).tolist()
+    )
+    assert mi["CustomerGroup"].notna().all()
+    assert len(mi) == len(generate_dummy_mi_data())
+    assert (tmp_path / "watermarks.json").exists()
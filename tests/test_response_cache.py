@@ -0,0 +1,71 @@
+import gzip
+import json
+
+import response_cache
+from response_cache import CachedJSON, JSONResponseCache, accepted_encodings
+
+PAYLOAD = {
+    "suppliers": [{"name": f"Supplier {i}", "status": "red"} for i in range(100)]
+}
+
+
+def test_accepted_encodings_respects_q_values(monkeypatch):
+    monkeypatch.setattr(response_cache, "brotli", None)
+    assert accepted_encodings("gzip, deflate, br") == ["gzip", "identity"]
+    assert accepted_encodings("gzip;q=0, br") == ["identity"]
+    assert accepted_encodings("*") == ["gzip", "identity"]
+    assert accepted_encodings(None) == ["identity"]
+
+
+def test_gzip_response_and_304_for_any_variant_etag(monkeypatch):
+    monkeypatch.setattr(response_cache, "brotli", None)
+    cached = CachedJSON(PAYLOAD)
+
+    status, body, headers = cached.respond("gzip")
+    assert status == 200
+    assert headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(body)) == PAYLOAD
+    assert headers["ETag"] == cached.etag("gzip") != cached.etag("identity")
+
+    for tag in [headers["ETag"], cached.etag("identity"), f"W/{cached.etag()}", "*"]:
+        status, body, _ = cached.respond("gzip", if_none_match=tag)
+        assert (status, body) == (304, b"")
+    assert cached.respond("gzip", if_none_match='"other"')[0] == 200
+
+    status, body, headers = cached.respond(None)
+    assert json.loads(body) == PAYLOAD and "Content-Encoding" not in headers
+
+
+def test_brotli_preferred_when_available(monkeypatch):
+    class FakeBrotli:
+        @staticmethod
+        def compress(data, quality):
+            return b"br:" + data
+
+    monkeypatch.setattr(response_cache, "brotli", FakeBrotli)
+    status, body, headers = CachedJSON(PAYLOAD).respond("gzip, br")
+    assert headers["Content-Encoding"] == "br"
+    assert body.startswith(b"br:")
+
+
+def test_small_bodies_are_not_compressed():
+    status, body, headers = CachedJSON({"a": 1}).respond("gzip")
+    assert body == b'{"a":1}' and "Content-Encoding" not in headers
+
+
+def test_cache_serialises_once_and_evicts_least_recently_used():
+    cache = JSONResponseCache(max_entries=2)
+    builds = []
+
+    def build(key):
+        return lambda: builds.append(key) or {"key": key}
+
+    first = cache.get("a", build("a"))
+    assert cache.get("a", build("a")) is first
+    cache.get("b", build("b"))
+    cache.get("a", build("a"))
+    cache.get("c", build("c"))  # evicts b
+    cache.get("b", build("b"))
+
+    assert builds == ["a", "b", "c", "b"]
+    assert (cache.hits, cache.misses) == (2, 4)
@@ -0,0 +1,94 @@
+import random
+from difflib import SequenceMatcher
+from pathlib import Path
+
+import pandas as pd
+
+from evaluation.mock_langchain_model import MockChatModelWithCandidates
+from evaluation.similarity import SimilarityEngine
+
+BENCHMARK = (
+    Path(__file__).resolve().parents[1]
+    / "benchmark_data"
+    / "ccs_combined_buyer_supplier_benchmark.csv"
+)
+
+
+def _reference_invoke(candidates, input_name, threshold):
+    """The original linear SequenceMatcher scan from MockChatModelWithCandidates."""
+    best = None
+    best_score = 0.0
+    for c in candidates:
+        score = SequenceMatcher(None, input_name.lower(), str(c).lower()).ratio()
+        if score > best_score:
+            best_score = score
+            best = c
+    if best is None or best_score < threshold:
+        return "None"
+    return str(best)
+
+
+def _msg(content):
+    return type("M", (), {"content": content})()
+
+
+def test_mock_model_matches_sequence_matcher_on_benchmark():
+    df = pd.read_csv(BENCHMARK).fillna("")
+    candidates = sorted(set(df["Match Option"].astype(str)) - {"", "N/A"})
+    models = {
+        t: MockChatModelWithCandidates(candidates=candidates, similarity_threshold=t)
+        for t in (0.0, 0.5, 0.85, 1.0)
+    }
+    for name in df["Input Name"].astype(str):
+        scores = [
+            SequenceMatcher(None, name.lower(), c.lower()).ratio() for c in candidates
+        ]
+        best_score = max(scores)
+        for threshold, model in models.items():
+            expected = "None"
+            if best_score > 0.0 and best_score >= threshold:
+                expected = candidates[scores.index(best_score)]
+            assert model.invoke([_msg("system"), _msg(name)]).content == expected, (
+                name,
+                threshold,
+            )
+
+
+def test_best_match_matches_sequence_matcher_on_random_strings():
+    rng = random.Random(0)
+    alphabet = "abcAB &()-"
+
+    def rand_str():
+        return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+
+    for _ in range(200):
+        candidates = [rand_str() for _ in range(rng.randint(1, 30))]
+        # duplicates and near-duplicates exercise tie-breaking
+        candidates += rng.sample(candidates, k=min(3, len(candidates)))
+        query = rand_str()
+        engine = SimilarityEngine(candidates)
+        idx, score = engine.best_match(query)
+
+        scores = [
+            SequenceMatcher(None, query.lower(), c.lower()).ratio() for c in candidates
+        ]
+        best_score = max(scores)
+        if best_score == 0.0:
+            assert idx is None
+        else:
+            assert (idx, score) == (scores.index(best_score), best_score)
+        for threshold in (0.3, 0.7):
+            model = MockChatModelWithCandidates(
+                candidates=candidates, similarity_threshold=threshold
+            )
+            assert model.invoke([_msg(query)]).content == _reference_invoke(
+                candidates, query.strip(), threshold
+            )
+
+
+def test_upper_bounds_equal_quick_ratio():
+    candidates = ["Home Office", "Cabinet Office", "", "HM Treasury"]
+    engine = SimilarityEngine(candidates)
+    bounds = engine.upper_bounds("home ofice")
+    for c, b in zip(candidates, bounds):
+        assert b == SequenceMatcher(None, "home ofice", c.lower()).quick_ratio()
@@ -0,0 +1,94 @@
+import pandas as pd
+import pytest
+
+from scripts.summarise_data import summarise
+
+NOW = pd.Timestamp("2025-06-15")
+
+
+@pytest.fixture
+def combined():
+    return pd.DataFrame(
+        {
+            "buyer": ["Buyer A", "Buyer A", "Buyer A", "Buyer B", "Buyer B", None],
+            "suppliers": ["S1", "S1", "S1", "S1", "S2", "S1"],
+            "award_value": [100.0, 200.0, 200.0, 50.0, 75.0, 10.0],
+            "contract_start": pd.to_datetime(
+                [
+                    "2023-01-01",
+                    "2024-01-01",
+                    "2024-01-01",
+                    "2022-01-01",
+                    "2025-05-01",
+                    "2024-01-01",
+                ]
+            ),
+            "contract_end": pd.to_datetime(
+                [
+                    "2024-01-01",
+                    "2026-01-01",
+                    "2026-01-01",
+                    "2023-01-01",
+                    "2027-01-01",
+                    "2026-01-01",
+                ]
+            ),
+            "contract_months": pd.array([12, 24, 24, 12, 20, 24], dtype="Int64"),
+            "CustomerGroup": [None, None, "Central Government", None, None, "G"],
+            "awarded": pd.to_datetime(["2023-01-01"] * 6),
+            "EvidencedSpend": [999.0, 10.0, 5.0, 0.0, None, 1.0],
+            "contract_title": ["old", "new", "new", "b", "c", "x"],
+            "contract_description": "d",
+            "framework_title": "RM1557.13",
+            "source": "s",
+            "latest_employees": pd.array([1, 2, 2, 3, 4, 5], dtype="Int64"),
+        }
+    )
+
+
+def test_summarise_uses_most_recent_contract_per_pair(combined):
+    _, line_level = summarise(
+        pd.DataFrame({"buyer": ["Buyer A"]}),
+        combined,
+        pd.DataFrame({"SupplierName": [], "CustomerName": []}),
+        now=NOW,
+    )
+
+    # sorted by pair; the row without a buyer belongs to no pair
+    assert line_level[["Contracting Authority", "Supplier"]].values.tolist() == [
+        ["Buyer A", "S1"],
+        ["Buyer B", "S1"],
+        ["Buyer B", "S2"],
+    ]
+    buyer_a = line_level.iloc[0]
+    # spend from both rows of the 2024 contract only
+    assert buyer_a["EvidencedSpend"] == 15.0
+    assert buyer_a["contract_title"] == "new"
+    # the first recent row with a customer group
+    assert buyer_a["Customer Group"] == "Central Government"
+    assert line_level["EvidencedSpend"].tolist() == [15.0, 0.0, 0.0]
+    assert line_level["Total Months Run So Far"].tolist() == [17, 41, 1]
+    assert line_level["Expired"].tolist() == [False, True, False]
+
+
+def test_summarise_statistics(combined):
+    summary_stats, _ = summarise(
+        pd.DataFrame({"buyer": ["Buyer A", "Buyer B", "Buyer C"]}),
+        combined,
+        pd.DataFrame(
+            {"SupplierName": ["S1", "S1", "S3"], "CustomerName": ["X", "Y", "Y"]}
+        ),
+        now=NOW,
+    )
+
+    assert dict(zip(summary_stats["Summary Statistic"], summary_stats["Value"])) == {
+        "Total Contracts": 3,
+        "Total Contracts with Supplier Key": 3,
+        "Unmatched MI Entries": 3,
+        "Unique Unmatched Suppliers": 2,
+        "Unique Unmatched Buyers": 2,
+        "Total Contracts with Spend": 1,
+        "Total Contracts No Spend and Expired": 1,
+        # Buyer B - S2 started a month ago, so isn't flagged yet
+        "Total Contracts No Spend and Running >3 Months": 0,
+    }
@@ -0,0 +1,266 @@
+import datetime as dt
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from supplier_store import SupplierStore, read_suppliers
+
+TODAY = dt.date(2025, 6, 15)
+
+
+@pytest.fixture
+def suppliers_csv(tmp_path):
+    path = tmp_path / "suppliers.csv"
+    pd.DataFrame(
+        {
+            "framework": ["F2", "F1", "F2"],
+            "name": ["S1", "S2", "S3"],
+            "buyer_name": ["A", "B", "C"],
+            "contract_value": [100, 200, 300],
+            "contract_start": ["2024-01-10", "2020-03-01", "2025-05-20"],
+            "contract_end": ["2026-01-10", "2022-03-01", "2027-05-20"],
+            "reported_spend": [0, 5, 0],
+            "color": ["red", "green", "red"],
+        }
+    ).to_csv(path, index=False)
+    return path
+
+
+def test_suppliers_grouped_by_framework_with_months_run(suppliers_csv):
+    store = SupplierStore(str(suppliers_csv))
+
+    assert store.frameworks == ["F1", "F2"]
+    assert store.suppliers("F2", TODAY) == [
+        {
+            "framework": "F2",
+            "name": "S1",
+            "details": {
+                "Buyer name": "A",
+                "Contract value": 100,
+                "Contract start": "2024-01-10",
+                "Contract end": "2026-01-10",
+                "Reported spend": 0,
+                # still running: months to today
+                "Months Run So Far": 17,
+            },
+        },
+        {
+            "framework": "F2",
+            "name": "S3",
+            "details": {
+                "Buyer name": "C",
+                "Contract value": 300,
+                "Contract start": "2025-05-20",
+                "Contract end": "2027-05-20",
+                "Reported spend": 0,
+                "Months Run So Far": 1,
+            },
+        },
+    ]
+    # ended: months to the contract end
+    assert store.suppliers("F1", TODAY)[0]["details"]["Months Run So Far"] == 24
+    # months run moves on with the date
+    assert (
+        store.suppliers("F2", dt.date(2025, 8, 1))[1]["details"]["Months Run So Far"]
+        == 3
+    )
+    assert store.suppliers("missing", TODAY) == []
+
+
+def test_reads_line_level_output(tmp_path):
+    path = tmp_path / "line_level.csv"
+    pd.DataFrame(
+        {
+            "Contracting Authority": ["Buyer A"],
+            "Supplier": ["S1"],
+            "Award Value": [None],
+            "EvidencedSpend": [12.5],
+            "Contract Start Date": ["2024-01-01"],
+            "Contract End Date": ["2025-01-01"],
+            "framework_title": ["RM1557.13"],
+            "Customer Group": ["Health"],
+        }
+    ).to_csv(path, index=False)
+
+    df = read_suppliers(str(path))
+    supplier = SupplierStore(str(path)).suppliers("RM1557.13", TODAY)[0]
+
+    assert df["customer_group"].tolist() == ["Health"]
+    assert supplier["name"] == "S1"
+    assert supplier["details"]["Contract value"] is None
+    assert supplier["details"]["Reported spend"] == 12.5
+    assert supplier["details"]["Months Run So Far"] == 12
+
+
+def test_reloads_when_file_changes(suppliers_csv):
+    store = SupplierStore(str(suppliers_csv), check_interval=0)
+    assert store.frameworks == ["F1", "F2"]
+
+    df = pd.read_csv(suppliers_csv)
+    df.loc[0, "framework"] = "F3"
+    df.to_csv(suppliers_csv, index=False)
+    os.utime(suppliers_csv, (1, 1))
+
+    assert store.frameworks == ["F1", "F2", "F3"]
+    assert store.reloads == 1
+
+    # a broken file keeps the last good data
+    suppliers_csv.write_text("framework\n")
+    assert store.frameworks == ["F1", "F2", "F3"]
+
+
+def test_query_flags_filters_and_pages(tmp_path):
+    path = tmp_path / "line_level.csv"
+    pd.DataFrame(
+        {
+            "Contracting Authority": ["Council A", "Council B", "NHS C", "NHS D"],
+            "Supplier": ["S1", "S2", "S3", "S4"],
+            "Award Value": [1, 2, 3, 4],
+            "EvidencedSpend": [10.0, 0.0, 0.0, 0.0],
+            "Contract Start Date": [
+                "2020-01-01",
+                "2020-01-01",
+                "2025-01-01",
+                "2025-05-01",
+            ],
+            "Contract End Date": [
+                "2022-01-01",
+                "2022-01-01",
+                "2027-01-01",
+                "2027-01-01",
+            ],
+            "framework_title": ["F1"] * 4,
+            "Customer Group": ["Local", "Local", "Health", "Health"],
+        }
+    ).to_csv(path, index=False)
+    store = SupplierStore(str(path))
+
+    page = store.query("F1", threshold=3, today=TODAY)
+    assert [s["status"] for s in page["suppliers"]] == [
+        "green",
+        "red",
+        "yellow",
+        "green",
+    ]
+    assert page["counts"] == {"red": 1, "yellow": 1, "green": 2}
+
+    # a higher threshold turns S3 (5 months run) green
+    statuses = store.query("F1", threshold=6, today=TODAY)["suppliers"]
+    assert statuses[2]["status"] == "green"
+
+    red_or_yellow = store.query(
+        "F1", threshold=3, statuses=["red", "yellow"], today=TODAY
+    )
+    assert [s["name"] for s in red_or_yellow["suppliers"]] == ["S2", "S3"]
+
+    assert [
+        s["name"] for s in store.query("F1", buyer="nhs", today=TODAY)["suppliers"]
+    ] == [
+        "S3",
+        "S4",
+    ]
+    health = store.query("F1", customer_group="Health", threshold=3, today=TODAY)
+    assert health["counts"] == {"red": 0, "yellow": 1, "green": 1}
+
+    second = store.query("F1", page=2, per_page=3, today=TODAY)
+    assert (second["total"], second["pages"]) == (4, 2)
+    assert [s["name"] for s in second["suppliers"]] == ["S4"]
+
+    with pytest.raises(ValueError):
+        store.query("F1", statuses=["blue"])
+    with pytest.raises(ValueError):
+        store.query("F1", per_page=0)
+
+
+def test_warm_builds_records_before_first_request(suppliers_csv):
+    store = SupplierStore(str(suppliers_csv))
+    store.warm(TODAY)
+    snapshot = store.snapshot()
+
+    assert set(snapshot._records) == {("F1", TODAY), ("F2", TODAY)}
+    assert snapshot.suppliers("F1", TODAY) is snapshot._records[("F1", TODAY)]
+
+
+def test_rollups_by_group_and_framework(tmp_path):
+    path = tmp_path / "line_level.csv"
+    pd.DataFrame(
+        {
+            "Contracting Authority": ["A", "B", "C", "D"],
+            "Supplier": ["S1", "S1", "S2", "S3"],
+            "Award Value": [100.0, 200.0, None, 400.0],
+            "EvidencedSpend": [10.0, 0.0, 0.0, 5.0],
+            "Contract Start Date": [
+                "2020-01-01",
+                "2020-01-01",
+                "2025-01-01",
+                "2025-01-01",
+            ],
+            "Contract End Date": [
+                "2022-01-01",
+                "2022-01-01",
+                "2027-01-01",
+                "2027-01-01",
+            ],
+            "framework_title": ["F1", "F1", "F1", "F2"],
+            "Customer Group": ["Local", "Local", None, "Health"],
+        }
+    ).to_csv(path, index=False)
+    (tmp_path / "summary_stats.csv").write_text(
+        "Summary Statistic,Value\nTotal Contracts,9\n"
+    )
+    store = SupplierStore(str(path), summary_path=str(tmp_path / "summary_stats.csv"))
+
+    by_supplier = store.rollup("supplier", threshold=3, today=TODAY)
+    assert by_supplier["groups"][0] == {
+        "group": "S1",
+        "contracts": 2,
+        "red": 1,
+        "yellow": 0,
+        "green": 1,
+        "with_spend": 1,
+        "award_value": 300.0,
+        "reported_spend": 10.0,
+    }
+    assert by_supplier["totals"]["contracts"] == 4
+    assert by_supplier["totals"]["award_value"] == 700.0
+
+    f1_groups = store.rollup("customer_group", framework="F1", today=TODAY)["groups"]
+    assert [(g["group"], g["contracts"]) for g in f1_groups] == [
+        ("Local", 2),
+        ("Unknown", 1),
+    ]
+    by_status = store.rollup("status", threshold=3, today=TODAY)["groups"]
+    assert {g["group"]: g["contracts"] for g in by_status} == {
+        "green": 2,
+        "red": 1,
+        "yellow": 1,
+    }
+    assert store.rollup("framework", framework="F3")["groups"] == []
+    assert store.snapshot().summary_stats == [
+        {"statistic": "Total Contracts", "value": 9}
+    ]
+    with pytest.raises(ValueError):
+        store.rollup("colour")
+
+
+def test_missing_start_date_has_no_months_run_and_is_flagged(tmp_path):
+    path = tmp_path / "suppliers.csv"
+    path.write_text(
+        "framework,name,buyer_name,contract_value,contract_start,contract_end,reported_spend\n"
+        "F1,S1,A,100,,2027-01-01,0\n"
+        "F1,S2,B,100,2025-05-01,2027-01-01,0\n"
+        "F1,S3,C,100,,2027-01-01,5\n"
+    )
+    store = SupplierStore(str(path))
+
+    suppliers = store.suppliers("F1", TODAY)
+    assert [s["details"]["Months Run So Far"] for s in suppliers] == [None, 1, None]
+    # the records must serialise as strict JSON, with no bare NaN
+    json.dumps(suppliers, allow_nan=False)
+
+    # running with no spend and no start date: flagged whatever the threshold
+    page = store.query("F1", threshold=6, today=TODAY)
+    assert [s["status"] for s in page["suppliers"]] == ["yellow", "green", "green"]
+    json.dumps(page, allow_nan=False)
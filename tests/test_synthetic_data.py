@@ -0,0 +1,48 @@
+import pandas as pd
+
+from data_io import read_table, table_path
+from scripts.get_data import get_synthetic_data
+from synthetic_data import generate_synthetic_data
+
+
+def test_generates_requested_rows_deterministically():
+    contracts, mi, reg = generate_synthetic_data(5_000, seed=3)
+    again = generate_synthetic_data(5_000, seed=3)
+
+    assert len(mi) == 5_000
+    assert len(contracts) == 125
+    pd.testing.assert_frame_equal(mi, again[1])
+    pd.testing.assert_frame_equal(contracts, again[0])
+    assert not generate_synthetic_data(5_000, seed=4)[1].equals(mi)
+
+
+def test_covers_awkward_cases():
+    contracts, mi, reg = generate_synthetic_data(50_000)
+
+    keys = mi["SupplierKey"]
+    assert keys.isna().any()
+    assert keys.str.endswith(".0").any()
+    # some contract suppliers have no registration number, so no SupplierKey
+    assert (
+        not contracts["SupplierCompanyRegistrationNumber"]
+        .isin(reg["SupplierCompanyRegistrationNumber"])
+        .all()
+    )
+    buyers = set(contracts["buyer"])
+    names = mi["CustomerName"]
+    assert names.isin(buyers).mean() > 0.5
+    assert names.str.isupper().any()
+    assert names.str.endswith(" Ltd").any()
+    assert names.str.fullmatch(r"[A-Z]{2,}").any()
+    # many months per pair
+    assert mi.groupby(["SupplierKey", "CustomerName"]).size().median() > 6
+    assert mi["FinancialMonth"].between(1, 12).all()
+
+
+def test_get_synthetic_data_writes_tables(tmp_path):
+    get_synthetic_data(str(tmp_path), 1_000, data_format="parquet")
+
+    mi = read_table(table_path(str(tmp_path), "mi", "parquet"), "mi")
+    assert len(mi) == 1_000
+    assert str(mi["SupplierKey"].dtype) == "Int64"
+    assert (tmp_path / "watermarks.json").exists()
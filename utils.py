@@ -2,34 +2,245 @@ from __future__ import annotations
 
 import os
 import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Any, Optional, Dict, Tuple
 
 import urllib.parse
-import urllib.request
-import urllib.error
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 """Utilities for calling the external matching API."""
 
+
+def sha256_candidates(list_of_strings: List[str]) -> str:
+    """
+    Hash a candidate list. Order is significant because the API sees the
+    candidates in the order given.
+    """
+    payload = json.dumps(list(list_of_strings), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+TRANSPORTS = ("get", "post", "post_candidate_set")
+
+# candidate sets already registered with the API, keyed by (register URL, set ID)
+_registered_candidate_sets: Dict[Tuple[str, str], str] = {}
+_registered_candidate_sets_lock = threading.Lock()
+
+
+class RequestStats:
+    """Thread-safe record of per-request latencies and retries for the matching API."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies_s: List[float] = []
+        self.retries = 0
+        self.errors = 0
+
+    def record(self, latency_s: float, retries: int = 0, error: bool = False) -> None:
+        with self._lock:
+            self.latencies_s.append(latency_s)
+            self.retries += retries
+            self.errors += int(error)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.latencies_s = []
+            self.retries = 0
+            self.errors = 0
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            latencies = sorted(self.latencies_s)
+            retries, errors = self.retries, self.errors
+        if not latencies:
+            return {"requests": 0, "retries": retries, "errors": errors}
+
+        def pct(q: float) -> float:
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+        return {
+            "requests": len(latencies),
+            "retries": retries,
+            "errors": errors,
+            "total_s": sum(latencies),
+            "mean_s": sum(latencies) / len(latencies),
+            "p50_s": pct(0.50),
+            "p95_s": pct(0.95),
+            "p99_s": pct(0.99),
+            "max_s": latencies[-1],
+        }
+
+
+request_stats = RequestStats()
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _build_http_session(
+    pool_size: Optional[int] = None,
+    retries: Optional[int] = None,
+    backoff_factor: Optional[float] = None,
+) -> requests.Session:
+    pool_size = pool_size or int(os.getenv("MATCH_STRING_API_POOL_SIZE", "10"))
+    retries = retries if retries is not None else int(os.getenv("MATCH_STRING_API_RETRIES", "3"))
+    if backoff_factor is None:
+        backoff_factor = float(os.getenv("MATCH_STRING_API_BACKOFF", "0.5"))
+
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(500, 502, 503, 504),
+        # matching is read-only, so POSTs are safe to retry
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def configure_http_session(
+    pool_size: Optional[int] = None,
+    retries: Optional[int] = None,
+    backoff_factor: Optional[float] = None,
+) -> requests.Session:
+    """
+    (Re)build the process-wide keep-alive session used for all matching API calls.
+    The previous session is closed, so call this before starting requests rather
+    than while they are in flight.
+
+    Settings fall back to env vars, then defaults:
+      - pool_size: MATCH_STRING_API_POOL_SIZE (10) connections kept open per host;
+        should be at least the number of concurrent workers
+      - retries: MATCH_STRING_API_RETRIES (3) retries on connection errors and 5xx
+      - backoff_factor: MATCH_STRING_API_BACKOFF (0.5) seconds, doubled per retry
+    """
+    global _session
+    session = _build_http_session(pool_size, retries, backoff_factor)
+    with _session_lock:
+        old, _session = _session, session
+    if old is not None:
+        old.close()
+    return session
+
+
+def _get_session() -> requests.Session:
+    global _session
+    session = _session
+    if session is None:
+        # the first calls may come from several worker threads at once; only one builds it
+        with _session_lock:
+            if _session is None:
+                _session = _build_http_session()
+            session = _session
+    return session
+
+
+def _send(method: str, url: str, timeout_s: float, **kwargs) -> Tuple[int, str]:
+    start = time.perf_counter()
+    try:
+        resp = _get_session().request(method, url, timeout=timeout_s, **kwargs)
+    except requests.RequestException as e:
+        request_stats.record(time.perf_counter() - start, error=True)
+        raise RuntimeError(f"Match API connection error: {e}") from e
+
+    history = getattr(getattr(resp.raw, "retries", None), "history", None) or ()
+    request_stats.record(
+        time.perf_counter() - start, retries=len(history), error=resp.status_code >= 400
+    )
+    if resp.status_code >= 400:
+        raise RuntimeError(f"Match API error {resp.status_code}: {resp.text}")
+    return resp.status_code, resp.text
+
+
 def _http_get(url: str, timeout_s: float = 60.0) -> Tuple[int, str]:
     """
     Internal helper: HTTP GET and return (status_code, response_text).
     Split out to make it easy to mock in unit tests.
     """
-    req = urllib.request.Request(url, method="GET")
+    return _send("GET", url, timeout_s)
+
+
+def _http_post_json(url: str, payload: Dict[str, Any], timeout_s: float = 60.0) -> Tuple[int, str]:
+    """
+    Internal helper: HTTP POST a JSON body and return (status_code, response_text).
+    Split out to make it easy to mock in unit tests.
+    """
+    return _send("POST", url, timeout_s, json=payload)
+
+
+def _resolve_transport(transport: Optional[str]) -> str:
+    resolved = (transport or os.getenv("MATCH_STRING_API_TRANSPORT") or "get").strip().lower()
+    if resolved not in TRANSPORTS:
+        raise ValueError(f"Unknown match API transport '{resolved}'. Expected one of {TRANSPORTS}.")
+    return resolved
+
+
+def register_candidate_set(
+    list_of_strings: List[str],
+    api_url: Optional[str] = None,
+    timeout_s: float = 60.0,
+) -> str:
+    """
+    Register a candidate list with the API once so later match calls can refer to it
+    by ID instead of resending it (POST /candidate_sets, a sibling of /match).
+
+    Expected request body:
+      { "candidate_set_id": "<sha256>", "candidates": ["...", ...] }
+
+    Expected response body:
+      { "candidate_set_id": "<id>" }   (the server may return its own ID)
+
+    Registrations are remembered for the lifetime of the process, so repeated calls
+    with the same candidates don't re-upload them.
+    """
+    resolved_api_url = api_url or os.getenv("MATCH_STRING_API_URL")
+    if not resolved_api_url:
+        raise ValueError(
+            "No API URL provided. Set MATCH_STRING_API_URL or pass api_url=... to register_candidate_set()."
+        )
+    register_url = os.getenv("MATCH_STRING_API_CANDIDATE_SETS_URL") or urllib.parse.urljoin(
+        resolved_api_url.split("?")[0], "candidate_sets"
+    )
+    # the content hash is the set's ID, so the same candidates are only uploaded once
+    set_id = sha256_candidates(list_of_strings)
+
+    key = (register_url, set_id)
+    with _registered_candidate_sets_lock:
+        if key in _registered_candidate_sets:
+            return _registered_candidate_sets[key]
+
+    # upload without holding the lock, so other candidate sets aren't held up by this request
+    status, text = _http_post_json(
+        register_url,
+        {"candidate_set_id": set_id, "candidates": list(list_of_strings)},
+        timeout_s=timeout_s,
+    )
+    if status < 200 or status >= 300:
+        raise RuntimeError(f"Match API returned status {status}: {text}")
+    server_id = set_id
     try:
-        with urllib.request.urlopen(req, timeout=timeout_s) as resp:
-            status = int(getattr(resp, "status", 200) or 200)
-            text = resp.read().decode("utf-8", errors="replace")
-            return status, text
-    except urllib.error.HTTPError as e:
-        body = ""
-        try:
-            body = (e.read() or b"").decode("utf-8", errors="replace")
-        except Exception:
-            body = ""
-        raise RuntimeError(f"Match API error {e.code}: {body}") from e
-    except urllib.error.URLError as e:
-        raise RuntimeError(f"Match API connection error: {e}") from e
+        data = json.loads(text)
+        if isinstance(data, dict) and data.get("candidate_set_id"):
+            server_id = str(data["candidate_set_id"])
+    except ValueError:
+        pass
+
+    with _registered_candidate_sets_lock:
+        # a concurrent registration of the same set may have finished first
+        return _registered_candidate_sets.setdefault(key, server_id)
 
 
 def match_string_via_api(
@@ -39,12 +250,18 @@ def match_string_via_api(
     api_url: Optional[str] = None,
     timeout_s: float = 60.0,
     extra_query_params: Optional[Dict[str, str]] = None,
+    transport: Optional[str] = None,
+    candidate_set: Optional[str] = None,
 ) -> str:
     """
-    Call the external matching API (GET /match) instead of running LangChain locally.
+    Call the external matching API (/match) instead of running LangChain locally.
 
-    Expected endpoint signature (FastAPI):
+    Expected endpoint signatures (FastAPI):
       - GET /match?input_string=...&candidates=...&candidates=...&prompt_path=...
+      - POST /match with JSON body
+          { "input_string": "...", "candidates": [...], "prompt_path": "..." }
+        or, for a candidate set registered via register_candidate_set(),
+          { "input_string": "...", "candidate_set_id": "...", "exclude": [...], "prompt_path": "..." }
 
     Expected response body:
       { "input_string": "...", "match": "<candidate>|null", "raw": "..." }
@@ -56,6 +273,10 @@ def match_string_via_api(
     Configuration:
       - api_url parameter OR env var MATCH_STRING_API_URL must be set to the full URL
         of the `/match` endpoint.
+      - transport parameter OR env var MATCH_STRING_API_TRANSPORT selects "get" (default),
+        "post" (candidates in a JSON body) or "post_candidate_set" (candidates
+        registered once, then referenced by ID). `candidate_set` may pass an ID
+        already returned by register_candidate_set().
     """
     resolved_api_url = api_url or os.getenv("MATCH_STRING_API_URL")
     if not resolved_api_url:
@@ -63,22 +284,45 @@ def match_string_via_api(
             "No API URL provided. Set MATCH_STRING_API_URL or pass api_url=... to match_string_via_api()."
         )
 
-    # Remove input string from candidates if present
-    candidates = [i for i in list_of_strings if i != input_string]
+    resolved_transport = _resolve_transport(transport)
+    if candidate_set is not None and resolved_transport == "get":
+        raise ValueError("candidate_set requires a POST transport.")
 
-    query: Dict[str, Any] = {
-        "input_string": input_string,
-        "candidates": candidates,  # repeated param via doseq=True
-    }
-    if prompt_path:
-        query["prompt_path"] = prompt_path
-    if extra_query_params:
-        query.update(extra_query_params)
+    if resolved_transport == "get":
+        # Remove input string from candidates if present
+        candidates = [i for i in list_of_strings if i != input_string]
 
-    qs = urllib.parse.urlencode(query, doseq=True)
-    url = resolved_api_url + ("&" if "?" in resolved_api_url else "?") + qs
+        query: Dict[str, Any] = {
+            "input_string": input_string,
+            "candidates": candidates,  # repeated param via doseq=True
+        }
+        if prompt_path:
+            query["prompt_path"] = prompt_path
+        if extra_query_params:
+            query.update(extra_query_params)
+
+        qs = urllib.parse.urlencode(query, doseq=True)
+        url = resolved_api_url + ("&" if "?" in resolved_api_url else "?") + qs
+
+        status, text = _http_get(url, timeout_s=timeout_s)
+    else:
+        payload: Dict[str, Any] = {"input_string": input_string}
+        if resolved_transport == "post_candidate_set" or candidate_set is not None:
+            payload["candidate_set_id"] = candidate_set or register_candidate_set(
+                list_of_strings, api_url=resolved_api_url, timeout_s=timeout_s
+            )
+            # the registered set is shared, so exclude the input server-side instead
+            if input_string in list_of_strings:
+                payload["exclude"] = [input_string]
+        else:
+            payload["candidates"] = [i for i in list_of_strings if i != input_string]
+        if prompt_path:
+            payload["prompt_path"] = prompt_path
+        if extra_query_params:
+            payload.update(extra_query_params)
+
+        status, text = _http_post_json(resolved_api_url, payload, timeout_s=timeout_s)
 
-    status, text = _http_get(url, timeout_s=timeout_s)
     if status < 200 or status >= 300:
         raise RuntimeError(f"Match API returned status {status}: {text}")
 
@@ -106,3 +350,89 @@ def match_string_via_api(
     if raw_result in list_of_strings or raw_result == "None":
         return raw_result
     return "None"
+
+
+def match_strings_via_api(
+    inputs: List[str],
+    list_of_strings: List[str],
+    prompt_path: Optional[str] = None,
+    api_url: Optional[str] = None,
+    timeout_s: float = 60.0,
+    extra_query_params: Optional[Dict[str, str]] = None,
+    max_workers: int = 8,
+    progress_every: int = 50,
+    transport: Optional[str] = None,
+    candidate_lists: Optional[List[List[str]]] = None,
+) -> List[str]:
+    """
+    Match many input strings against the same candidate list, dispatching the
+    calls to match_string_via_api() through a bounded thread pool.
+
+    `candidate_lists` optionally gives each input its own candidate list (e.g. a
+    shortlist from candidate_index.shortlist_candidates()), overriding list_of_strings.
+
+    Return contract:
+      - a list the same length as `inputs`, in input order, where each element
+        follows the match_string_via_api() contract (exact candidate or "None")
+
+    Concurrency:
+      - at most `max_workers` requests are in flight at once; use 1 to run
+        sequentially
+      - the first failing request is re-raised and pending requests are cancelled
+
+    With the "post_candidate_set" transport the candidates are registered once up
+    front and every request refers to them by ID. Per-input candidate lists are
+    never registered; they are sent in the POST body instead.
+    """
+    if not inputs:
+        return []
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1.")
+    if candidate_lists is not None and len(candidate_lists) != len(inputs):
+        raise ValueError("candidate_lists must have one entry per input.")
+
+    # Resolve the URL once so a missing configuration fails before any dispatch
+    resolved_api_url = api_url or os.getenv("MATCH_STRING_API_URL")
+    if not resolved_api_url:
+        raise ValueError(
+            "No API URL provided. Set MATCH_STRING_API_URL or pass api_url=... to match_strings_via_api()."
+        )
+
+    resolved_transport = _resolve_transport(transport)
+    candidate_set = None
+    if resolved_transport == "post_candidate_set" and candidate_lists is not None:
+        resolved_transport = "post"
+    if resolved_transport == "post_candidate_set":
+        candidate_set = register_candidate_set(
+            list_of_strings, api_url=resolved_api_url, timeout_s=timeout_s
+        )
+
+    results: List[Optional[str]] = [None] * len(inputs)
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(inputs)))
+    try:
+        futures = {
+            executor.submit(
+                match_string_via_api,
+                input_string=input_string,
+                list_of_strings=(
+                    list_of_strings if candidate_lists is None else candidate_lists[idx]
+                ),
+                prompt_path=prompt_path,
+                api_url=resolved_api_url,
+                timeout_s=timeout_s,
+                extra_query_params=extra_query_params,
+                transport=resolved_transport,
+                candidate_set=candidate_set,
+            ): idx
+            for idx, input_string in enumerate(inputs)
+        }
+        done = 0
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            done += 1
+            if progress_every and done % progress_every == 0:
+                print(f"Matched {done} / {len(inputs)}")
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return [str(r) for r in results]
@@ -0,0 +1,16 @@
+from app import app, store
+
+"""
+Production entry point for the dashboard, served by gunicorn with the settings in
+gunicorn.conf.py:
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+With preload_app the master process imports this module once: the supplier data
+is loaded and today's records built here, and the forked workers share those
+pages copy-on-write instead of each parsing the CSV.
+"""
+
+store.warm()
+
+application = app